@@ -18,6 +18,7 @@ from .geometry import geometry, Point, Line, Circle, Geometry
 from . import constants
 from .equation import evaluate_latex, evaluate_latex_single_var
 from .ray import Ray
+from .ray_batch import RayBatch
 from .scene import Scene
 from .simulator import Simulator
 from .svg_renderer import SVGRenderer
@@ -27,6 +28,7 @@ __all__ = [
     'constants',
     'evaluate_latex', 'evaluate_latex_single_var',
     'Ray',
+    'RayBatch',
     'Scene',
     'Simulator',
     'SVGRenderer'
@@ -0,0 +1,344 @@
+"""
+Copyright 2024 The Ray Optics Simulation authors and contributors
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Bounding volume hierarchy over the bounding boxes of scene objects.
+
+The simulator builds one per run so that each ray is only tested against
+the objects whose bounding box it passes through, instead of against every
+optical object in the scene.
+"""
+
+import heapq
+import math
+
+
+def ray_box_entry(box, ox, oy, dx, dy):
+    """
+    Slab test of a ray against an axis-aligned box.
+
+    The ray is the half-line (ox, oy) + t * (dx, dy) with t >= 0.
+
+    Args:
+        box (tuple): The box as (min_x, min_y, max_x, max_y)
+        ox, oy (float): Starting point of the ray
+        dx, dy (float): Direction of the ray (need not be normalized)
+
+    Returns:
+        float: The parameter t at which the ray enters the box (0 if it starts
+            inside), or inf if it misses the box
+    """
+    t_enter = 0.0
+    t_exit = math.inf
+    for origin, direction, lo, hi in ((ox, dx, box[0], box[2]), (oy, dy, box[1], box[3])):
+        if direction == 0.0:
+            # Parallel to this slab: inside it everywhere or nowhere
+            if origin < lo or origin > hi:
+                return math.inf
+            continue
+        t1 = (lo - origin) / direction
+        t2 = (hi - origin) / direction
+        if t1 > t2:
+            t1, t2 = t2, t1
+        if t1 > t_enter:
+            t_enter = t1
+        if t2 < t_exit:
+            t_exit = t2
+        if t_enter > t_exit:
+            return math.inf
+    return t_enter
+
+
+def inverse_direction(dx, dy):
+    """
+    Precompute what `ray_box_entry_inv` needs to know about a ray direction.
+
+    Args:
+        dx, dy (float): Direction of the ray (need not be normalized)
+
+    Returns:
+        tuple: (inv_dx, inv_dy, near_x, near_y), with the inverse direction
+            components and the indices in a (min_x, min_y, max_x, max_y) box
+            of the sides the ray reaches first along each axis
+    """
+    inv_dx = 1.0 / dx if dx != 0.0 else math.copysign(math.inf, dx)
+    inv_dy = 1.0 / dy if dy != 0.0 else math.copysign(math.inf, dy)
+    return inv_dx, inv_dy, 0 if inv_dx >= 0 else 2, 1 if inv_dy >= 0 else 3
+
+
+def ray_box_entry_inv(box, ox, oy, inv_dx, inv_dy, near_x, near_y):
+    """
+    Branch-light version of `ray_box_entry` for a precomputed ray direction.
+
+    Args:
+        box (tuple): The box as (min_x, min_y, max_x, max_y)
+        ox, oy (float): Starting point of the ray
+        inv_dx, inv_dy, near_x, near_y: As returned by `inverse_direction`
+
+    Returns:
+        float: The parameter t at which the ray enters the box (0 if it starts
+            inside), or inf if it misses the box
+    """
+    # For an axis-parallel ray starting exactly on a box edge, the offset along
+    # that axis is 0 and 0 * inf gives NaN. Every comparison with NaN is False,
+    # so that slab is ignored, which is right since the ray is inside it.
+    tx_near = (box[near_x] - ox) * inv_dx
+    tx_far = (box[2 - near_x] - ox) * inv_dx
+    ty_near = (box[near_y] - oy) * inv_dy
+    ty_far = (box[4 - near_y] - oy) * inv_dy
+    t_enter = 0.0
+    if tx_near > t_enter:
+        t_enter = tx_near
+    if ty_near > t_enter:
+        t_enter = ty_near
+    t_exit = math.inf
+    if tx_far < t_exit:
+        t_exit = tx_far
+    if ty_far < t_exit:
+        t_exit = ty_far
+    return t_enter if t_enter <= t_exit else math.inf
+
+
+class BoundingVolumeHierarchy:
+    """
+    Binary tree of axis-aligned bounding boxes.
+
+    Each leaf holds up to `leaf_size` items, and each node's box encloses the
+    boxes of everything below it. Nodes are split at the median of the item
+    centers along the longer axis of the node.
+
+    The nodes are stored in flat lists indexed by node number, with the root
+    at 0. An internal node k has its children in `_left[k]` and `_right[k]`,
+    and `_items[k]` is None; a leaf has its (item_id, box) pairs in
+    `_items[k]`.
+
+    Attributes:
+        leaf_size (int): Maximum number of items in a leaf
+        size (int): Number of items in the tree
+    """
+
+    def __init__(self, items, leaf_size=4, pad=0.0):
+        """
+        Build the hierarchy.
+
+        Args:
+            items (list): (item_id, box) pairs, with each box as
+                (min_x, min_y, max_x, max_y)
+            leaf_size (int): Maximum number of items in a leaf
+            pad (float): Margin added on every side of each box, so that hits
+                exactly on a box boundary are not culled by rounding errors
+        """
+        self.leaf_size = max(1, leaf_size)
+        self.size = len(items)
+        self._boxes = []
+        self._left = []
+        self._right = []
+        self._items = []
+        if items:
+            padded = [
+                (item_id, (box[0] - pad, box[1] - pad, box[2] + pad, box[3] + pad))
+                for item_id, box in items
+            ]
+            self._build(padded)
+
+    def _build(self, items):
+        """Append the subtree of the given (item_id, box) pairs and return its node number."""
+        node = len(self._boxes)
+        self._boxes.append((
+            min(box[0] for _, box in items),
+            min(box[1] for _, box in items),
+            max(box[2] for _, box in items),
+            max(box[3] for _, box in items),
+        ))
+        self._left.append(-1)
+        self._right.append(-1)
+
+        if len(items) <= self.leaf_size:
+            self._items.append(items)
+            return node
+        self._items.append(None)
+
+        min_x, min_y, max_x, max_y = self._boxes[node]
+        axis = 0 if max_x - min_x >= max_y - min_y else 1
+        items = sorted(items, key=lambda item: item[1][axis] + item[1][axis + 2])
+        middle = len(items) // 2
+        self._left[node] = self._build(items[:middle])
+        self._right[node] = self._build(items[middle:])
+        return node
+
+    def query(self, ox, oy, dx, dy):
+        """
+        Find the items whose box is hit by a ray.
+
+        Args:
+            ox, oy (float): Starting point of the ray
+            dx, dy (float): Direction of the ray (need not be normalized)
+
+        Returns:
+            list: Ids of the items whose (padded) box the half-line
+                (ox, oy) + t * (dx, dy), t >= 0, passes through, in no
+                particular order
+        """
+        found = []
+        if not self._boxes:
+            return found
+        inv_dx, inv_dy, near_x, near_y = inverse_direction(dx, dy)
+        boxes = self._boxes
+        items = self._items
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if ray_box_entry_inv(boxes[node], ox, oy, inv_dx, inv_dy, near_x, near_y) == math.inf:
+                continue
+            leaf_items = items[node]
+            if leaf_items is not None:
+                for item_id, box in leaf_items:
+                    if ray_box_entry_inv(box, ox, oy, inv_dx, inv_dy, near_x, near_y) < math.inf:
+                        found.append(item_id)
+            else:
+                stack.append(self._right[node])
+                stack.append(self._left[node])
+        return found
+
+    def query_ordered(self, ox, oy, dx, dy):
+        """
+        Find the items whose box is hit by a ray, nearest box first.
+
+        Args:
+            ox, oy (float): Starting point of the ray
+            dx, dy (float): Direction of the ray (need not be normalized)
+
+        Returns:
+            list: (t_enter, item_id) pairs for the items whose (padded) box the
+                ray passes through, sorted by the parameter t_enter at which
+                the ray enters the box (see `ray_box_entry`)
+        """
+        return list(self.iter_ordered(ox, oy, dx, dy))
+
+    def iter_ordered(self, ox, oy, dx, dy):
+        """
+        Lazily find the items whose box is hit by a ray, nearest box first.
+
+        Nodes are expanded in the order the ray enters them, so a caller that
+        stops early (e.g. once the boxes start beyond the nearest hit it has
+        found) never visits the subtrees farther along the ray.
+
+        Args:
+            ox, oy (float): Starting point of the ray
+            dx, dy (float): Direction of the ray (need not be normalized)
+
+        Yields:
+            tuple: (t_enter, item_id) pairs, as returned by `query_ordered`
+        """
+        if not self._boxes:
+            return
+        inv_dx, inv_dy, near_x, near_y = inverse_direction(dx, dy)
+        t_enter = ray_box_entry_inv(self._boxes[0], ox, oy, inv_dx, inv_dy, near_x, near_y)
+        if t_enter == math.inf:
+            return
+        boxes = self._boxes
+        items = self._items
+        # Entries are (t_enter, 0, item_id) for items and (t_enter, 1, node) for
+        # nodes; a box inside another is never entered earlier, so items come
+        # out in order of t_enter
+        heap = [(t_enter, 1, 0)]
+        while heap:
+            t_enter, is_node, index = heapq.heappop(heap)
+            if not is_node:
+                yield t_enter, index
+                continue
+            leaf_items = items[index]
+            if leaf_items is not None:
+                for item_id, box in leaf_items:
+                    t_item = ray_box_entry_inv(box, ox, oy, inv_dx, inv_dy, near_x, near_y)
+                    if t_item < math.inf:
+                        heapq.heappush(heap, (t_item, 0, item_id))
+            else:
+                for child in (self._left[index], self._right[index]):
+                    t_child = ray_box_entry_inv(boxes[child], ox, oy, inv_dx, inv_dy, near_x, near_y)
+                    if t_child < math.inf:
+                        heapq.heappush(heap, (t_child, 1, child))
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import random
+
+    print("Testing bounding volume hierarchy...\n")
+
+    # Test 1: Slab test
+    print("Test 1: Ray/box entry")
+    box = (10, -1, 12, 1)
+    print(f"  Towards the box: {ray_box_entry(box, 0, 0, 1, 0)}")
+    print(f"  Away from the box: {ray_box_entry(box, 0, 0, -1, 0)}")
+    print(f"  Starting inside: {ray_box_entry(box, 11, 0, 0, 1)}")
+    assert ray_box_entry(box, 0, 0, 1, 0) == 10
+    assert ray_box_entry(box, 0, 0, -1, 0) == math.inf
+    assert ray_box_entry(box, 11, 0, 0, 1) == 0
+    assert ray_box_entry(box, 0, 5, 1, 0) == math.inf
+    for ox, oy, dx, dy in ((0, 0, 1, 0), (0, 0, -1, 0), (11, 0, 0, 1), (0, 5, 1, 0),
+                           (10, 5, 0, -1), (12, -3, 0, 1), (0, 1, 1, 0), (13, 3, -1, -1),
+                           (10, -3, 0, 1), (0, -1, 1, 0), (13, 1, -1, 0)):
+        assert ray_box_entry_inv(box, ox, oy, *inverse_direction(dx, dy)) == \
+            ray_box_entry(box, ox, oy, dx, dy)
+
+    # Test 2: Queries agree with testing every box
+    print("\nTest 2: Queries against brute force")
+    rng = random.Random(1)
+    items = []
+    for i in range(200):
+        x = rng.uniform(-500, 500)
+        y = rng.uniform(-500, 500)
+        items.append((i, (x, y, x + rng.uniform(0, 30), y + rng.uniform(0, 30))))
+    bvh = BoundingVolumeHierarchy(items)
+    print(f"  Items: {bvh.size}, nodes: {len(bvh._boxes)}")
+    total = 0
+    for _ in range(500):
+        ox, oy = rng.uniform(-600, 600), rng.uniform(-600, 600)
+        angle = rng.uniform(0, 2 * math.pi)
+        dx, dy = math.cos(angle), math.sin(angle)
+        found = sorted(bvh.query(ox, oy, dx, dy))
+        expected = [i for i, b in items if ray_box_entry(b, ox, oy, dx, dy) < math.inf]
+        assert found == expected
+        total += len(found)
+    print(f"  Average boxes hit per ray: {total / 500:.1f} of {len(items)}")
+
+    # Test 3: Empty hierarchy
+    print("\nTest 3: Empty hierarchy")
+    print(f"  Query result: {BoundingVolumeHierarchy([]).query(0, 0, 1, 0)}")
+    assert BoundingVolumeHierarchy([]).query_ordered(0, 0, 1, 0) == []
+
+    # Test 4: Ordered queries
+    print("\nTest 4: Nearest box first")
+    row = BoundingVolumeHierarchy([(i, (x, -1, x + 1, 1)) for i, x in enumerate((30, 10, 50, 20))])
+    ordered = row.query_ordered(0, 0, 1, 0)
+    print(f"  Ordered result: {ordered}")
+    assert ordered == [(10, 1), (20, 3), (30, 0), (50, 2)]
+    for _ in range(100):
+        ox, oy = rng.uniform(-600, 600), rng.uniform(-600, 600)
+        angle = rng.uniform(0, 2 * math.pi)
+        dx, dy = math.cos(angle), math.sin(angle)
+        ordered = bvh.query_ordered(ox, oy, dx, dy)
+        assert sorted(i for _, i in ordered) == sorted(bvh.query(ox, oy, dx, dy))
+        assert [t for t, _ in ordered] == sorted(t for t, _ in ordered)
+
+    # Test 5: Stopping early
+    print("\nTest 5: Lazy ordered queries")
+    nearest = next(row.iter_ordered(0, 0, 1, 0))
+    print(f"  Nearest box along +x: {nearest}")
+    assert nearest == (10, 1)
+
+    print("\nBounding volume hierarchy test completed successfully!")
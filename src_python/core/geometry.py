@@ -25,7 +25,12 @@ class Point:
     """
     A point in 2D space.
     Can be converted to/from Shapely Point objects.
+
+    Uses __slots__ since points are created in large numbers by the
+    intersection routines; this avoids a per-instance __dict__.
     """
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: float, y: float):
         self.x = x
         self.y = y
@@ -194,12 +199,35 @@ class Geometry:
         Returns:
             Intersection point
         """
-        A = l1.p2.x * l1.p1.y - l1.p1.x * l1.p2.y
-        B = l2.p2.x * l2.p1.y - l2.p1.x * l2.p2.y
-        xa = l1.p2.x - l1.p1.x
-        xb = l2.p2.x - l2.p1.x
-        ya = l1.p2.y - l1.p1.y
-        yb = l2.p2.y - l2.p1.y
+        x, y = Geometry.lines_intersection_raw(
+            l1.p1.x, l1.p1.y, l1.p2.x, l1.p2.y,
+            l2.p1.x, l2.p1.y, l2.p2.x, l2.p2.y
+        )
+        return Geometry.point(x, y)
+
+    @staticmethod
+    def lines_intersection_raw(x1: float, y1: float, x2: float, y2: float,
+                               x3: float, y3: float, x4: float, y4: float) -> Tuple[float, float]:
+        """
+        Calculate the intersection of two lines given by plain coordinates.
+
+        Same as lines_intersection(), for hot loops that should not allocate
+        Point and Line objects. Only uses plain float arithmetic, so it can
+        also be compiled with Numba.
+
+        Args:
+            x1, y1, x2, y2: Two points on the first line
+            x3, y3, x4, y4: Two points on the second line
+
+        Returns:
+            Tuple (x, y) of the intersection, or (inf, inf) for parallel lines
+        """
+        A = x2 * y1 - x1 * y2
+        B = x4 * y3 - x3 * y4
+        xa = x2 - x1
+        xb = x4 - x3
+        ya = y2 - y1
+        yb = y4 - y3
 
         denominator = xa * yb - xb * ya
 
@@ -207,12 +235,9 @@ class Geometry:
         if abs(denominator) < 1e-12:
             # Lines are parallel or coincident - return a point at infinity
             # This signals "no intersection" to the caller
-            return Geometry.point(float('inf'), float('inf'))
-
-        x = (A * xb - B * xa) / denominator
-        y = (A * yb - B * ya) / denominator
+            return math.inf, math.inf
 
-        return Geometry.point(x, y)
+        return (A * xb - B * xa) / denominator, (A * yb - B * ya) / denominator
 
     @staticmethod
     def line_circle_intersections(l1: Line, c1: Circle) -> List[Point]:
@@ -265,6 +290,36 @@ class Geometry:
 
         return ret
 
+    @staticmethod
+    def ray_circle_ts(rpx: float, rpy: float, rdx: float, rdy: float,
+                      cx: float, cy: float, r_sq: float) -> Tuple[float, float, bool]:
+        """
+        Calculate where a line crosses a circle, as distances along the line.
+
+        Uses the projection form: with A the line origin, M the circle center
+        and v the unit direction, t_m = AM.v and the half chord is
+        sqrt(r^2 - |AM|^2 + t_m^2). Only uses plain float arithmetic, so it
+        can also be compiled with Numba.
+
+        Args:
+            rpx, rpy: Origin of the line
+            rdx, rdy: Unit direction of the line
+            cx, cy: Center of the circle
+            r_sq: Squared radius of the circle
+
+        Returns:
+            Tuple (t1, t2, hit) with t1 <= t2, such that the intersections are
+            at origin + t * direction; hit is False if the line misses the circle
+        """
+        amx = cx - rpx
+        amy = cy - rpy
+        tm = amx * rdx + amy * rdy
+        d_sq = r_sq - (amx * amx + amy * amy - tm * tm)
+        if d_sq < 0:
+            return 0.0, 0.0, False
+        s = math.sqrt(d_sq)
+        return tm - s, tm + s, True
+
     @staticmethod
     def line_curve_intersections(l1: Line, c1) -> List[Point]:
         """
@@ -294,6 +349,21 @@ class Geometry:
         """
         return (p1.x - r1.p1.x) * (r1.p2.x - r1.p1.x) + (p1.y - r1.p1.y) * (r1.p2.y - r1.p1.y) >= 0
 
+    @staticmethod
+    def intersection_is_on_ray_raw(px: float, py: float,
+                                   x1: float, y1: float, x2: float, y2: float) -> bool:
+        """
+        Same as intersection_is_on_ray(), with plain coordinates.
+
+        Args:
+            px, py: Point to test
+            x1, y1, x2, y2: Ray starting at (x1, y1) and passing through (x2, y2)
+
+        Returns:
+            True if point is on the ray
+        """
+        return (px - x1) * (x2 - x1) + (py - y1) * (y2 - y1) >= 0
+
     @staticmethod
     def intersection_is_on_segment(p1: Point, s1: Line) -> bool:
         """
@@ -310,6 +380,22 @@ class Geometry:
         cond2 = (p1.x - s1.p2.x) * (s1.p1.x - s1.p2.x) + (p1.y - s1.p2.y) * (s1.p1.y - s1.p2.y) >= 0
         return cond1 and cond2
 
+    @staticmethod
+    def intersection_is_on_segment_raw(px: float, py: float,
+                                       x1: float, y1: float, x2: float, y2: float) -> bool:
+        """
+        Same as intersection_is_on_segment(), with plain coordinates.
+
+        Args:
+            px, py: Point to test
+            x1, y1, x2, y2: Endpoints of the segment
+
+        Returns:
+            True if point is on the segment
+        """
+        return ((px - x1) * (x2 - x1) + (py - y1) * (y2 - y1) >= 0 and
+                (px - x2) * (x1 - x2) + (py - y2) * (y1 - y2) >= 0)
+
     @staticmethod
     def intersection_is_on_curve(p1: Point, curve, threshold: float) -> bool:
         """
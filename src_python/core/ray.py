@@ -14,6 +14,67 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import math
+
+# Handle both relative imports (when used as a module) and absolute imports (when
+# this module or a sibling module is run as a script)
+try:
+    from .constants import GREEN_WAVELENGTH, RED_WAVELENGTH, BLUE_WAVELENGTH
+except ImportError:
+    from constants import GREEN_WAVELENGTH, RED_WAVELENGTH, BLUE_WAVELENGTH
+
+# Default brightness shared by all rays created without explicit brightness
+_DEFAULT_BRIGHTNESS = 1.0
+
+# Canonical float objects for the most common brightness and wavelength values.
+# Rays unpacked from a RayBatch would otherwise each allocate their own float
+# objects for these values.
+_INTERNED_SCALARS = {
+    value: value for value in (
+        0.0, 0.5, _DEFAULT_BRIGHTNESS,
+        float(GREEN_WAVELENGTH), float(RED_WAVELENGTH), float(BLUE_WAVELENGTH)
+    )
+}
+
+
+class RayPool:
+    """
+    Free list of Ray instances available for reuse.
+
+    Simulations create and discard many short-lived rays. Released rays are
+    kept here and handed out again by Ray.acquire(), which avoids the
+    allocation and garbage collection cost of building new objects.
+
+    The pool holds at most max_size rays; rays released while it is full are
+    left to the garbage collector, so a burst of rays does not stay in memory
+    for the lifetime of the process.
+
+    Attributes:
+        max_size (int): Maximum number of pooled rays
+    """
+
+    DEFAULT_MAX_SIZE = 4096
+
+    __slots__ = ('_free', 'max_size')
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        """
+        Initialize an empty pool.
+
+        Args:
+            max_size (int): Maximum number of pooled rays (default: 4096)
+        """
+        self._free = []
+        self.max_size = max_size
+
+    def __len__(self):
+        """Number of rays available for reuse."""
+        return len(self._free)
+
+    def clear(self):
+        """Drop all pooled rays."""
+        self._free.clear()
+
 
 class Ray:
     """
@@ -34,7 +95,18 @@ class Ray:
         body_merging_obj (object or None): Object for surface merging (Phase 2.5)
     """
 
-    def __init__(self, p1, p2, brightness_s=1.0, brightness_p=1.0, wavelength=None):
+    # Below this squared length, p1 -> p2 has no usable direction
+    MIN_DIRECTION_LENGTH_SQUARED = 1e-20
+
+    # Rays are created in large numbers during simulation; fixed slots avoid
+    # a per-instance __dict__ and make attribute access faster.
+    __slots__ = ('_p1', '_p2', 'brightness_s', 'brightness_p', 'wavelength',
+                 'gap', 'is_new', 'body_merging_obj', '_direction')
+
+    _pool = RayPool()
+
+    def __init__(self, p1, p2, brightness_s=_DEFAULT_BRIGHTNESS, brightness_p=_DEFAULT_BRIGHTNESS,
+                 wavelength=None):
         """
         Initialize a ray.
 
@@ -45,14 +117,15 @@ class Ray:
             brightness_p (float): P-polarization brightness (default: 1.0)
             wavelength (float or None): Wavelength in nm (default: None for white)
         """
-        self.p1 = p1
-        self.p2 = p2
+        self._p1 = p1
+        self._p2 = p2
         self.brightness_s = brightness_s
         self.brightness_p = brightness_p
         self.wavelength = wavelength
         self.gap = False
         self.is_new = True
         self.body_merging_obj = None  # Reserved for Phase 2.5 surface merging
+        self._direction = None
 
     def copy(self):
         """
@@ -61,18 +134,182 @@ class Ray:
         Returns:
             Ray: A new Ray object with the same properties
         """
-        new_ray = Ray(
-            p1={'x': self.p1['x'], 'y': self.p1['y']},
-            p2={'x': self.p2['x'], 'y': self.p2['y']},
-            brightness_s=self.brightness_s,
-            brightness_p=self.brightness_p,
-            wavelength=self.wavelength
-        )
+        # Fill the slots directly instead of going through __init__, reusing a
+        # pooled ray if one is available
+        free = self._pool._free
+        new_ray = free.pop() if free else Ray.__new__(Ray)
+        p1 = self._p1
+        p2 = self._p2
+        new_ray._p1 = {'x': p1['x'], 'y': p1['y']}
+        new_ray._p2 = {'x': p2['x'], 'y': p2['y']}
+        new_ray.brightness_s = self.brightness_s
+        new_ray.brightness_p = self.brightness_p
+        new_ray.wavelength = self.wavelength
         new_ray.gap = self.gap
         new_ray.is_new = self.is_new
         new_ray.body_merging_obj = self.body_merging_obj
+        new_ray._direction = None
         return new_ray
 
+    @property
+    def p1(self):
+        return self._p1
+
+    @p1.setter
+    def p1(self, point):
+        self._p1 = point
+        self._direction = None
+
+    @property
+    def p2(self):
+        return self._p2
+
+    @p2.setter
+    def p2(self, point):
+        self._p2 = point
+        self._direction = None
+
+    @classmethod
+    def acquire(cls, p1, p2, brightness_s=_DEFAULT_BRIGHTNESS, brightness_p=_DEFAULT_BRIGHTNESS,
+                wavelength=None):
+        """
+        Get a ray from the pool, or create a new one if the pool is empty.
+
+        Takes the same arguments as the constructor. The returned ray is fully
+        reinitialized, so it is indistinguishable from a newly created one.
+
+        Returns:
+            Ray: An initialized ray
+        """
+        free = cls._pool._free
+        ray = free.pop() if free else cls.__new__(cls)
+        ray.__init__(p1, p2, brightness_s, brightness_p, wavelength)
+        return ray
+
+    def release(self):
+        """
+        Return this ray to the pool for reuse by Ray.acquire().
+
+        The caller must not use the ray after releasing it. Its points and
+        merging object are dropped, so a pooled ray keeps nothing else alive.
+        """
+        self._p1 = None
+        self._p2 = None
+        self.body_merging_obj = None
+        pool = self._pool
+        if len(pool._free) < pool.max_size:
+            pool._free.append(self)
+
+    @classmethod
+    def from_batch(cls, batch, i):
+        """
+        Create a ray from the i-th row of a RayBatch.
+
+        Args:
+            batch (RayBatch): The batch to read from
+            i (int): Index of the ray in the batch
+
+        Returns:
+            Ray: A new Ray object with the properties of row i
+        """
+        interned = _INTERNED_SCALARS
+        brightness_s = float(batch.bs[i])
+        brightness_p = float(batch.bp[i])
+        wavelength = float(batch.wavelength[i])
+        flags = int(batch.flags[i])
+        ray = cls(
+            p1={'x': float(batch.p1[i, 0]), 'y': float(batch.p1[i, 1])},
+            p2={'x': float(batch.p2[i, 0]), 'y': float(batch.p2[i, 1])},
+            brightness_s=interned.get(brightness_s, brightness_s),
+            brightness_p=interned.get(brightness_p, brightness_p),
+            wavelength=None if wavelength != wavelength else interned.get(wavelength, wavelength)
+        )
+        ray.gap = bool(flags & batch.FLAG_GAP)
+        ray.is_new = bool(flags & batch.FLAG_IS_NEW)
+        return ray
+
+    @classmethod
+    def list_from_batch(cls, batch):
+        """
+        Create a ray from every row of a RayBatch.
+
+        Gives the same rays as calling from_batch() on each row, but converts
+        each array to Python values in one go instead of element by element.
+
+        Args:
+            batch (RayBatch): The batch to read from
+
+        Returns:
+            list: One new Ray object per valid row
+        """
+        n = batch.size
+        interned = _INTERNED_SCALARS
+        flag_gap = batch.FLAG_GAP
+        flag_is_new = batch.FLAG_IS_NEW
+        rays = []
+        for (x1, y1), (x2, y2), brightness_s, brightness_p, wavelength, flags in zip(
+                batch.p1[:n].tolist(), batch.p2[:n].tolist(),
+                batch.bs[:n].tolist(), batch.bp[:n].tolist(),
+                batch.wavelength[:n].tolist(), batch.flags[:n].tolist()):
+            ray = cls(
+                p1={'x': x1, 'y': y1},
+                p2={'x': x2, 'y': y2},
+                brightness_s=interned.get(brightness_s, brightness_s),
+                brightness_p=interned.get(brightness_p, brightness_p),
+                wavelength=None if wavelength != wavelength else interned.get(wavelength, wavelength)
+            )
+            ray.gap = bool(flags & flag_gap)
+            ray.is_new = bool(flags & flag_is_new)
+            rays.append(ray)
+        return rays
+
+    def to_batch(self, batch, i):
+        """
+        Write this ray into the i-th row of a RayBatch.
+
+        Args:
+            batch (RayBatch): The batch to write to
+            i (int): Index of the row to overwrite
+        """
+        batch.p1[i, 0] = self.p1['x']
+        batch.p1[i, 1] = self.p1['y']
+        batch.p2[i, 0] = self.p2['x']
+        batch.p2[i, 1] = self.p2['y']
+        batch.bs[i] = self.brightness_s
+        batch.bp[i] = self.brightness_p
+        batch.wavelength[i] = float('nan') if self.wavelength is None else self.wavelength
+        batch.flags[i] = ((batch.FLAG_GAP if self.gap else 0) |
+                          (batch.FLAG_IS_NEW if self.is_new else 0))
+
+    def direction(self):
+        """
+        Get the unit vector pointing from p1 towards p2.
+
+        The result is cached on the ray until p1 or p2 is assigned. Editing
+        the point dicts in place (ray.p2['x'] = ...) is not seen, so
+        invalidate_direction() must be called after such an edit.
+
+        Returns:
+            tuple: (dir_x, dir_y), or (0.0, 0.0) if p1 and p2 (nearly) coincide
+        """
+        direction = self._direction
+        if direction is None:
+            p1 = self._p1
+            p2 = self._p2
+            dx = p2['x'] - p1['x']
+            dy = p2['y'] - p1['y']
+            if dx*dx + dy*dy > self.MIN_DIRECTION_LENGTH_SQUARED:
+                length = math.hypot(dx, dy)
+                direction = (dx / length, dy / length)
+            else:
+                direction = (0.0, 0.0)
+            self._direction = direction
+        return direction
+
+    def invalidate_direction(self):
+        """Drop the cached direction after p1 or p2 was edited in place."""
+        self._direction = None
+
     @property
     def total_brightness(self):
         """
@@ -83,17 +320,25 @@ class Ray:
         """
         return self.brightness_s + self.brightness_p
 
-    def __repr__(self):
-        """String representation for debugging."""
+    def describe(self):
+        """
+        Get a detailed description of this ray for debugging.
+
+        Returns:
+            str: The ray's points, brightness and wavelength
+        """
         return (f"Ray(p1={self.p1}, p2={self.p2}, "
                 f"brightness=({self.brightness_s:.3f}, {self.brightness_p:.3f}), "
                 f"wavelength={self.wavelength})")
 
+    def __repr__(self):
+        """Short string representation; use describe() for the full details."""
+        # Kept cheap on purpose since rays may be logged in tight loops
+        return f"Ray(<{id(self):x}>)"
+
 
 # Example usage and testing
 if __name__ == "__main__":
-    import math
-
     print("Testing Ray class...\n")
 
     # Test 1: Create a basic white light ray
@@ -104,7 +349,7 @@ if __name__ == "__main__":
         brightness_s=0.5,
         brightness_p=0.5
     )
-    print(f"  {ray1}")
+    print(f"  {ray1.describe()}")
     print(f"  Total brightness: {ray1.total_brightness}")
     print(f"  Is new: {ray1.is_new}")
     print(f"  Is gap: {ray1.gap}")
@@ -118,15 +363,15 @@ if __name__ == "__main__":
         brightness_p=0.0,
         wavelength=650
     )
-    print(f"  {ray2}")
+    print(f"  {ray2.describe()}")
     print(f"  Wavelength: {ray2.wavelength} nm")
     print(f"  S-polarization only: brightness_s={ray2.brightness_s}, brightness_p={ray2.brightness_p}")
 
     # Test 3: Ray copy
     print("\nTest 3: Ray copy")
     ray3 = ray1.copy()
-    print(f"  Original: {ray1}")
-    print(f"  Copy: {ray3}")
+    print(f"  Original: {ray1.describe()}")
+    print(f"  Copy: {ray3.describe()}")
     print(f"  Are they the same object? {ray1 is ray3}")
     print(f"  Do they have the same values? p1={ray1.p1 == ray3.p1}, brightness={ray1.total_brightness == ray3.total_brightness}")
 
@@ -146,14 +391,14 @@ if __name__ == "__main__":
         p2={'x': 200, 'y': 100}
     )
     ray4.gap = True
-    print(f"  {ray4}")
+    print(f"  {ray4.describe()}")
     print(f"  Gap flag: {ray4.gap}")
 
     # Test 5: Calculate ray length
     print("\nTest 5: Ray length calculation")
     dx = ray1.p2['x'] - ray1.p1['x']
     dy = ray1.p2['y'] - ray1.p1['y']
-    length = math.sqrt(dx*dx + dy*dy)
+    length = math.hypot(dx, dy)
     print(f"  Ray: ({ray1.p1['x']}, {ray1.p1['y']}) -> ({ray1.p2['x']}, {ray1.p2['y']})")
     print(f"  Length: {length:.2f}")
 
@@ -169,4 +414,39 @@ if __name__ == "__main__":
     for i, ray in enumerate(rays):
         print(f"  Ray {i+1}: s={ray.brightness_s:.1f}, p={ray.brightness_p:.1f}, total={ray.total_brightness:.1f}")
 
+    # Test 7: Ray pool reuse
+    print("\nTest 7: Ray pool")
+    pooled = Ray.acquire(p1={'x': 0, 'y': 0}, p2={'x': 1, 'y': 0}, brightness_s=0.2, brightness_p=0.3)
+    pooled.gap = True
+    pooled.release()
+    print(f"  Pool size after release: {len(Ray._pool)}")
+    assert pooled.p1 is None and pooled.p2 is None
+    reused = Ray.acquire(p1={'x': 5, 'y': 5}, p2={'x': 6, 'y': 5})
+    print(f"  Reused same object: {reused is pooled}")
+    print(f"  Reinitialized: gap={reused.gap}, is_new={reused.is_new}, total={reused.total_brightness}")
+    assert reused is pooled and not reused.gap and reused.total_brightness == 2.0
+    Ray._pool.max_size = 3
+    for ray in [Ray(p1={'x': 0, 'y': 0}, p2={'x': 1, 'y': 0}) for _ in range(5)]:
+        ray.release()
+    print(f"  Pool size after releasing 5 rays with max_size=3: {len(Ray._pool)}")
+    assert len(Ray._pool) == 3
+    Ray._pool.max_size = RayPool.DEFAULT_MAX_SIZE
+    Ray._pool.clear()
+
+    # Test 8: Cached direction
+    print("\nTest 8: Direction")
+    ray8 = Ray(p1={'x': 1, 'y': 1}, p2={'x': 4, 'y': 5})
+    print(f"  Direction: {ray8.direction()}")
+    assert ray8.direction() == (0.6, 0.8)
+    ray8.p2 = {'x': 1, 'y': 0}
+    print(f"  After turning: {ray8.direction()}")
+    assert ray8.direction() == (0.0, -1.0)
+    copy8 = ray8.copy()
+    copy8.p2 = {'x': 2, 'y': 1}
+    assert copy8.direction() == (1.0, 0.0) and ray8.direction() == (0.0, -1.0)
+    ray8.p2['x'] = 0  # In-place edits need an explicit invalidation
+    ray8.invalidate_direction()
+    assert ray8.direction() == (-1.0 / math.sqrt(2), -1.0 / math.sqrt(2))
+    assert Ray(p1={'x': 1, 'y': 1}, p2={'x': 1, 'y': 1}).direction() == (0.0, 0.0)
+
     print("\nRay test completed successfully!")
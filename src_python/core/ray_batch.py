@@ -0,0 +1,390 @@
+"""
+Copyright 2024 The Ray Optics Simulation authors and contributors
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import numpy as np
+
+# Handle both relative imports (when used as a module) and absolute imports (when
+# this module or a sibling module is run as a script)
+try:
+    from .ray import Ray
+except ImportError:
+    from ray import Ray
+
+
+class RayBatch:
+    """
+    Structure-of-arrays container for many rays.
+
+    While `Ray` stores one ray as a Python object with dict points, a
+    RayBatch stores each ray property in its own contiguous NumPy array so
+    that geometric operations (segment lengths, brightness reductions,
+    intersection tests) can run vectorized over all rays at once.
+
+    Row i of every array describes the i-th ray. Only the first `size` rows
+    are valid; the remaining rows up to `capacity` are preallocated storage.
+
+    The `gap` and `is_new` flags are packed into a single uint8 array:
+    bit 0 (FLAG_GAP) is `gap`, bit 1 (FLAG_IS_NEW) is `is_new`.
+
+    Coordinates, brightness and wavelength are stored as float64 by default.
+    A float32 batch halves the memory traffic of the vectorized kernels and
+    is sufficient for display purposes (scene coordinates are rounded to
+    about 1e-7 of their magnitude), but not for intersection tests near
+    MIN_RAY_SEGMENT_LENGTH in large scenes; use `promote_to_f64` before such
+    computations.
+
+    Brightness and wavelength can be narrowed separately with `value_dtype`,
+    keeping float64 coordinates for the geometry. float32 brightness is
+    accurate to about 1e-7 relative, well below the 1e-6 absorption threshold,
+    and integer wavelengths in nm are stored exactly. Ray objects unpacked
+    from the batch still get Python floats.
+
+    Attributes:
+        dtype (np.dtype): Floating point type of the coordinate arrays
+        value_dtype (np.dtype): Floating point type of the brightness and
+            wavelength arrays
+        capacity (int): Number of preallocated rows
+        size (int): Number of valid rays in the batch
+        p1 (np.ndarray): Starting points, shape (capacity, 2)
+        p2 (np.ndarray): Direction points, shape (capacity, 2)
+        bs (np.ndarray): S-polarization brightness, shape (capacity,)
+        bp (np.ndarray): P-polarization brightness, shape (capacity,)
+        wavelength (np.ndarray): Wavelength in nm (NaN for white light), shape (capacity,)
+        flags (np.ndarray): Packed gap/is_new flags, shape (capacity,), dtype uint8
+    """
+
+    FLAG_GAP = 0b01
+    FLAG_IS_NEW = 0b10
+
+    def __init__(self, capacity=0, dtype=np.float64, value_dtype=None):
+        """
+        Initialize an empty batch.
+
+        Args:
+            capacity (int): Number of rays to preallocate storage for (default: 0)
+            dtype: Floating point type of the ray data, np.float64 or np.float32
+                   (default: np.float64)
+            value_dtype: Floating point type of the brightness and wavelength
+                   arrays, if different from dtype (default: None, same as dtype)
+        """
+        self.dtype = np.dtype(dtype)
+        self.value_dtype = self.dtype if value_dtype is None else np.dtype(value_dtype)
+        self.capacity = capacity
+        self.size = 0
+        self.p1 = np.empty((capacity, 2), dtype=self.dtype)
+        self.p2 = np.empty((capacity, 2), dtype=self.dtype)
+        self.bs = np.empty(capacity, dtype=self.value_dtype)
+        self.bp = np.empty(capacity, dtype=self.value_dtype)
+        self.wavelength = np.empty(capacity, dtype=self.value_dtype)
+        self.flags = np.zeros(capacity, dtype=np.uint8)
+
+    @classmethod
+    def from_rays(cls, rays, dtype=np.float64, value_dtype=None):
+        """
+        Build a batch from a sequence of Ray objects.
+
+        Args:
+            rays (list): Ray objects to pack
+            dtype: Floating point type of the ray data (default: np.float64)
+            value_dtype: Floating point type of the brightness and wavelength,
+                if different from dtype (default: None)
+
+        Returns:
+            RayBatch: A batch containing one row per ray
+        """
+        batch = cls(len(rays), dtype, value_dtype)
+        for ray in rays:
+            batch.append(ray)
+        return batch
+
+    def __len__(self):
+        """Number of valid rays in the batch."""
+        return self.size
+
+    def _grow(self, min_capacity):
+        """
+        Enlarge the preallocated storage to hold at least min_capacity rays.
+
+        Args:
+            min_capacity (int): Required capacity
+        """
+        new_capacity = max(min_capacity, 2 * self.capacity, 16)
+        for name in ('p1', 'p2', 'bs', 'bp', 'wavelength', 'flags'):
+            old = getattr(self, name)
+            new = np.zeros((new_capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        self.capacity = new_capacity
+
+    def append(self, ray):
+        """
+        Append a ray to the end of the batch, growing storage if needed.
+
+        Args:
+            ray (Ray): The ray to append
+
+        Returns:
+            int: Index of the appended ray
+        """
+        if self.size >= self.capacity:
+            self._grow(self.size + 1)
+        i = self.size
+        self.size += 1
+        ray.to_batch(self, i)
+        return i
+
+    def slice(self, start, stop):
+        """
+        Get a batch of the rays in [start, stop) that shares memory with this batch.
+
+        Writing to the arrays of the returned batch modifies this batch.
+
+        Args:
+            start (int): Index of the first ray
+            stop (int): Index after the last ray
+
+        Returns:
+            RayBatch: A view of the selected rays
+        """
+        start, stop, _ = slice(start, stop).indices(self.size)
+        stop = max(start, stop)
+        batch = RayBatch.__new__(RayBatch)
+        batch.dtype = self.dtype
+        batch.value_dtype = self.value_dtype
+        batch.capacity = batch.size = stop - start
+        for name in ('p1', 'p2', 'bs', 'bp', 'wavelength', 'flags'):
+            setattr(batch, name, getattr(self, name)[start:stop])
+        return batch
+
+    def promote_to_f64(self):
+        """
+        Get a float64 version of this batch.
+
+        Returns:
+            RayBatch: This batch if it is already all float64, otherwise a float64 copy
+        """
+        if self.dtype == np.float64 and self.value_dtype == np.float64:
+            return self
+        batch = RayBatch(self.size, np.float64)
+        batch.size = self.size
+        for name in ('p1', 'p2', 'bs', 'bp', 'wavelength', 'flags'):
+            getattr(batch, name)[:] = getattr(self, name)[:self.size]
+        return batch
+
+    def gap_mask(self):
+        """
+        Get a mask of the rays that are gaps (not drawn).
+
+        Returns:
+            np.ndarray: Boolean mask over the valid rays
+        """
+        return (self.flags[:self.size] & self.FLAG_GAP) != 0
+
+    def is_new_mask(self):
+        """
+        Get a mask of the rays that have not been processed yet.
+
+        Returns:
+            np.ndarray: Boolean mask over the valid rays
+        """
+        return (self.flags[:self.size] & self.FLAG_IS_NEW) != 0
+
+    def set_gap(self, i, value=True):
+        """
+        Set or clear the gap flag of one or more rays.
+
+        Args:
+            i (int, slice, or np.ndarray): Index, slice, mask or index array of the rays
+            value (bool): New value of the flag (default: True)
+        """
+        flags = self.flags[:self.size]
+        if value:
+            flags[i] |= self.FLAG_GAP
+        else:
+            flags[i] &= ~np.uint8(self.FLAG_GAP)
+
+    def set_is_new(self, i, value=True):
+        """
+        Set or clear the is_new flag of one or more rays.
+
+        Args:
+            i (int, slice, or np.ndarray): Index, slice, mask or index array of the rays
+            value (bool): New value of the flag (default: True)
+        """
+        flags = self.flags[:self.size]
+        if value:
+            flags[i] |= self.FLAG_IS_NEW
+        else:
+            flags[i] &= ~np.uint8(self.FLAG_IS_NEW)
+
+    def total_brightness(self, active=None):
+        """
+        Get the total brightness (sum of both polarizations) of each ray.
+
+        Args:
+            active (np.ndarray or None): Optional boolean mask or index array
+                selecting a subset of the valid rays (default: all rays)
+
+        Returns:
+            np.ndarray: bs + bp for the selected rays
+        """
+        bs = self.bs[:self.size]
+        bp = self.bp[:self.size]
+        if active is not None:
+            bs = bs[active]
+            bp = bp[active]
+        return bs + bp
+
+    def sum_brightness(self):
+        """
+        Get the total brightness of all rays in the batch.
+
+        Returns:
+            float: Sum of bs + bp over all valid rays
+        """
+        return float(self.bs[:self.size].sum() + self.bp[:self.size].sum())
+
+    def get_ray(self, i):
+        """
+        Get the i-th ray as a Ray object.
+
+        Args:
+            i (int): Index of the ray
+
+        Returns:
+            Ray: A new Ray object with the properties of row i
+        """
+        return Ray.from_batch(self, i)
+
+    def to_rays(self):
+        """
+        Unpack the batch into a list of Ray objects.
+
+        Returns:
+            list: One Ray object per valid row
+        """
+        return Ray.list_from_batch(self)
+
+    def __repr__(self):
+        """String representation for debugging."""
+        if self.value_dtype != self.dtype:
+            return (f"RayBatch(size={self.size}, capacity={self.capacity}, dtype={self.dtype}, "
+                    f"value_dtype={self.value_dtype})")
+        return f"RayBatch(size={self.size}, capacity={self.capacity}, dtype={self.dtype})"
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    print("Testing RayBatch class...\n")
+
+    # Test 1: Empty batch
+    print("Test 1: Create empty batch")
+    batch = RayBatch(4)
+    print(f"  {batch}")
+    print(f"  Length: {len(batch)}")
+
+    # Test 2: Append rays
+    print("\nTest 2: Append rays")
+    ray1 = Ray(p1={'x': 0, 'y': 0}, p2={'x': 100, 'y': 0}, brightness_s=0.5, brightness_p=0.5)
+    ray2 = Ray(p1={'x': 0, 'y': 100}, p2={'x': 100, 'y': 150}, brightness_s=1.0, brightness_p=0.0, wavelength=650)
+    ray2.gap = True
+    batch.append(ray1)
+    batch.append(ray2)
+    print(f"  {batch}")
+    print(f"  p1 column: {batch.p1[:len(batch)].tolist()}")
+    print(f"  flags: {batch.flags[:len(batch)].tolist()} (ray1 new, ray2 new + gap)")
+
+    # Test 3: Round trip back to Ray objects
+    print("\nTest 3: Round trip")
+    rays = batch.to_rays()
+    for original, restored in zip([ray1, ray2], rays):
+        same = (original.p1 == restored.p1 and original.p2 == restored.p2 and
+                original.brightness_s == restored.brightness_s and
+                original.brightness_p == restored.brightness_p and
+                original.wavelength == restored.wavelength and
+                original.gap == restored.gap and original.is_new == restored.is_new)
+        print(f"  {restored.describe()} -> identical: {same}")
+        assert same
+
+    # Test 4: Storage grows beyond initial capacity
+    print("\nTest 4: Growing beyond capacity")
+    grown = RayBatch()
+    for i in range(20):
+        grown.append(Ray(p1={'x': i, 'y': 0}, p2={'x': i, 'y': 1}))
+    print(f"  {grown}")
+    assert len(grown) == 20 and grown.capacity >= 20
+    assert grown.get_ray(19).p1 == {'x': 19.0, 'y': 0.0}
+
+    # Test 5: Build from a list
+    print("\nTest 5: Build from list")
+    batch5 = RayBatch.from_rays([ray1, ray2, ray1.copy()])
+    print(f"  {batch5}")
+    assert len(batch5) == 3
+
+    # Test 6: Vectorized brightness
+    print("\nTest 6: Vectorized brightness")
+    totals = batch5.total_brightness()
+    print(f"  Per-ray totals: {totals.tolist()}")
+    print(f"  Sum: {batch5.sum_brightness()}")
+    print(f"  Polarized rays only: {batch5.total_brightness(batch5.bp[:len(batch5)] == 0.0).tolist()}")
+    assert totals.tolist() == [ray.total_brightness for ray in [ray1, ray2, ray1]]
+    assert batch5.sum_brightness() == 3.0
+
+    # Test 7: Packed flags
+    print("\nTest 7: Packed gap/is_new flags")
+    batch5.set_is_new(slice(0, 2), False)
+    batch5.set_gap(np.array([False, False, True]))
+    print(f"  Gap mask: {batch5.gap_mask().tolist()}")
+    print(f"  New mask: {batch5.is_new_mask().tolist()}")
+    assert batch5.gap_mask().tolist() == [False, True, True]
+    assert batch5.is_new_mask().tolist() == [False, False, True]
+    batch5.set_gap(1, False)
+    assert batch5.gap_mask().tolist() == [False, False, True]
+    assert not batch5.get_ray(1).gap and batch5.get_ray(2).gap
+
+    # Test 8: Single precision storage
+    print("\nTest 8: float32 batch")
+    batch32 = RayBatch.from_rays([ray1, ray2], dtype=np.float32)
+    print(f"  {batch32}")
+    print(f"  Bytes per coordinate array: {batch32.p1.nbytes} (float64: {batch.p1[:2].nbytes})")
+    promoted = batch32.promote_to_f64()
+    print(f"  Promoted: {promoted}")
+    assert batch32.p1.dtype == np.float32 and promoted.p1.dtype == np.float64
+    assert promoted.get_ray(1).p2 == ray2.p2 and promoted.get_ray(1).gap
+
+    # Test 9: Views of a range of rays
+    print("\nTest 9: Slicing")
+    view = grown.slice(5, 8)
+    print(f"  {view}: p1.x = {view.p1[:, 0].tolist()}")
+    view.set_gap(0)
+    assert view.p1[:, 0].tolist() == [5.0, 6.0, 7.0]
+    assert grown.get_ray(5).gap
+
+    # Test 10: Single precision brightness with double precision coordinates
+    print("\nTest 10: float32 brightness and wavelength")
+    ray10 = Ray(p1={'x': 0.1, 'y': 0.2}, p2={'x': 1e4 / 3, 'y': 0.4}, brightness_s=0.3, brightness_p=0.0,
+                wavelength=532)
+    batch10 = RayBatch.from_rays([ray10, ray2], value_dtype=np.float32)
+    print(f"  {batch10}")
+    print(f"  Bytes per brightness array: {batch10.bs.nbytes} (float64: {batch5.bs[:2].nbytes})")
+    restored10 = batch10.get_ray(0)
+    print(f"  Brightness after round trip: {restored10.brightness_s}")
+    assert batch10.p1.dtype == np.float64 and batch10.bs.dtype == np.float32
+    assert restored10.p1 == ray10.p1 and restored10.p2 == ray10.p2 and restored10.wavelength == 532
+    assert abs(restored10.brightness_s - 0.3) < 1e-7 and isinstance(restored10.brightness_s, float)
+    assert batch10.promote_to_f64().bs.dtype == np.float64
+
+    print("\nRayBatch test completed successfully!")
@@ -0,0 +1,246 @@
+"""
+Copyright 2024 The Ray Optics Simulation authors and contributors
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Compiled kernels operating on the arrays of a RayBatch.
+
+When Numba is installed, the kernels are JIT-compiled into parallel
+machine-code loops. Otherwise the same results are computed with
+vectorized NumPy expressions, so Numba is an optional speedup rather than
+a requirement.
+"""
+
+import math
+import numpy as np
+
+# Handle both relative imports (when used as a module) and absolute imports (when
+# this module or a sibling module is run as a script)
+try:
+    from .constants import MIN_RAY_SEGMENT_LENGTH_SQUARED
+except ImportError:
+    from constants import MIN_RAY_SEGMENT_LENGTH_SQUARED
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def jit_kernel(func):
+    """
+    Compile a scalar kernel with Numba if it is installed.
+
+    Unlike the array kernels in this module, fastmath is left off so that
+    kernels can rely on inf/NaN results (e.g. parallel lines).
+
+    Args:
+        func (callable): Function written in the Numba-compatible subset of Python
+
+    Returns:
+        callable: The compiled function, or func itself when Numba is unavailable
+    """
+    if HAS_NUMBA:
+        return njit(cache=True)(func)
+    return func
+
+
+# Bound once at import time as a plain float so that Numba folds it into the
+# compiled kernels as a constant instead of loading the global on every use.
+_MIN_LEN_SQ = float(MIN_RAY_SEGMENT_LENGTH_SQUARED)
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _segment_lengths_kernel(p1, p2, out):
+        for i in prange(p1.shape[0]):
+            dx = p2[i, 0] - p1[i, 0]
+            dy = p2[i, 1] - p1[i, 1]
+            out[i] = math.hypot(dx, dy)
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _valid_segment_mask_kernel(p1, p2, out):
+        for i in prange(p1.shape[0]):
+            dx = p2[i, 0] - p1[i, 0]
+            dy = p2[i, 1] - p1[i, 1]
+            out[i] = dx * dx + dy * dy >= _MIN_LEN_SQ
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _segment_brightness_kernel(p1, p2, bs, bp, out):
+        for i in prange(p1.shape[0]):
+            dx = p2[i, 0] - p1[i, 0]
+            dy = p2[i, 1] - p1[i, 1]
+            # Multiply by the comparison result instead of branching on it
+            out[i] = (bs[i] + bp[i]) * (dx * dx + dy * dy >= _MIN_LEN_SQ)
+
+
+def segment_lengths(batch):
+    """
+    Compute the length of every ray segment in a batch.
+
+    Args:
+        batch (RayBatch): The rays to measure
+
+    Returns:
+        np.ndarray: Distance from p1 to p2 for each valid ray
+    """
+    n = batch.size
+    p1 = np.ascontiguousarray(batch.p1[:n])
+    p2 = np.ascontiguousarray(batch.p2[:n])
+    if HAS_NUMBA:
+        out = np.empty(n, dtype=batch.dtype)
+        _segment_lengths_kernel(p1, p2, out)
+        return out
+    d = p2 - p1
+    return np.hypot(d[:, 0], d[:, 1])
+
+
+def valid_segment_mask(batch):
+    """
+    Find the ray segments that are long enough to be valid.
+
+    A segment shorter than MIN_RAY_SEGMENT_LENGTH is treated as degenerate,
+    matching the check the simulator applies to single rays.
+
+    Args:
+        batch (RayBatch): The rays to check
+
+    Returns:
+        np.ndarray: Boolean mask, True where the segment length squared is at
+            least MIN_RAY_SEGMENT_LENGTH_SQUARED
+    """
+    n = batch.size
+    p1 = np.ascontiguousarray(batch.p1[:n])
+    p2 = np.ascontiguousarray(batch.p2[:n])
+    if HAS_NUMBA:
+        out = np.empty(n, dtype=np.bool_)
+        _valid_segment_mask_kernel(p1, p2, out)
+        return out
+    d = p2 - p1
+    return d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1] >= _MIN_LEN_SQ
+
+
+def segment_brightness(batch):
+    """
+    Get the total brightness of every ray segment, with degenerate segments zeroed.
+
+    Segments shorter than MIN_RAY_SEGMENT_LENGTH contribute no brightness. The
+    length check is applied as a mask multiplied into the brightness rather
+    than as a branch, so the loop vectorizes.
+
+    Args:
+        batch (RayBatch): The rays to evaluate
+
+    Returns:
+        np.ndarray: bs + bp for valid segments, 0 for degenerate ones
+    """
+    n = batch.size
+    p1 = np.ascontiguousarray(batch.p1[:n])
+    p2 = np.ascontiguousarray(batch.p2[:n])
+    bs = np.ascontiguousarray(batch.bs[:n])
+    bp = np.ascontiguousarray(batch.bp[:n])
+    if HAS_NUMBA:
+        out = np.empty(n, dtype=batch.dtype)
+        _segment_brightness_kernel(p1, p2, bs, bp, out)
+        return out
+    d = p2 - p1
+    return (bs + bp) * (d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1] >= _MIN_LEN_SQ)
+
+
+def rays_hit_box(batch, box):
+    """
+    Test which rays of a batch pass through an axis-aligned bounding box.
+
+    Each ray is treated as the half-line starting at p1 and passing through
+    p2, like check_ray_intersects() does. The box is padded by
+    MIN_RAY_SEGMENT_LENGTH so that hits exactly on its boundary are kept.
+
+    Args:
+        batch (RayBatch): The rays to test
+        box (tuple): The box as (min_x, min_y, max_x, max_y)
+
+    Returns:
+        np.ndarray: Boolean mask, True where the ray may hit the box
+    """
+    n = batch.size
+    pad = math.sqrt(_MIN_LEN_SQ)
+    t_enter = np.zeros(n)
+    t_exit = np.full(n, np.inf)
+    for axis, lo, hi in ((0, box[0] - pad, box[2] + pad), (1, box[1] - pad, box[3] + pad)):
+        origin = batch.p1[:n, axis]
+        direction = batch.p2[:n, axis] - origin
+        parallel = direction == 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t1 = (lo - origin) / direction
+            t2 = (hi - origin) / direction
+        # Rays parallel to this axis hit the slab everywhere or nowhere
+        inside = (origin >= lo) & (origin <= hi)
+        t_near = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t1, t2))
+        t_far = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t1, t2))
+        np.maximum(t_enter, t_near, out=t_enter)
+        np.minimum(t_exit, t_far, out=t_exit)
+    return t_enter <= t_exit
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from core.ray import Ray
+    from core.ray_batch import RayBatch
+
+    print("Testing ray kernels...\n")
+    print(f"Numba available: {HAS_NUMBA}")
+
+    # Test 1: Segment lengths
+    print("\nTest 1: Segment lengths")
+    batch = RayBatch.from_rays([
+        Ray(p1={'x': 0, 'y': 0}, p2={'x': 3, 'y': 4}),
+        Ray(p1={'x': 1, 'y': 1}, p2={'x': 1, 'y': 1}),
+        Ray(p1={'x': -5, 'y': 2}, p2={'x': 7, 'y': 7}),
+    ])
+    lengths = segment_lengths(batch)
+    print(f"  Lengths: {lengths.tolist()}")
+    assert lengths.tolist() == [5.0, 0.0, 13.0]
+
+    # Test 2: Degenerate segments
+    print("\nTest 2: Valid segment mask")
+    mask = valid_segment_mask(batch)
+    print(f"  Valid: {mask.tolist()}")
+    assert mask.tolist() == [True, False, True]
+
+    # Test 3: Brightness of valid segments
+    print("\nTest 3: Segment brightness")
+    brightness = segment_brightness(batch)
+    print(f"  Brightness: {brightness.tolist()}")
+    assert brightness.tolist() == [2.0, 0.0, 2.0]
+
+    # Test 4: Ray/box culling
+    print("\nTest 4: Rays hitting a box")
+    box = (10, -1, 12, 1)
+    rays = RayBatch.from_rays([
+        Ray(p1={'x': 0, 'y': 0}, p2={'x': 1, 'y': 0}),     # Towards the box
+        Ray(p1={'x': 0, 'y': 0}, p2={'x': -1, 'y': 0}),    # Away from the box
+        Ray(p1={'x': 0, 'y': 5}, p2={'x': 1, 'y': 5}),     # Passes above
+        Ray(p1={'x': 11, 'y': 5}, p2={'x': 11, 'y': 4}),   # Vertical, straight down into it
+        Ray(p1={'x': 11, 'y': 0}, p2={'x': 20, 'y': 30}),  # Starts inside
+    ])
+    hits = rays_hit_box(rays, box)
+    print(f"  Hits: {hits.tolist()}")
+    assert hits.tolist() == [True, False, False, True, True]
+
+    print("\nRay kernels test completed successfully!")
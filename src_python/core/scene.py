@@ -14,6 +14,17 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Handle both relative imports (when used as a module) and absolute imports (when
+# this module or a sibling module is run as a script)
+try:
+    from .constants import MIN_RAY_SEGMENT_LENGTH_SQUARED
+except ImportError:
+    from constants import MIN_RAY_SEGMENT_LENGTH_SQUARED
+
 
 class Scene:
     """
@@ -35,10 +46,20 @@ class Scene:
         warning (str or None): Warning message if simulation has warnings
     """
 
+    # The simulation settings are stored in slots for fast access from the
+    # scene objects. '__dict__' is kept so that callers can still attach extra
+    # settings (e.g. rng, theme) that some scene objects read.
+    __slots__ = ('objs', 'optical_objs', 'ray_density', 'color_mode', 'mode',
+                 'length_scale', 'simulate_colors', 'error', 'warning',
+                 '_objs_set', '_optical_set', '__dict__')
+
     def __init__(self):
         """Initialize an empty scene with default settings."""
         self.objs = []
         self.optical_objs = []
+        # id() indices of the two lists for O(1) membership tests
+        self._objs_set = set()
+        self._optical_set = set()
         self.ray_density = 0.1  # radians between rays
         self.color_mode = 'default'
         self.mode = 'rays'
@@ -58,25 +79,143 @@ class Scene:
             obj: The scene object to add
         """
         self.objs.append(obj)
-        if hasattr(obj, 'is_optical') and obj.is_optical:
+        self._objs_set.add(id(obj))
+        if getattr(obj, 'is_optical', False):
             self.optical_objs.append(obj)
+            self._optical_set.add(id(obj))
+
+    def load_objects(self, objs):
+        """
+        Add many objects to the scene at once.
+
+        Equivalent to calling add_object() for each object, but extends the
+        object lists in bulk. Prefer this when loading a whole scene (e.g.
+        from a JSON scene file).
+
+        Args:
+            objs (iterable): The scene objects to add, in order
+        """
+        objs = list(objs)
+        optical = [obj for obj in objs if getattr(obj, 'is_optical', False)]
+        self.objs.extend(objs)
+        self.optical_objs.extend(optical)
+        self._objs_set.update(map(id, objs))
+        self._optical_set.update(map(id, optical))
 
     def remove_object(self, obj):
         """
         Remove an object from the scene.
 
+        Objects that are not in the scene are ignored without scanning the
+        object lists. Each object is expected to be added only once.
+
         Args:
             obj: The scene object to remove
         """
-        if obj in self.objs:
+        obj_id = id(obj)
+        if obj_id in self._objs_set:
             self.objs.remove(obj)
-        if obj in self.optical_objs:
+            self._objs_set.discard(obj_id)
+        if obj_id in self._optical_set:
             self.optical_objs.remove(obj)
+            self._optical_set.discard(obj_id)
+
+    def raycast_batch(self, batch):
+        """
+        Find the nearest intersection of every ray in a batch with the optical objects.
+
+        Before testing any ray, each object's bounding box (see
+        `get_bounding_box`) is tested against the whole batch at once. Objects
+        that no ray can reach are dropped, and the remaining objects are only
+        tested against the rays that pass through their bounding box.
+
+        Args:
+            batch (RayBatch): The rays to cast. Each ray starts at p1 and passes
+                through p2.
+
+        Returns:
+            list: For each ray, None if it hits nothing, or a dict with
+                'obj' (the nearest object hit) and 'point' (dict with 'x', 'y' keys)
+        """
+        # Imported here so that building a scene does not load NumPy/Numba
+        try:
+            from .ray_kernels import rays_hit_box
+        except ImportError:
+            from ray_kernels import rays_hit_box
+
+        # Cull objects against the whole batch: (obj, mask of rays to test or None for all)
+        candidates = []
+        for obj in self.optical_objs:
+            if not hasattr(obj, 'check_ray_intersects'):
+                continue
+            box = obj.get_bounding_box() if hasattr(obj, 'get_bounding_box') else None
+            if box is None:
+                candidates.append((obj, None))
+                continue
+            mask = rays_hit_box(batch, box)
+            if mask.any():
+                candidates.append((obj, mask))
+
+        results = []
+        for i in range(len(batch)):
+            ray = batch.get_ray(i)
+            p1x = ray.p1['x']
+            p1y = ray.p1['y']
+            nearest = None
+            nearest_distance_squared = math.inf
+            for obj, mask in candidates:
+                if mask is not None and not mask[i]:
+                    continue
+                point = obj.check_ray_intersects(ray)
+                if point is None:
+                    continue
+                if hasattr(point, 'x'):
+                    point = {'x': point.x, 'y': point.y}
+                dx = point['x'] - p1x
+                dy = point['y'] - p1y
+                distance_squared = dx * dx + dy * dy
+                if MIN_RAY_SEGMENT_LENGTH_SQUARED <= distance_squared < nearest_distance_squared:
+                    nearest = {'obj': obj, 'point': point}
+                    nearest_distance_squared = distance_squared
+            results.append(nearest)
+        return results
+
+    def raycast_parallel(self, batch, n_workers=None):
+        """
+        Same as `raycast_batch`, but splits the batch into chunks cast by a thread pool.
+
+        Each worker writes to its own slice of the result list, and the scene is
+        only read, so no locking is needed. The scene and its objects must not be
+        modified while the call is running. The NumPy culling releases the GIL;
+        the per-ray `check_ray_intersects` calls only run concurrently on a
+        free-threaded Python build.
+
+        Args:
+            batch (RayBatch): The rays to cast
+            n_workers (int or None): Number of threads (default: CPU count)
+
+        Returns:
+            list: Same as `raycast_batch`
+        """
+        n = len(batch)
+        n_workers = max(1, min(n_workers or os.cpu_count() or 1, n))
+        results = [None] * n
+        bounds = [n * k // n_workers for k in range(n_workers + 1)]
+
+        def cast_chunk(start, stop):
+            results[start:stop] = self.raycast_batch(batch.slice(start, stop))
+
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            # list() re-raises any exception from the workers
+            list(executor.map(cast_chunk, bounds[:-1], bounds[1:]))
+        return results
 
     def clear(self):
         """Remove all objects from the scene."""
         self.objs.clear()
         self.optical_objs.clear()
+        self._objs_set.clear()
+        self._optical_set.clear()
         self.error = None
         self.warning = None
 
@@ -197,11 +336,137 @@ if __name__ == "__main__":
     print(f"    Ray density: {scene2.ray_density} radians")
     print(f"    Objects: {scene2.objs}")
 
-    # Test 9: Remove non-existent object (should not raise error)
-    print("\nTest 9: Remove non-existent object")
+    # Test 9: Bulk loading
+    print("\nTest 9: Bulk load objects")
+    scene3 = Scene()
+    bulk = [MockLightSource(f"Bulk{i}") for i in range(3)] + [MockAnnotation("Bulk note"), MockDecorator("Bulk grid")]
+    scene3.load_objects(bulk)
+    print(f"  Total objects: {len(scene3.objs)}")
+    print(f"  Optical objects: {len(scene3.optical_objs)}")
+    scene3.remove_object(bulk[0])
+    print(f"  After removing {bulk[0]}: {len(scene3.objs)} objects, {len(scene3.optical_objs)} optical")
+    assert len(scene3.objs) == 4 and len(scene3.optical_objs) == 2
+
+    # Test 10: Remove non-existent object (should not raise error)
+    print("\nTest 10: Remove non-existent object")
     fake_obj = MockLightSource("NonExistent")
     scene2.remove_object(fake_obj)
     print(f"  Attempted to remove non-existent object: {fake_obj}")
     print(f"  Total objects (unchanged): {len(scene2.objs)}")
 
+    # Test 11: Batch raycast with bounding box culling
+    print("\nTest 11: Batch raycast")
+    try:
+        from .ray import Ray
+        from .ray_batch import RayBatch
+        from .scene_objs.blocker.blocker import Blocker
+        from .scene_objs.glass.glass import Glass
+        from .scene_objs.glass.ideal_lens import IdealLens
+    except ImportError:
+        import sys
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+        from ray import Ray
+        from ray_batch import RayBatch
+        from core.scene_objs.blocker.blocker import Blocker
+        from core.scene_objs.glass.glass import Glass
+        from core.scene_objs.glass.ideal_lens import IdealLens
+
+    class MockWall:
+        """Vertical wall at x between y_min and y_max that counts intersection tests."""
+        def __init__(self, x, y_min, y_max):
+            self.x = x
+            self.y_min = y_min
+            self.y_max = y_max
+            self.is_optical = True
+            self.tests = 0
+
+        def get_bounding_box(self):
+            return (self.x, self.y_min, self.x, self.y_max)
+
+        def check_ray_intersects(self, ray):
+            self.tests += 1
+            dx = ray.p2['x'] - ray.p1['x']
+            if dx == 0:
+                return None
+            t = (self.x - ray.p1['x']) / dx
+            y = ray.p1['y'] + t * (ray.p2['y'] - ray.p1['y'])
+            if t > 0 and self.y_min <= y <= self.y_max:
+                return {'x': self.x, 'y': y}
+            return None
+
+        def __repr__(self):
+            return f"MockWall(x={self.x})"
+
+    scene4 = Scene()
+    near_wall = MockWall(10, -5, 5)
+    far_wall = MockWall(20, -50, 50)
+    unreachable_wall = MockWall(-100, 100, 200)
+    scene4.load_objects([near_wall, far_wall, unreachable_wall])
+    rays = RayBatch.from_rays([
+        Ray(p1={'x': 0, 'y': 0}, p2={'x': 1, 'y': 0}),    # Hits the near wall first
+        Ray(p1={'x': 0, 'y': 20}, p2={'x': 1, 'y': 20}),  # Passes above the near wall
+        Ray(p1={'x': 0, 'y': 0}, p2={'x': 0, 'y': 1}),    # Hits nothing
+    ])
+    hits = scene4.raycast_batch(rays)
+    for ray_index, hit in enumerate(hits):
+        print(f"  Ray {ray_index}: {hit}")
+    print(f"  Intersection tests: near={near_wall.tests}, far={far_wall.tests}, unreachable={unreachable_wall.tests}")
+    assert hits[0]['obj'] is near_wall and hits[0]['point'] == {'x': 10, 'y': 0.0}
+    assert hits[1]['obj'] is far_wall
+    assert hits[2] is None
+    assert unreachable_wall.tests == 0
+
+    # Test 12: Parallel batch raycast gives the same result
+    print("\nTest 12: Parallel batch raycast")
+    scene_parallel = Scene()
+    prism = Glass(scene_parallel, {
+        'path': [
+            {'x': 5, 'y': 10, 'arc': False},
+            {'x': 15, 'y': 10, 'arc': False},
+            {'x': 10, 'y': 18, 'arc': False},
+        ],
+        'not_done': False,
+        'ref_index': 1.5,
+    })
+    scene_parallel.load_objects([MockWall(10, -5, 5), MockWall(20, -50, 50), prism])
+    parallel_rays = RayBatch.from_rays([
+        Ray(p1={'x': 0, 'y': y}, p2={'x': 1, 'y': y}) for y in range(-8, 20)
+    ])
+    serial_hits = scene_parallel.raycast_batch(parallel_rays)
+    parallel_hits = scene_parallel.raycast_parallel(parallel_rays, n_workers=2)
+    glass_hits = sum(1 for hit in serial_hits if hit and hit['obj'] is prism)
+    print(f"  Glass hits: {glass_hits}, same as serial: {parallel_hits == serial_hits}")
+    assert glass_hits > 0
+    assert parallel_hits == serial_hits
+
+    # Test 13: Batch raycast against real scene objects
+    print("\nTest 13: Batch raycast with Glass, Blocker and IdealLens")
+    scene5 = Scene()
+    lens = IdealLens(scene5, {'p1': {'x': 10, 'y': -5}, 'p2': {'x': 10, 'y': 5}, 'focalLength': 100})
+    glass = Glass(scene5, {
+        'path': [
+            {'x': 30, 'y': 15, 'arc': False},
+            {'x': 40, 'y': 15, 'arc': False},
+            {'x': 40, 'y': 25, 'arc': False},
+            {'x': 30, 'y': 25, 'arc': False},
+        ],
+        'not_done': False,
+        'ref_index': 1.5,
+    })
+    blocker = Blocker(scene5, {'p1': {'x': 60, 'y': -30}, 'p2': {'x': 60, 'y': 30}})
+    scene5.load_objects([lens, glass, blocker])
+    rays5 = RayBatch.from_rays([
+        Ray(p1={'x': 0, 'y': 0}, p2={'x': 1, 'y': 0}),      # Hits the lens
+        Ray(p1={'x': 0, 'y': 20}, p2={'x': 1, 'y': 20}),    # Misses the lens, hits the glass
+        Ray(p1={'x': 0, 'y': -20}, p2={'x': 1, 'y': -20}),  # Only the blocker is in the way
+        Ray(p1={'x': 0, 'y': 0}, p2={'x': -1, 'y': 0}),     # Hits nothing
+    ])
+    hits5 = scene5.raycast_batch(rays5)
+    for ray_index, hit in enumerate(hits5):
+        print(f"  Ray {ray_index}: {type(hit['obj']).__name__ + ' at ' + str(hit['point']) if hit else None}")
+    assert hits5[0]['obj'] is lens and abs(hits5[0]['point']['x'] - 10) < 1e-9
+    assert hits5[1]['obj'] is glass and abs(hits5[1]['point']['x'] - 30) < 1e-9
+    assert hits5[2]['obj'] is blocker and abs(hits5[2]['point']['x'] - 60) < 1e-9
+    assert hits5[3] is None
+
     print("\nScene test completed successfully!")
@@ -432,6 +432,46 @@ class BaseSceneObj:
         """
         return None
 
+    def get_intersection_segment(self):
+        """
+        Get the line segment that rays intersect, if the object is a plain segment.
+
+        An object may return its segment here only if `check_ray_intersects` is
+        equivalent to `LineObjMixin.check_ray_intersects_shape` on that segment
+        for every ray. The simulator then tests such objects against each ray
+        all at once with vectorized operations instead of calling
+        `check_ray_intersects` on each of them.
+
+        Returns:
+            Tuple (x1, y1, x2, y2), or None if `check_ray_intersects` must be called.
+        """
+        return None
+
+    def get_bounding_box(self):
+        """
+        Get the axis-aligned bounding box of the part of the object that rays can hit.
+
+        Used to skip `check_ray_intersects` for rays that cannot reach the object.
+
+        Returns:
+            Tuple (min_x, min_y, max_x, max_y), or None if the object has no finite
+            bounding box (rays must then always be tested).
+        """
+        return None
+
+    def get_bounding_circle(self):
+        """
+        Get a circle enclosing the part of the object that rays can hit.
+
+        Used together with `get_bounding_box` to skip `check_ray_intersects` for
+        rays whose line passes outside the circle.
+
+        Returns:
+            Tuple (center_x, center_y, radius), or None if the object has no
+            bounding circle (only the bounding box is then used).
+        """
+        return None
+
     def on_ray_incident(
         self,
         ray,
@@ -145,6 +145,18 @@ class Blocker(LineObjMixin, BaseFilter):
         else:
             return None
 
+    def get_intersection_segment(self):
+        """
+        Get the segment of the blocker, unless the wavelength filter is active.
+
+        Returns:
+            Tuple (x1, y1, x2, y2), or None if whether a ray intersects depends
+            on its wavelength.
+        """
+        if self.scene.simulate_colors and self.filter and self.wavelength:
+            return None
+        return (self.p1['x'], self.p1['y'], self.p2['x'], self.p2['y'])
+
     def on_ray_incident(self, ray, ray_index, incident_point, surface_merging_objs=None):
         """
         Handle ray incidence on the blocker.
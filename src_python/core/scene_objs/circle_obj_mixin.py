@@ -142,6 +142,27 @@ class CircleObjMixin:
         # Return the center of the circle (p1) as a Point object
         return geometry.point(self.p1['x'], self.p1['y'])
 
+    def get_bounding_box(self):
+        """
+        Get the axis-aligned bounding box of the circle.
+
+        Returns:
+            Tuple (min_x, min_y, max_x, max_y).
+        """
+        cx, cy = self.p1['x'], self.p1['y']
+        r = math.hypot(self.p2['x'] - cx, self.p2['y'] - cy)
+        return (cx - r, cy - r, cx + r, cy + r)
+
+    def get_bounding_circle(self):
+        """
+        Get the circle itself.
+
+        Returns:
+            Tuple (center_x, center_y, radius).
+        """
+        cx, cy = self.p1['x'], self.p1['y']
+        return (cx, cy, math.hypot(self.p2['x'] - cx, self.p2['y'] - cy))
+
     def on_construct_mouse_down(self, mouse, ctrl: bool, shift: bool) -> Optional[Dict[str, Any]]:
         """
         Mouse down event when the object is being constructed by the user.
@@ -15,17 +15,488 @@ limitations under the License.
 """
 
 import math
+import numpy as np
 from typing import Dict, Any, Optional, List
 
 # Handle both relative imports (when used as a module) and absolute imports (when run as script)
 if __name__ == "__main__":
     from core.scene_objs.base_glass import BaseGlass
     from core.constants import MIN_RAY_SEGMENT_LENGTH
+    from core.ray_kernels import HAS_NUMBA, jit_kernel
     from core import geometry
+    from core.geometry import Geometry
 else:
     from ..base_glass import BaseGlass
     from ...constants import MIN_RAY_SEGMENT_LENGTH
+    from ...ray_kernels import HAS_NUMBA, jit_kernel
     from ... import geometry
+    from ...geometry import Geometry
+
+
+class PathPoint:
+    """
+    A point of a glass path.
+
+    Uses __slots__ instead of a per-instance dict, which makes the points
+    smaller than the dicts of the JSON format.
+
+    The points returned by Glass.path are views of the glass's coordinate
+    arrays: reading them gives the current coordinates, and assigning x, y or
+    arc (as an attribute or in the dict style, point['x'] = ...) changes the
+    glass. Once a new path is assigned to the glass, the points of the old
+    path keep their last values and no longer affect it.
+
+    Attributes:
+        x, y: Coordinates
+        arc: Whether the point is the middle point of a circular arc
+    """
+
+    __slots__ = ('_x', '_y', '_arc', '_glass', '_index')
+
+    _KEYS = ('x', 'y', 'arc')
+
+    def __init__(self, x, y, arc=False):
+        self._x = x
+        self._y = y
+        self._arc = arc
+        self._glass = None
+        self._index = None
+
+    @classmethod
+    def _of_glass(cls, glass, index):
+        """Create a point that views the index-th point of a glass path."""
+        point = cls.__new__(cls)
+        point._glass = glass
+        point._index = index
+        return point
+
+    def _detach(self):
+        """Copy the current values out of the glass and stop following it."""
+        glass = self._glass
+        if glass is not None:
+            self._x = float(glass._xs[self._index])
+            self._y = float(glass._ys[self._index])
+            self._arc = bool(glass._arcs[self._index])
+            self._glass = None
+
+    @property
+    def x(self):
+        glass = self._glass
+        return self._x if glass is None else float(glass._xs[self._index])
+
+    @x.setter
+    def x(self, value):
+        glass = self._glass
+        if glass is None:
+            self._x = value
+        else:
+            glass._xs[self._index] = value
+            glass._path_changed()
+
+    @property
+    def y(self):
+        glass = self._glass
+        return self._y if glass is None else float(glass._ys[self._index])
+
+    @y.setter
+    def y(self, value):
+        glass = self._glass
+        if glass is None:
+            self._y = value
+        else:
+            glass._ys[self._index] = value
+            glass._path_changed()
+
+    @property
+    def arc(self):
+        glass = self._glass
+        return self._arc if glass is None else bool(glass._arcs[self._index])
+
+    @arc.setter
+    def arc(self, value):
+        glass = self._glass
+        if glass is None:
+            self._arc = value
+        else:
+            glass._arcs[self._index] = bool(value)
+            glass._path_changed()
+
+    @classmethod
+    def from_dict(cls, point):
+        """Create a point from a JSON dict with keys 'x', 'y' and optionally 'arc'."""
+        return cls(point['x'], point['y'], bool(point.get('arc', False)))
+
+    def to_dict(self):
+        """Convert the point to the dict used in the JSON format."""
+        return {'x': self.x, 'y': self.y, 'arc': self.arc}
+
+    def __getitem__(self, key):
+        # Access in the dict style of the JSON format, for code written
+        # against it
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __repr__(self):
+        return f"PathPoint(x={self.x}, y={self.y}, arc={self.arc})"
+
+
+# Scalar intersection kernels for the glass path. They take plain floats
+# instead of Point/Line objects, so they can be compiled with Numba and do not
+# allocate per segment.
+
+_ray_circle_ts = jit_kernel(Geometry.ray_circle_ts)
+
+
+@jit_kernel
+def _is_on_arc(px, py, x1, y1, x2, y2, x3, y3):
+    """Whether a point on the circle lies on the arc p1→p3→p2."""
+    # The point is on the arc if it is strictly on the same side of the chord
+    # p1-p2 as p3
+    chord_x = x2 - x1
+    chord_y = y2 - y1
+    side = chord_x * (py - y1) - chord_y * (px - x1)
+    side_mid = chord_x * (y3 - y1) - chord_y * (x3 - x1)
+    return side * side_mid > 0
+
+
+@jit_kernel
+def _circumcenter(ax, ay, bx, by, cx, cy):
+    """
+    Center of the circle through three points, from the determinant formula.
+
+    Returns:
+        tuple: (ux, uy, ok), with ok = False if the points are collinear
+    """
+    d = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if abs(d) < 1e-12:
+        return 0.0, 0.0, False
+    a_sq = ax * ax + ay * ay
+    b_sq = bx * bx + by * by
+    c_sq = cx * cx + cy * cy
+    ux = (a_sq * (by - cy) + b_sq * (cy - ay) + c_sq * (ay - by)) / d
+    uy = (a_sq * (cx - bx) + b_sq * (ax - cx) + c_sq * (bx - ax)) / d
+    return ux, uy, True
+
+
+@jit_kernel
+def _line_segment_hit(x1, y1, x2, y2, ssq, r1x, r1y, r2x, r2y, min_len_sq):
+    """
+    Intersect the ray with the segment (x1, y1)-(x2, y2).
+
+    ssq is the squared length of the segment.
+
+    Returns:
+        tuple: (ix, iy, dist_sq, normal_x, normal_y, near_edge), with
+            dist_sq = inf if the ray misses the segment
+    """
+    # Solve r1 + t * d = p1 + u * e with two cross products
+    ex = x2 - x1
+    ey = y2 - y1
+    wx = x1 - r1x
+    wy = y1 - r1y
+    dx = r2x - r1x
+    dy = r2y - r1y
+    denominator = dx * ey - dy * ex
+    if abs(denominator) < 1e-12:
+        return 0.0, 0.0, math.inf, 0.0, 0.0, False
+    t = (wx * ey - wy * ex) / denominator
+    u = (wx * dy - wy * dx) / denominator
+    if t < 0 or u < 0 or u > 1:
+        return 0.0, 0.0, math.inf, 0.0, 0.0, False
+
+    px = r1x + t * dx
+    py = r1y + t * dy
+    dist_sq = (r1x - px) * (r1x - px) + (r1y - py) * (r1y - py)
+    if dist_sq <= min_len_sq:
+        return 0.0, 0.0, math.inf, 0.0, 0.0, False
+
+    rdot = dx * ex + dy * ey
+    normal_x = rdot * ex - ssq * dx
+    normal_y = rdot * ey - ssq * dy
+
+    near_edge = ((px - x1) * (px - x1) + (py - y1) * (py - y1) < min_len_sq or
+                 (px - x2) * (px - x2) + (py - y2) * (py - y2) < min_len_sq)
+
+    return px, py, dist_sq, normal_x, normal_y, near_edge
+
+
+@jit_kernel
+def _arc_hit(x1, y1, x2, y2, x3, y3, cx, cy, r_sq, r1x, r1y, r2x, r2y, min_len_sq):
+    """
+    Intersect the ray with the arc p1→p3→p2.
+
+    (cx, cy) is the center of the circle through the three points and r_sq its
+    squared radius.
+
+    Returns:
+        tuple: Same as _line_segment_hit()
+    """
+    ix = 0.0
+    iy = 0.0
+    best = math.inf
+    normal_x = 0.0
+    normal_y = 0.0
+    near_edge = False
+
+    # Both candidates are evaluated and masked to an infinite distance when
+    # invalid, so the nearest one is picked with a single comparison. With a
+    # unit direction, t >= 0 means the point is on the ray and t^2 is its
+    # squared distance from the ray start.
+    dx = r2x - r1x
+    dy = r2y - r1y
+    length = math.sqrt(dx * dx + dy * dy)
+    ux = dx / length
+    uy = dy / length
+    ta, tb, hit = _ray_circle_ts(r1x, r1y, ux, uy, cx, cy, r_sq)
+    if hit:
+        ax = r1x + ta * ux
+        ay = r1y + ta * uy
+        bx = r1x + tb * ux
+        by = r1y + tb * uy
+        dist_a = ta * ta
+        dist_b = tb * tb
+        valid_a = (ta >= 0) & (dist_a > min_len_sq) & _is_on_arc(ax, ay, x1, y1, x2, y2, x3, y3)
+        valid_b = (tb >= 0) & (dist_b > min_len_sq) & _is_on_arc(bx, by, x1, y1, x2, y2, x3, y3)
+        masked_a = dist_a if valid_a else math.inf
+        masked_b = dist_b if valid_b else math.inf
+        pick_b = masked_b < masked_a
+        best = masked_b if pick_b else masked_a
+
+        if best < math.inf:
+            ix = bx if pick_b else ax
+            iy = by if pick_b else ay
+            # Determine normal direction based on ray direction relative to
+            # arc: outward if the other intersection is further along the ray
+            other_ahead = ((ta >= 0) & (dist_b < dist_a)) if pick_b else ((tb >= 0) & (dist_a < dist_b))
+            sign = 1.0 if other_ahead else -1.0
+            normal_x = sign * (ix - cx)
+            normal_y = sign * (iy - cy)
+
+            near_edge = ((ix - x1) * (ix - x1) + (iy - y1) * (iy - y1) < min_len_sq or
+                         (ix - x2) * (ix - x2) + (iy - y2) * (iy - y2) < min_len_sq)
+
+    return ix, iy, best, normal_x, normal_y, near_edge
+
+
+@jit_kernel
+def _contains_point(seg_is_arc, segs, px, py):
+    """
+    Whether a point is inside a closed glass path.
+
+    Crossing-number test with a horizontal ray from the point towards +x. A
+    segment is counted when y_lo <= py < y_hi, so a ray through a vertex
+    counts it exactly once and the result is deterministic. An arc is
+    handled as its chord plus the circular segment between the chord and
+    the arc, which toggles the result for points inside it.
+
+    Args:
+        seg_is_arc: Whether each segment is an arc (True) or a line (False)
+        segs: Per-segment geometry, one row per segment with the _SEG_* columns
+        px, py: The point to test
+
+    Returns:
+        bool: True if the point is inside the path
+    """
+    inside = False
+    for k in range(len(segs)):
+        seg = segs[k]
+        x1 = seg[_SEG_X1]
+        y1 = seg[_SEG_Y1]
+        x2 = seg[_SEG_X2]
+        y2 = seg[_SEG_Y2]
+        if (y1 <= py) != (y2 <= py):
+            x_cross = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+            if x_cross > px:
+                inside = not inside
+        if seg_is_arc[k]:
+            dcx = px - seg[_SEG_CX]
+            dcy = py - seg[_SEG_CY]
+            if (dcx * dcx + dcy * dcy < seg[_SEG_R_SQ] and
+                    _is_on_arc(px, py, x1, y1, x2, y2, seg[_SEG_X3], seg[_SEG_Y3])):
+                inside = not inside
+    return inside
+
+
+def _ray_endpoints(ray):
+    """
+    Get the coordinates of a ray's p1 and p2.
+
+    Rays reach the glass both with geometry.point() endpoints and with
+    {'x', 'y'} dicts (as passed by the simulator and Scene.raycast_batch).
+
+    Returns:
+        Tuple (x1, y1, x2, y2).
+    """
+    p1 = ray.p1
+    p2 = ray.p2
+    if isinstance(p1, dict):
+        return p1['x'], p1['y'], p2['x'], p2['y']
+    return p1.x, p1.y, p2.x, p2.y
+
+
+def _ray_hits_box(box, r1x, r1y, r2x, r2y, pad):
+    """
+    Slab test of the ray from (r1x, r1y) through (r2x, r2y) against a box.
+
+    Args:
+        box: The box as (min_x, min_y, max_x, max_y).
+        pad: Margin added on every side of the box.
+
+    Returns:
+        False if the ray certainly misses the box.
+    """
+    t_enter = 0.0
+    t_exit = math.inf
+    for origin, direction, lo, hi in ((r1x, r2x - r1x, box[0] - pad, box[2] + pad),
+                                      (r1y, r2y - r1y, box[1] - pad, box[3] + pad)):
+        if direction == 0.0:
+            # Parallel to this slab: inside it everywhere or nowhere
+            if origin < lo or origin > hi:
+                return False
+            continue
+        t1 = (lo - origin) / direction
+        t2 = (hi - origin) / direction
+        t_enter = max(t_enter, min(t1, t2))
+        t_exit = min(t_exit, max(t1, t2))
+    return t_enter <= t_exit
+
+
+# Colors of the control points drawn when the glass is hovered
+_POINT_COLOR = [255, 0, 0, 255]
+_ARC_POINT_COLOR = [255, 0, 255, 255]
+
+
+# Columns of the per-segment geometry table built by Glass._get_segments().
+# _SEG_EXTENT is the radius of an arc or the length of a line segment.
+(_SEG_X1, _SEG_Y1, _SEG_X2, _SEG_Y2, _SEG_X3, _SEG_Y3, _SEG_CX, _SEG_CY, _SEG_R_SQ, _SEG_SSQ,
+ _SEG_EXTENT, _SEG_COLUMNS) = range(12)
+
+
+@jit_kernel
+def _intersect_path(seg_is_arc, segs, r1x, r1y, r2x, r2y, min_len_sq):
+    """
+    Find the nearest intersection of a ray with a closed glass path.
+
+    Segments that cannot hold a hit nearer than the best one so far (plus the
+    merging tolerance) are skipped, using a lower bound on their distance
+    from the ray start.
+
+    Args:
+        seg_is_arc: Whether each segment is an arc (True) or a line (False)
+        segs: Per-segment geometry, one row per segment with the _SEG_* columns
+        r1x, r1y, r2x, r2y: The ray, from (r1x, r1y) through (r2x, r2y)
+        min_len_sq: Squared minimum distance for a valid intersection
+
+    Returns:
+        tuple: (ix, iy, dist_sq, normal_x, normal_y, near_edge,
+            surface_multiplicity), with dist_sq = inf if the ray does not hit
+            the path
+    """
+    min_len = math.sqrt(min_len_sq)
+    reach = math.inf
+    ix = 0.0
+    iy = 0.0
+    min_dist_sq = math.inf
+    normal_x = 0.0
+    normal_y = 0.0
+    near_edge = False
+    surface_multiplicity = 1
+
+    for k in range(len(segs)):
+        seg = segs[k]
+        if seg_is_arc[k]:
+            lower = (math.sqrt((r1x - seg[_SEG_CX]) ** 2 + (r1y - seg[_SEG_CY]) ** 2) -
+                     seg[_SEG_EXTENT])
+        else:
+            lower = (math.sqrt((r1x - seg[_SEG_X1]) ** 2 + (r1y - seg[_SEG_Y1]) ** 2) +
+                     math.sqrt((r1x - seg[_SEG_X2]) ** 2 + (r1y - seg[_SEG_Y2]) ** 2) -
+                     seg[_SEG_EXTENT]) * 0.5
+        if lower > reach:
+            continue
+
+        if seg_is_arc[k]:
+            sx, sy, dist_sq, nx, ny, edge = _arc_hit(
+                seg[_SEG_X1], seg[_SEG_Y1], seg[_SEG_X2], seg[_SEG_Y2],
+                seg[_SEG_X3], seg[_SEG_Y3],
+                seg[_SEG_CX], seg[_SEG_CY], seg[_SEG_R_SQ],
+                r1x, r1y, r2x, r2y, min_len_sq)
+        else:
+            sx, sy, dist_sq, nx, ny, edge = _line_segment_hit(
+                seg[_SEG_X1], seg[_SEG_Y1], seg[_SEG_X2], seg[_SEG_Y2],
+                seg[_SEG_SSQ], r1x, r1y, r2x, r2y, min_len_sq)
+
+        if dist_sq < math.inf:
+            if (min_dist_sq < math.inf and
+                    (sx - ix) * (sx - ix) + (sy - iy) * (sy - iy) < min_len_sq):
+                # Self surface merging
+                surface_multiplicity += 1
+            elif dist_sq < min_dist_sq:
+                ix = sx
+                iy = sy
+                min_dist_sq = dist_sq
+                normal_x = nx
+                normal_y = ny
+                near_edge = edge
+                surface_multiplicity = 1
+                reach = math.sqrt(min_dist_sq) + min_len
+
+    return ix, iy, min_dist_sq, normal_x, normal_y, near_edge, surface_multiplicity
+
+
+@jit_kernel
+def _intersect_polygon(seg_is_arc, segs, r1x, r1y, r2x, r2y, min_len_sq):
+    """
+    Same as _intersect_path(), specialized for paths without arcs.
+
+    seg_is_arc is ignored; it is only accepted so that both kernels can be
+    called the same way.
+    """
+    min_len = math.sqrt(min_len_sq)
+    reach = math.inf
+    ix = 0.0
+    iy = 0.0
+    min_dist_sq = math.inf
+    normal_x = 0.0
+    normal_y = 0.0
+    near_edge = False
+    surface_multiplicity = 1
+
+    for k in range(len(segs)):
+        seg = segs[k]
+        x1 = seg[_SEG_X1]
+        y1 = seg[_SEG_Y1]
+        x2 = seg[_SEG_X2]
+        y2 = seg[_SEG_Y2]
+        lower = (math.sqrt((r1x - x1) ** 2 + (r1y - y1) ** 2) +
+                 math.sqrt((r1x - x2) ** 2 + (r1y - y2) ** 2) - seg[_SEG_EXTENT]) * 0.5
+        if lower > reach:
+            continue
+
+        sx, sy, dist_sq, nx, ny, edge = _line_segment_hit(
+            x1, y1, x2, y2, seg[_SEG_SSQ], r1x, r1y, r2x, r2y, min_len_sq)
+
+        if dist_sq < math.inf:
+            if (min_dist_sq < math.inf and
+                    (sx - ix) * (sx - ix) + (sy - iy) * (sy - iy) < min_len_sq):
+                # Self surface merging
+                surface_multiplicity += 1
+            elif dist_sq < min_dist_sq:
+                ix = sx
+                iy = sy
+                min_dist_sq = dist_sq
+                normal_x = nx
+                normal_y = ny
+                near_edge = edge
+                surface_multiplicity = 1
+                reach = math.sqrt(min_dist_sq) + min_len
+
+    return ix, iy, min_dist_sq, normal_x, normal_y, near_edge, surface_multiplicity
 
 
 class Glass(BaseGlass):
@@ -37,9 +508,13 @@ class Glass(BaseGlass):
     forms a circular arc. Otherwise, path[i-1]→path[i] and path[i]→path[i+1] are line segments.
 
     Attributes:
-        path: List of points defining the glass boundary. Each point is a dict with:
+        path: List of points defining the glass boundary. Each point is a PathPoint with:
               - x, y: Coordinates
               - arc: Boolean flag (True = circular arc, False = line segment)
+              The points are stored internally as the arrays _xs, _ys and _arcs;
+              the PathPoint objects are views of them, so a point can be
+              edited in place. Assign a new list (of PathPoint objects or
+              JSON dicts) to add or remove points.
         not_done: Whether the user is still drawing the glass (UI construction mode).
         ref_index: The refractive index, or Cauchy coefficient A if "Simulate Colors" is on.
         cauchy_b: The Cauchy coefficient B if "Simulate Colors" is on (in μm²).
@@ -78,11 +553,124 @@ class Glass(BaseGlass):
         """
         super().__init__(scene, json_obj)
 
-        # Ensure path points have proper structure
-        if hasattr(self, 'path') and self.path:
-            for point in self.path:
-                if 'arc' not in point:
-                    point['arc'] = False
+    @property
+    def path(self):
+        """List of path points as PathPoint objects viewing the coordinate arrays."""
+        if self._path_view is None:
+            self._path_view = [PathPoint._of_glass(self, i) for i in range(len(self._xs))]
+        return self._path_view
+
+    @path.setter
+    def path(self, points):
+        points = [p if isinstance(p, PathPoint) else PathPoint.from_dict(p) for p in points]
+        xs = np.array([p.x for p in points], dtype=np.float64)
+        ys = np.array([p.y for p in points], dtype=np.float64)
+        arcs = np.array([bool(p.arc) for p in points], dtype=bool)
+        # The points handed out so far index the old arrays
+        for point in getattr(self, '_path_view', None) or ():
+            point._detach()
+        self._path_view = None
+        self._xs = xs
+        self._ys = ys
+        self._arcs = arcs
+        self._path_changed()
+
+    def serialize(self):
+        """
+        Serialize the glass to a JSON-compatible dictionary.
+
+        The path is serialized as a list of dicts, like in the JSON format.
+
+        Returns:
+            The serialized dictionary object.
+        """
+        path_view = self._path_view
+        self._path_view = [p.to_dict() for p in self.path]
+        try:
+            return super().serialize()
+        finally:
+            self._path_view = path_view
+
+    def _path_changed(self):
+        """Drop the data derived from the path after the points are modified."""
+        self._segments = None
+        self._aabb = None
+
+    def _get_segments(self):
+        """
+        Get the geometry of the path segments, computed once per path change.
+
+        Each line segment path[i]→path[i+1] and each arc path[i]→path[i+1]→path[i+2]
+        becomes one row of the table, in path order. Points that are in the
+        middle of an arc do not start a segment. Arcs through collinear points
+        are stored as line segments.
+
+        Also picks the intersection kernel: _intersect_polygon() if no
+        segment is an arc, otherwise _intersect_path().
+
+        Returns:
+            tuple: (seg_is_arc, segs), a boolean array and a float array with
+                one row per segment and the _SEG_* columns
+        """
+        if self._segments is None:
+            xs = self._xs.tolist()
+            ys = self._ys.tolist()
+            arcs = self._arcs.tolist()
+            # Indices of the following points, wrapping around the closed path
+            indices = np.arange(len(xs))
+            next_indices = np.roll(indices, -1).tolist()
+            next_next_indices = np.roll(indices, -2).tolist()
+            seg_is_arc = []
+            rows = []
+            for i, next_i, next_next_i in zip(indices.tolist(), next_indices, next_next_indices):
+                if arcs[i]:
+                    continue
+                if arcs[next_i]:
+                    # Circular arc from path[i] through path[i+1] to path[i+2]
+                    end_i = next_next_i
+                    mid_i = next_i
+                else:
+                    # Line segment from path[i] to path[i+1]
+                    end_i = next_i
+                    mid_i = None
+                x1, y1, x2, y2 = xs[i], ys[i], xs[end_i], ys[end_i]
+                dx = x2 - x1
+                dy = y2 - y1
+                ssq = dx * dx + dy * dy
+                row = [x1, y1, x2, y2, 0.0, 0.0, 0.0, 0.0, 0.0, ssq, math.sqrt(ssq)]
+                is_arc = False
+                if mid_i is not None:
+                    x3, y3 = xs[mid_i], ys[mid_i]
+                    cx, cy, ok = _circumcenter(x1, y1, x3, y3, x2, y2)
+                    # Collinear points are treated as a line segment
+                    if ok:
+                        r_sq = (cx - x2) * (cx - x2) + (cy - y2) * (cy - y2)
+                        row[_SEG_X3:_SEG_SSQ] = [x3, y3, cx, cy, r_sq]
+                        row[_SEG_EXTENT] = math.sqrt(r_sq)
+                        is_arc = True
+                seg_is_arc.append(is_arc)
+                rows.append(row)
+            self._segments = (
+                np.array(seg_is_arc, dtype=bool),
+                np.array(rows, dtype=np.float64).reshape(len(rows), _SEG_COLUMNS)
+            )
+            # Without Numba the kernels run as plain Python, where indexing
+            # lists is much faster than indexing NumPy arrays element by element
+            self._kernel_segments = self._segments if HAS_NUMBA else (seg_is_arc, rows)
+            self._has_any_arc = bool(self._segments[0].any())
+            self._intersect_fn = _intersect_path if self._has_any_arc else _intersect_polygon
+        return self._segments
+
+    def _get_kernel_segments(self):
+        """
+        Get the segment table in the form the intersection kernels run fastest on.
+
+        Returns:
+            tuple: The arrays of _get_segments() when Numba is available,
+                otherwise the same data as a list of flags and a list of rows
+        """
+        self._get_segments()
+        return self._kernel_segments
 
     def populate_obj_bar(self, obj_bar):
         """
@@ -103,7 +691,7 @@ class Glass(BaseGlass):
             is_above_light: Whether rendering above the light layer.
             is_hovered: Whether the glass is hovered by the mouse.
         """
-        if not self.path:
+        if not self._xs.size:
             return
 
         if self.not_done:
@@ -116,16 +704,13 @@ class Glass(BaseGlass):
 
         # Draw control points if hovered
         if is_hovered:
-            for point in self.path:
-                if 'arc' in point:
-                    color = [255, 0, 255, 255] if point['arc'] else [255, 0, 0, 255]
-                    canvas_renderer.draw_rect(
-                        point['x'] - 1.5 * canvas_renderer.length_scale,
-                        point['y'] - 1.5 * canvas_renderer.length_scale,
-                        3 * canvas_renderer.length_scale,
-                        3 * canvas_renderer.length_scale,
-                        color
-                    )
+            half = 1.5 * canvas_renderer.length_scale
+            side = 2 * half
+            for x, y, arc in zip(self._xs.tolist(), self._ys.tolist(), self._arcs.tolist()):
+                canvas_renderer.draw_rect(
+                    x - half, y - half, side, side,
+                    _ARC_POINT_COLOR if arc else _POINT_COLOR
+                )
 
     def _draw_path(self, canvas_renderer, is_hovered, closed=True):
         """
@@ -136,7 +721,7 @@ class Glass(BaseGlass):
             is_hovered: Whether the glass is hovered.
             closed: Whether to close the path (connect last to first point).
         """
-        if len(self.path) < 2:
+        if self._xs.size < 2:
             return
 
         # Implementation would use canvas_renderer to draw lines and arcs
@@ -154,9 +739,9 @@ class Glass(BaseGlass):
         Returns:
             True to indicate the move was successful.
         """
-        for point in self.path:
-            point['x'] += diff_x
-            point['y'] += diff_y
+        self._xs += diff_x
+        self._ys += diff_y
+        self._path_changed()
         return True
 
     def rotate(self, angle, center=None):
@@ -176,11 +761,17 @@ class Glass(BaseGlass):
         cos_a = math.cos(angle)
         sin_a = math.sin(angle)
 
-        for point in self.path:
-            dx = point['x'] - center['x']
-            dy = point['y'] - center['y']
-            point['x'] = center['x'] + dx * cos_a - dy * sin_a
-            point['y'] = center['y'] + dx * sin_a + dy * cos_a
+        # Rotation matrix applied to all points at once, writing back into the
+        # existing coordinate buffers
+        dx = self._xs - center['x']
+        dy = self._ys - center['y']
+        np.multiply(dx, cos_a, out=self._xs)
+        self._xs -= dy * sin_a
+        self._xs += center['x']
+        np.multiply(dx, sin_a, out=self._ys)
+        self._ys += dy * cos_a
+        self._ys += center['y']
+        self._path_changed()
 
         return True
 
@@ -198,9 +789,13 @@ class Glass(BaseGlass):
         if center is None:
             center = self.get_default_center()
 
-        for point in self.path:
-            point['x'] = center['x'] + (point['x'] - center['x']) * scale_factor
-            point['y'] = center['y'] + (point['y'] - center['y']) * scale_factor
+        self._xs -= center['x']
+        self._xs *= scale_factor
+        self._xs += center['x']
+        self._ys -= center['y']
+        self._ys *= scale_factor
+        self._ys += center['y']
+        self._path_changed()
 
         return True
 
@@ -211,161 +806,163 @@ class Glass(BaseGlass):
         Returns:
             The geometric center (average of all path points).
         """
-        if not self.path:
+        n = self._xs.size
+        if not n:
             return {'x': 0, 'y': 0}
 
-        sum_x = sum(p['x'] for p in self.path)
-        sum_y = sum(p['y'] for p in self.path)
-
+        # ndarray.sum() skips the dtype and axis handling done by mean(),
+        # which dominates for the few points of a typical glass
         return {
-            'x': sum_x / len(self.path),
-            'y': sum_y / len(self.path)
+            'x': float(self._xs.sum()) / n,
+            'y': float(self._ys.sum()) / n
         }
 
-    def check_ray_intersects(self, ray):
+    def get_bounding_box(self):
         """
-        Check if a ray intersects with the glass.
+        Get the axis-aligned bounding box of the glass, cached between path changes.
 
-        Args:
-            ray: The ray to check.
+        Arcs are bounded by the box of their whole circle, which is
+        conservative but cheap.
 
         Returns:
-            The nearest intersection point, or None if no intersection.
+            Tuple (min_x, min_y, max_x, max_y), or None if the path is empty.
         """
-        if self.not_done or self.ref_index <= 0 or not self.path:
-            return None
-
-        min_distance_sq = float('inf')
-        nearest_point = None
-
-        # Check each segment (line or arc) in the path
-        for i in range(len(self.path)):
-            intersection = self._check_segment_intersection(ray, i)
-            if intersection:
-                dist_sq = geometry.distance_squared(ray.p1, intersection)
-                if dist_sq < min_distance_sq and dist_sq > MIN_RAY_SEGMENT_LENGTH ** 2 * self.scene.length_scale ** 2:
-                    min_distance_sq = dist_sq
-                    nearest_point = intersection
-
-        return nearest_point
+        if self._aabb is None and self._xs.size:
+            seg_is_arc, segs = self._get_segments()
+            min_x = float(self._xs.min())
+            min_y = float(self._ys.min())
+            max_x = float(self._xs.max())
+            max_y = float(self._ys.max())
+            if seg_is_arc.any():
+                arcs = segs[seg_is_arc]
+                r = arcs[:, _SEG_EXTENT]
+                min_x = min(min_x, float((arcs[:, _SEG_CX] - r).min()))
+                min_y = min(min_y, float((arcs[:, _SEG_CY] - r).min()))
+                max_x = max(max_x, float((arcs[:, _SEG_CX] + r).max()))
+                max_y = max(max_y, float((arcs[:, _SEG_CY] + r).max()))
+            self._aabb = (min_x, min_y, max_x, max_y)
+        return self._aabb
 
-    def _check_segment_intersection(self, ray, i):
+    def check_ray_intersects(self, ray):
         """
-        Check intersection with a single segment of the path.
+        Check if a ray intersects with the glass.
 
         Args:
             ray: The ray to check.
-            i: Index of the current path segment.
 
         Returns:
-            Intersection point or None.
-        """
-        next_i = (i + 1) % len(self.path)
-        next_next_i = (i + 2) % len(self.path)
-
-        if self.path[next_i].get('arc') and not self.path[i].get('arc'):
-            # Circular arc from path[i] through path[i+1] to path[i+2]
-            return self._check_arc_intersection(ray, i, next_i, next_next_i)
-        elif not self.path[next_i].get('arc') and not self.path[i].get('arc'):
-            # Line segment from path[i] to path[i+1]
-            return self._check_line_segment_intersection(ray, i, next_i)
-
-        return None
-
-    def _check_line_segment_intersection(self, ray, i, next_i):
+            The nearest intersection point, or None if no intersection.
         """
-        Check intersection with a line segment.
-
-        Args:
-            ray: The ray to check.
-            i: Start point index.
-            next_i: End point index.
+        if self.not_done or self.ref_index <= 0 or not self._xs.size:
+            return None
 
-        Returns:
-            Intersection point or None.
-        """
-        p1 = geometry.point(self.path[i]['x'], self.path[i]['y'])
-        p2 = geometry.point(self.path[next_i]['x'], self.path[next_i]['y'])
+        r1x, r1y, r2x, r2y = _ray_endpoints(ray)
+        if not _ray_hits_box(self.get_bounding_box(), r1x, r1y, r2x, r2y,
+                             MIN_RAY_SEGMENT_LENGTH * self.scene.length_scale):
+            return None
 
-        intersection = geometry.lines_intersection(
-            geometry.line(ray.p1, ray.p2),
-            geometry.line(p1, p2)
+        seg_is_arc, segs = self._get_kernel_segments()
+        hit = self._intersect_fn(
+            seg_is_arc, segs, r1x, r1y, r2x, r2y,
+            MIN_RAY_SEGMENT_LENGTH ** 2 * self.scene.length_scale ** 2
         )
+        if hit[2] == math.inf:
+            return None
+        return geometry.point(hit[0], hit[1])
 
-        if (geometry.intersection_is_on_segment(intersection, geometry.line(p1, p2)) and
-            geometry.intersection_is_on_ray(intersection, ray)):
-            return intersection
-
-        return None
-
-    def _check_arc_intersection(self, ray, i, mid_i, next_i):
-        """
-        Check intersection with a circular arc.
-
-        Args:
-            ray: The ray to check.
-            i: First point index.
-            mid_i: Middle point index (defines the arc).
-            next_i: Last point index.
-
-        Returns:
-            Nearest valid intersection point or None.
+    def check_rays_intersect(self, rays_p1, rays_p2):
         """
-        p1 = geometry.point(self.path[i]['x'], self.path[i]['y'])
-        p2 = geometry.point(self.path[next_i]['x'], self.path[next_i]['y'])
-        p3 = geometry.point(self.path[mid_i]['x'], self.path[mid_i]['y'])
-
-        # Find center of circle passing through p1, p3, p2
-        center = geometry.lines_intersection(
-            geometry.perpendicular_bisector(geometry.line(p1, p3)),
-            geometry.perpendicular_bisector(geometry.line(p2, p3))
-        )
-
-        if not (math.isfinite(center.x) and math.isfinite(center.y)):
-            # Collinear points - treat as line segment
-            return self._check_line_segment_intersection(ray, i, next_i)
-
-        r = geometry.distance(center, p3)
-        intersections = geometry.line_circle_intersections(
-            geometry.line(ray.p1, ray.p2),
-            geometry.circle(center, p2)
-        )
-
-        # Find nearest valid intersection on the arc
-        nearest = None
-        min_dist_sq = float('inf')
-
-        for intersection in [intersections[1], intersections[2]]:
-            if self._point_is_on_arc(intersection, center, p1, p2, p3):
-                if geometry.intersection_is_on_ray(intersection, ray):
-                    dist_sq = geometry.distance_squared(ray.p1, intersection)
-                    if dist_sq < min_dist_sq:
-                        min_dist_sq = dist_sq
-                        nearest = intersection
-
-        return nearest
+        Find the nearest intersection of many rays with the glass at once.
 
-    def _point_is_on_arc(self, point, center, p1, p2, p3):
-        """
-        Check if a point is on the arc defined by p1→p3→p2.
+        Vectorized counterpart of check_ray_intersects(): every ray is tested
+        against every segment of the path with (rays x segments) array
+        operations instead of a loop per ray.
 
         Args:
-            point: Point to check.
-            center: Center of the circle.
-            p1: Start point of arc.
-            p2: End point of arc.
-            p3: Middle point defining the arc.
+            rays_p1: Starting points of the rays, array of shape (K, 2).
+            rays_p2: Points the rays pass through, array of shape (K, 2).
 
         Returns:
-            True if point is on the arc.
+            Array of shape (K, 2) with the nearest intersection point of each
+            ray, or NaN for rays that do not hit the glass.
         """
-        # Check if the intersection point is actually part of the arc segment
-        # This uses the logic from the JavaScript: the point should not be on the line p1-p2
-        line_p1_p2 = geometry.line(p1, p2)
-        line_p3_point = geometry.line(p3, point)
-        test_intersection = geometry.lines_intersection(line_p1_p2, line_p3_point)
+        rays_p1 = np.asarray(rays_p1, dtype=np.float64)
+        rays_p2 = np.asarray(rays_p2, dtype=np.float64)
+        k = rays_p1.shape[0]
+        result = np.full((k, 2), np.nan)
+        if self.not_done or self.ref_index <= 0 or not self._xs.size:
+            return result
+
+        seg_is_arc, segs = self._get_segments()
+        min_len_sq = MIN_RAY_SEGMENT_LENGTH ** 2 * self.scene.length_scale ** 2
+        rows = np.arange(k)
+        best_dist_sq = np.full(k, np.inf)
+
+        # Ray origins and directions as (K, 1) columns, broadcast against the
+        # (S,) segment arrays to give (K, S) results
+        ox = rays_p1[:, 0:1]
+        oy = rays_p1[:, 1:2]
+        dx = rays_p2[:, 0:1] - ox
+        dy = rays_p2[:, 1:2] - oy
+
+        def keep_nearest(px, py, dist_sq, valid):
+            dist_sq = np.where(valid, dist_sq, np.inf)
+            j = np.argmin(dist_sq, axis=1)
+            nearest = dist_sq[rows, j]
+            better = nearest < best_dist_sq
+            best_dist_sq[better] = nearest[better]
+            result[better, 0] = px[rows, j][better]
+            result[better, 1] = py[rows, j][better]
+
+        lines = segs[~seg_is_arc]
+        if len(lines):
+            ax = lines[:, _SEG_X1]
+            ay = lines[:, _SEG_Y1]
+            ex = lines[:, _SEG_X2] - ax
+            ey = lines[:, _SEG_Y2] - ay
+            wx = ax - ox
+            wy = ay - oy
+            # Solve p1 + t * d = a + u * e with two cross products
+            denominator = dx * ey - dy * ex
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = (wx * ey - wy * ex) / denominator
+                u = (wx * dy - wy * dx) / denominator
+            px = ox + t * dx
+            py = oy + t * dy
+            dist_sq = (px - ox) ** 2 + (py - oy) ** 2
+            valid = ((np.abs(denominator) >= 1e-12) & (t >= 0) & (u >= 0) & (u <= 1) &
+                     (dist_sq > min_len_sq))
+            keep_nearest(px, py, dist_sq, valid)
+
+        arcs = segs[seg_is_arc]
+        if len(arcs):
+            x1 = arcs[:, _SEG_X1]
+            y1 = arcs[:, _SEG_Y1]
+            chord_x = arcs[:, _SEG_X2] - x1
+            chord_y = arcs[:, _SEG_Y2] - y1
+            # Side of the chord p1-p2 on which the arc lies
+            side_mid = chord_x * (arcs[:, _SEG_Y3] - y1) - chord_y * (arcs[:, _SEG_X3] - x1)
+
+            length = np.hypot(dx, dy)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                vx = dx / length
+                vy = dy / length
+            # Project the center onto the ray: t = AM.v, h^2 = r^2 - |AM|^2 + t^2
+            amx = arcs[:, _SEG_CX] - ox
+            amy = arcs[:, _SEG_CY] - oy
+            tc = amx * vx + amy * vy
+            h_sq = arcs[:, _SEG_R_SQ] - (amx * amx + amy * amy) + tc * tc
+            h = np.sqrt(np.maximum(h_sq, 0))
+            for t in (tc + h, tc - h):
+                px = ox + t * vx
+                py = oy + t * vy
+                side = chord_x * (py - y1) - chord_y * (px - x1)
+                dist_sq = t * t
+                valid = ((h_sq >= 0) & (t >= 0) & (dist_sq > min_len_sq) &
+                         (side * side_mid > 0))
+                keep_nearest(px, py, dist_sq, valid)
 
-        return not geometry.intersection_is_on_segment(test_intersection, line_p3_point)
+        return result
 
     def on_ray_incident(self, ray, ray_index, incident_point, surface_merging_objs=None):
         """
@@ -436,52 +1033,33 @@ class Glass(BaseGlass):
         Returns:
             Dict with keys: s_point, normal, incident_type
         """
-        if not self.path:
+        if not self._xs.size:
             return {'s_point': None, 'normal': {'x': 0, 'y': 0}, 'incident_type': 0}
 
-        min_distance_sq = float('inf')
-        nearest_point = None
-        normal_x = 0
-        normal_y = 0
-        near_edge = False
-        surface_multiplicity = 1
-
-        # Create a test ray with slight perturbation for inside/outside test
-        ray2 = geometry.line(
-            ray.p1,
-            geometry.point(
-                ray.p2.x + self.scene.rng() * 1e-5,
-                ray.p2.y + self.scene.rng() * 1e-5
-            )
+        r1x, r1y, r2x, r2y = _ray_endpoints(ray)
+        if not _ray_hits_box(self.get_bounding_box(), r1x, r1y, r2x, r2y,
+                             MIN_RAY_SEGMENT_LENGTH * self.scene.length_scale):
+            # Nothing is hit, which is the same result as a ray passing outside
+            # the glass without crossing it
+            return {'s_point': None, 'normal': {'x': 0, 'y': 0}, 'incident_type': -1}
+
+        seg_is_arc, segs = self._get_kernel_segments()
+
+        ix, iy, dist_sq, normal_x, normal_y, near_edge, surface_multiplicity = self._intersect_fn(
+            seg_is_arc, segs, r1x, r1y, r2x, r2y,
+            MIN_RAY_SEGMENT_LENGTH ** 2 * self.scene.length_scale ** 2
         )
-        ray_intersect_count = 0
-
-        # Check each segment
-        for i in range(len(self.path)):
-            segment_data = self._get_segment_incident_data(ray, ray2, i)
-
-            if segment_data['point']:
-                if (nearest_point and
-                    geometry.distance_squared(segment_data['point'], nearest_point) <
-                    MIN_RAY_SEGMENT_LENGTH ** 2 * self.scene.length_scale ** 2):
-                    # Self surface merging
-                    surface_multiplicity += 1
-                elif segment_data['distance_sq'] < min_distance_sq:
-                    min_distance_sq = segment_data['distance_sq']
-                    nearest_point = segment_data['point']
-                    normal_x = segment_data['normal_x']
-                    normal_y = segment_data['normal_y']
-                    near_edge = segment_data['near_edge']
-                    surface_multiplicity = 1
-
-            ray_intersect_count += segment_data['ray2_intersect_count']
+        nearest_point = geometry.point(ix, iy) if dist_sq < math.inf else None
 
         # Determine incident type
         if near_edge:
             incident_type = float('nan')  # Incident on an edge point
         elif surface_multiplicity % 2 == 0:
             incident_type = 0  # Overlapping surfaces
-        elif ray_intersect_count % 2 == 1:
+        elif (nearest_point is not None and
+              _contains_point(seg_is_arc, segs, (r1x + ix) / 2, (r1y + iy) / 2)):
+            # No boundary lies strictly between the ray start and the nearest
+            # hit, so the side of their midpoint is the side the ray comes from
             incident_type = 1  # From inside to outside
         else:
             incident_type = -1  # From outside to inside
@@ -492,152 +1070,6 @@ class Glass(BaseGlass):
             'incident_type': incident_type
         }
 
-    def _get_segment_incident_data(self, ray, ray2, i):
-        """
-        Get incident data for a single segment.
-
-        Args:
-            ray: The main ray.
-            ray2: The test ray for inside/outside determination.
-            i: Segment index.
-
-        Returns:
-            Dict with segment incident data.
-        """
-        next_i = (i + 1) % len(self.path)
-        next_next_i = (i + 2) % len(self.path)
-
-        result = {
-            'point': None,
-            'distance_sq': float('inf'),
-            'normal_x': 0,
-            'normal_y': 0,
-            'near_edge': False,
-            'ray2_intersect_count': 0
-        }
-
-        if self.path[next_i].get('arc') and not self.path[i].get('arc'):
-            # Circular arc
-            self._process_arc_segment(ray, ray2, i, next_i, next_next_i, result)
-        elif not self.path[next_i].get('arc') and not self.path[i].get('arc'):
-            # Line segment
-            self._process_line_segment(ray, ray2, i, next_i, result)
-
-        return result
-
-    def _process_line_segment(self, ray, ray2, i, next_i, result):
-        """Process a line segment for incident data."""
-        p1 = self.path[i]
-        p2 = self.path[next_i]
-
-        # Check main ray intersection
-        rp = geometry.lines_intersection(
-            geometry.line(ray.p1, ray.p2),
-            geometry.line(geometry.point(p1['x'], p1['y']), geometry.point(p2['x'], p2['y']))
-        )
-
-        seg_line = geometry.line(geometry.point(p1['x'], p1['y']), geometry.point(p2['x'], p2['y']))
-        min_seg_len_sq = MIN_RAY_SEGMENT_LENGTH ** 2 * self.scene.length_scale ** 2
-
-        if (geometry.intersection_is_on_segment(rp, seg_line) and
-            geometry.intersection_is_on_ray(rp, ray) and
-            geometry.distance_squared(ray.p1, rp) > min_seg_len_sq):
-
-            result['point'] = rp
-            result['distance_sq'] = geometry.distance_squared(ray.p1, rp)
-
-            # Calculate normal
-            dx = p2['x'] - p1['x']
-            dy = p2['y'] - p1['y']
-            rdot = (ray.p2.x - ray.p1.x) * dx + (ray.p2.y - ray.p1.y) * dy
-            ssq = dx * dx + dy * dy
-
-            result['normal_x'] = rdot * dx - ssq * (ray.p2.x - ray.p1.x)
-            result['normal_y'] = rdot * dy - ssq * (ray.p2.y - ray.p1.y)
-
-            # Check if near edge
-            if (geometry.distance_squared(rp, geometry.point(p1['x'], p1['y'])) < min_seg_len_sq or
-                geometry.distance_squared(rp, geometry.point(p2['x'], p2['y'])) < min_seg_len_sq):
-                result['near_edge'] = True
-
-        # Check test ray intersection for inside/outside determination
-        rp2 = geometry.lines_intersection(
-            geometry.line(ray2.p1, ray2.p2),
-            geometry.line(geometry.point(p1['x'], p1['y']), geometry.point(p2['x'], p2['y']))
-        )
-
-        if (geometry.intersection_is_on_segment(rp2, seg_line) and
-            geometry.intersection_is_on_ray(rp2, ray2) and
-            geometry.distance_squared(ray2.p1, rp2) > min_seg_len_sq):
-            result['ray2_intersect_count'] = 1
-
-    def _process_arc_segment(self, ray, ray2, i, mid_i, next_i, result):
-        """Process a circular arc segment for incident data."""
-        p1 = geometry.point(self.path[i]['x'], self.path[i]['y'])
-        p2 = geometry.point(self.path[next_i]['x'], self.path[next_i]['y'])
-        p3 = geometry.point(self.path[mid_i]['x'], self.path[mid_i]['y'])
-
-        center = geometry.lines_intersection(
-            geometry.perpendicular_bisector(geometry.line(p1, p3)),
-            geometry.perpendicular_bisector(geometry.line(p2, p3))
-        )
-
-        if not (math.isfinite(center.x) and math.isfinite(center.y)):
-            # Collinear - treat as line segment
-            self._process_line_segment(ray, ray2, i, next_i, result)
-            return
-
-        # Find intersections with circle
-        rp_temp = geometry.line_circle_intersections(
-            geometry.line(ray.p1, ray.p2),
-            geometry.circle(center, p2)
-        )
-        rp2_temp = geometry.line_circle_intersections(
-            geometry.line(ray2.p1, ray2.p2),
-            geometry.circle(center, p2)
-        )
-
-        min_seg_len_sq = MIN_RAY_SEGMENT_LENGTH ** 2 * self.scene.length_scale ** 2
-
-        # Check both intersection points
-        for ii in [1, 2]:
-            rp = rp_temp[ii]
-            if (self._point_is_on_arc(rp, center, p1, p2, p3) and
-                geometry.intersection_is_on_ray(rp, ray) and
-                geometry.distance_squared(ray.p1, rp) > min_seg_len_sq):
-
-                dist_sq = geometry.distance_squared(ray.p1, rp)
-                if dist_sq < result['distance_sq']:
-                    result['point'] = rp
-                    result['distance_sq'] = dist_sq
-
-                    # Determine normal direction based on ray direction relative to arc
-                    other_ii = 2 if ii == 1 else 1
-                    rp_other = rp_temp[other_ii]
-                    dist_sq_other = geometry.distance_squared(ray.p1, rp_other)
-
-                    if (geometry.intersection_is_on_ray(rp_other, ray) and
-                        dist_sq < dist_sq_other):
-                        # From outside to inside
-                        result['normal_x'] = rp.x - center.x
-                        result['normal_y'] = rp.y - center.y
-                    else:
-                        # From inside to outside
-                        result['normal_x'] = center.x - rp.x
-                        result['normal_y'] = center.y - rp.y
-
-                    # Check if near edge
-                    if (geometry.distance_squared(rp, p1) < min_seg_len_sq or
-                        geometry.distance_squared(rp, p2) < min_seg_len_sq):
-                        result['near_edge'] = True
-
-            # Check test ray
-            rp2 = rp2_temp[ii]
-            if (self._point_is_on_arc(rp2, center, p1, p2, p3) and
-                geometry.intersection_is_on_ray(rp2, ray2) and
-                geometry.distance_squared(ray2.p1, rp2) > min_seg_len_sq):
-                result['ray2_intersect_count'] += 1
-
 
 # Example usage and testing
 if __name__ == "__main__":
@@ -649,12 +1081,6 @@ if __name__ == "__main__":
             self.error = None
             self.simulate_colors = False
             self.length_scale = 1.0
-            self._rng_counter = 0
-
-        def rng(self):
-            """Simple random number generator for testing."""
-            self._rng_counter += 1
-            return (self._rng_counter * 0.123456789) % 1.0
 
     # Test 1: Create a simple triangular prism
     print("Test 1: Triangular prism")
@@ -770,4 +1196,72 @@ if __name__ == "__main__":
     print(f"  Center after: ({center_after['x']:.1f}, {center_after['y']:.1f})")
     print(f"  Center preserved: {abs(center_before['x'] - center_after['x']) < 0.1 and abs(center_before['y'] - center_after['y']) < 0.1}")
 
+    # Test 6: Batch intersection
+    print("\nTest 6: Batch intersection")
+    lens = Glass(scene, {
+        'path': [
+            {'x': 0, 'y': -20, 'arc': False},
+            {'x': 10, 'y': 0, 'arc': True},
+            {'x': 0, 'y': 20, 'arc': False},
+            {'x': -10, 'y': 0, 'arc': True}
+        ],
+        'not_done': False
+    })
+    rays_p1 = np.array([[-50, 5], [-50, 5], [3, 50], [50, -30], [0, 0]], dtype=float)
+    rays_p2 = np.array([[0, 5], [-60, 5], [3, 40], [40, -30], [1, 1]], dtype=float)
+    batch_hits = lens.check_rays_intersect(rays_p1, rays_p2)
+    for (p1, p2, hit) in zip(rays_p1, rays_p2, batch_hits):
+        single = lens.check_ray_intersects(MockRay({'x': p1[0], 'y': p1[1]}, {'x': p2[0], 'y': p2[1]}))
+        print(f"  Ray from ({p1[0]:.0f}, {p1[1]:.0f}): batch=({hit[0]:.3f}, {hit[1]:.3f})")
+        if single is None:
+            assert np.isnan(hit).all()
+        else:
+            assert abs(hit[0] - single.x) < 1e-9 and abs(hit[1] - single.y) < 1e-9
+
+    # Test 7: Bounding box, including the bulge of the arcs
+    print("\nTest 7: Bounding box")
+    box = lens.get_bounding_box()
+    print(f"  Lens box: ({box[0]:.1f}, {box[1]:.1f}, {box[2]:.1f}, {box[3]:.1f})")
+    assert box[0] <= -10 and box[2] >= 10 and box[1] <= -20 and box[3] >= 20
+    far_ray = MockRay({'x': -50, 'y': 100}, {'x': 50, 'y': 100})
+    print(f"  Ray passing above: {lens.check_ray_intersects(far_ray)}")
+
+    # Test 8: Path points and the JSON round-trip
+    print("\nTest 8: Serialization")
+    print(f"  First lens point: {lens.path[0]}")
+    data = lens.serialize()
+    print(f"  Serialized path: {data['path']}")
+    assert all(isinstance(p, dict) for p in data['path'])
+    restored = Glass(scene, data)
+    assert [p.to_dict() for p in restored.path] == data['path']
+    assert isinstance(lens.path[0], PathPoint)
+
+    # Test 9: Editing a path point in place
+    print("\nTest 9: Editing a path point in place")
+    square = Glass(scene, {
+        'path': [
+            {'x': 0, 'y': 0, 'arc': False},
+            {'x': 10, 'y': 0, 'arc': False},
+            {'x': 10, 'y': 10, 'arc': False},
+            {'x': 0, 'y': 10, 'arc': False},
+        ],
+        'not_done': False,
+        'ref_index': 1.5,
+    })
+    edge_ray = MockRay({'x': -10, 'y': 5}, {'x': 0, 'y': 5})
+    print(f"  Before: hit at {square.check_ray_intersects(edge_ray)}, box {square.get_bounding_box()}")
+    first_points = square.path
+    square.path[0].x = -5
+    square.path[3]['x'] = -5
+    hit = square.check_ray_intersects(edge_ray)
+    print(f"  After moving the left edge: hit at {hit}, box {square.get_bounding_box()}")
+    assert abs(hit.x + 5) < 1e-9
+    assert square.get_bounding_box()[0] == -5
+    assert first_points[0].x == -5 and square.serialize()['path'][3]['x'] == -5
+    square.move(1, 0)
+    assert first_points[0].x == -4
+    square.path = [{'x': 0, 'y': 0}, {'x': 1, 'y': 0}, {'x': 0, 'y': 1}]
+    first_points[1].x = 100  # No longer part of the glass
+    assert square.path[1].x == 1 and first_points[1].x == 100
+
     print("\nGlass test completed successfully!")
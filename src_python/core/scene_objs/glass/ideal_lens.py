@@ -232,6 +232,15 @@ class IdealLens(LineObjMixin, BaseSceneObj):
         """
         return self.check_ray_intersects_shape(ray)
 
+    def get_intersection_segment(self):
+        """
+        Get the segment of the lens.
+
+        Returns:
+            Tuple (x1, y1, x2, y2).
+        """
+        return (self.p1['x'], self.p1['y'], self.p2['x'], self.p2['y'])
+
     def on_ray_incident(self, ray, ray_index, incident_point, surface_merging_objs=None):
         """
         Handle ray incidence on the ideal lens.
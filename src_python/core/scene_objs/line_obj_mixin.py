@@ -140,6 +140,17 @@ class LineObjMixin:
             (self.p1['y'] + self.p2['y']) / 2
         )
 
+    def get_bounding_box(self):
+        """
+        Get the axis-aligned bounding box of the line segment.
+
+        Returns:
+            Tuple (min_x, min_y, max_x, max_y).
+        """
+        x1, y1 = self.p1['x'], self.p1['y']
+        x2, y2 = self.p2['x'], self.p2['y']
+        return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
     def on_construct_mouse_down(self, mouse, ctrl: bool, shift: bool) -> Optional[Dict[str, Any]]:
         """
         Mouse down event when the object is being constructed by the user.
@@ -15,14 +15,207 @@ limitations under the License.
 """
 
 import math
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 
 # Handle both relative imports (when used as a module) and absolute imports (when run as script)
 if __name__ == "__main__":
     from ray import Ray
+    from ray_batch import RayBatch
     import geometry
+    from bvh import BoundingVolumeHierarchy
+    from ray_kernels import HAS_NUMBA, jit_kernel
 else:
     from .ray import Ray
+    from .ray_batch import RayBatch
     from . import geometry
+    from .bvh import BoundingVolumeHierarchy
+    from .ray_kernels import HAS_NUMBA, jit_kernel
+
+
+@jit_kernel
+def _nearest_segment_hits(x1, y1, x2, y2, sx1, sy1, sx2, sy2, sxb, syb, sb,
+                          min_len_sq, band, out_rows, out_x, out_y):
+    """
+    Intersect one ray with every segment of the segment table.
+
+    Uses the same arithmetic as `Simulator._segment_table_hits`, but only keeps
+    the hits that can affect the nearest intersection: those at least
+    sqrt(min_len_sq) from the ray start and at most `band` farther than the
+    nearest such hit. The per-segment terms sxb = sx2 - sx1, syb = sy2 - sy1
+    and sb = sx2 * sy1 - sx1 * sy2 are computed once per run rather than
+    once per ray.
+
+    Returns:
+        int: Number of hits written to the first entries of out_rows (segment
+            rows), out_x and out_y (intersection points)
+    """
+    a = x2 * y1 - x1 * y2
+    xa = x2 - x1
+    ya = y2 - y1
+    count = 0
+    nearest_sq = math.inf
+    for i in range(sx1.shape[0]):
+        xb = sxb[i]
+        yb = syb[i]
+        denominator = xa * yb - xb * ya
+        if not abs(denominator) >= 1e-12:
+            continue
+        b = sb[i]
+        px = (a * xb - b * xa) / denominator
+        py = (a * yb - b * ya) / denominator
+        if not ((px - sx1[i]) * xb + (py - sy1[i]) * yb >= 0 and
+                (px - sx2[i]) * (sx1[i] - sx2[i]) + (py - sy2[i]) * (sy1[i] - sy2[i]) >= 0 and
+                (px - x1) * xa + (py - y1) * ya >= 0):
+            continue
+        dx = px - x1
+        dy = py - y1
+        distance_sq = dx * dx + dy * dy
+        if distance_sq < min_len_sq:
+            continue
+        if distance_sq < nearest_sq:
+            nearest_sq = distance_sq
+        out_rows[count] = i
+        out_x[count] = px
+        out_y[count] = py
+        count += 1
+
+    # Drop the hits too far beyond the nearest one to matter
+    limit = math.sqrt(nearest_sq) + band
+    limit_sq = limit * limit
+    kept = 0
+    for k in range(count):
+        dx = out_x[k] - x1
+        dy = out_y[k] - y1
+        if dx * dx + dy * dy <= limit_sq:
+            out_rows[kept] = out_rows[k]
+            out_x[kept] = out_x[k]
+            out_y[kept] = out_y[k]
+            kept += 1
+    return kept
+
+
+class _RayGeom:
+    """
+    Geometry-compatible view of a Ray passed to check_ray_intersects().
+
+    The existing objects expect ray.p1 and ray.p2 to be dicts (not Point
+    objects). A single instance per simulator is reused for every ray.
+    """
+    __slots__ = ('p1', 'p2', 'brightness_s', 'brightness_p', 'wavelength')
+
+
+class _OutputRayGeom:
+    """
+    Outgoing ray passed to on_ray_incident().
+
+    A fresh instance is made for each incidence and has no __slots__, since
+    objects may tag the ray they hand back with extra attributes (e.g. gap
+    or bodyMergingObj).
+    """
+
+    def __init__(self, p1, p2, brightness_s, brightness_p, wavelength):
+        self.p1 = p1
+        self.p2 = p2
+        self.brightness_s = brightness_s
+        self.brightness_p = brightness_p
+        self.wavelength = wavelength
+
+
+def _brightness_of(ray_data):
+    """
+    Total brightness of emitted ray data, before it is converted to a Ray.
+
+    Args:
+        ray_data (dict or object): Ray data as accepted by Simulator._dict_to_ray
+
+    Returns:
+        float: brightness_s + brightness_p, with missing values counted as 0
+            (the defaults used by the conversion)
+    """
+    if isinstance(ray_data, dict):
+        return ray_data.get('brightness_s', 0.0) + ray_data.get('brightness_p', 0.0)
+    return getattr(ray_data, 'brightness_s', 0.0) + getattr(ray_data, 'brightness_p', 0.0)
+
+
+def _distance_squared(point, x, y):
+    """
+    Squared distance from (x, y) to an intersection point.
+
+    Args:
+        point (Point or dict or None): As returned by check_ray_intersects()
+        x, y (float): The other point
+
+    Returns:
+        float: The squared distance, or inf if point is None
+    """
+    if point is None:
+        return math.inf
+    if hasattr(point, 'x'):
+        dx = point.x - x
+        dy = point.y - y
+    else:
+        dx = point['x'] - x
+        dy = point['y'] - y
+    return dx * dx + dy * dy
+
+
+def _same_ray(ray):
+    """Converter used by Simulator._dict_to_ray for objects that already are Rays."""
+    return ray
+
+
+# Default of Simulator._process_ray(intersection_info=...), since None means no hit
+_NOT_SEARCHED = object()
+
+# Simulator set up in each worker process of Simulator(workers=...)
+_worker_simulator = None
+
+
+def _init_intersection_worker(scene_data):
+    """
+    Set up a worker process to find ray intersections in a copy of the scene.
+
+    Args:
+        scene_data (bytes): The pickled scene
+    """
+    global _worker_simulator
+    _worker_simulator = Simulator(pickle.loads(scene_data))
+    _worker_simulator._prepare_objects()
+
+
+def _find_intersections_in_worker(rays):
+    """
+    Find the nearest intersection of each ray in the worker's scene.
+
+    Args:
+        rays (list): (p1, p2, brightness_s, brightness_p, wavelength) tuples,
+            with p1 and p2 as dicts
+
+    Returns:
+        list: For each ray, None if it hits nothing, otherwise (obj_index, point,
+            merging_obj_indices, undefined_behavior), with objects given by their
+            index in scene.optical_objs
+    """
+    simulator = _worker_simulator
+    index_of = {id(obj): i for i, obj in enumerate(simulator._indexed_objs)}
+    results = []
+    for p1, p2, brightness_s, brightness_p, wavelength in rays:
+        ray = Ray(p1=p1, p2=p2, brightness_s=brightness_s,
+                  brightness_p=brightness_p, wavelength=wavelength)
+        info = simulator._find_nearest_intersection(ray)
+        if info is None:
+            results.append(None)
+        else:
+            results.append((
+                index_of[id(info['obj'])],
+                info['point'],
+                [index_of[id(obj)] for obj in info['surface_merging_objs']],
+                info['undefined_behavior']
+            ))
+    return results
 
 
 class Simulator:
@@ -41,31 +234,75 @@ class Simulator:
     Attributes:
         scene (Scene): The scene containing objects and settings
         max_rays (int): Maximum number of ray segments to prevent infinite loops
-        pending_rays (list): Queue of rays waiting to be processed
+        pending_rays (deque): FIFO queue of rays waiting to be processed
         processed_ray_count (int): Number of rays processed so far
-        ray_segments (list): List of all ray segments for visualization
+        segment_batch (RayBatch): All ray segments for visualization, one row each
+        ray_segments (list): The same segments as Ray objects (built on first access)
         total_undefined_behavior (int): Count of undefined behavior incidents
         undefined_behavior_objs (list): List of object pairs causing undefined behavior
     """
 
     MIN_RAY_SEGMENT_LENGTH = 1e-6  # Minimum length to consider valid intersection
     UNDEFINED_BEHAVIOR_THRESHOLD = 10  # Maximum undefined behaviors before warning
-
-    def __init__(self, scene, max_rays=10000):
+    MIN_VECTORIZED_SEGMENTS = 128  # Fewer plain segments are cheaper to cull with the BVH
+    MIN_COMPILED_SEGMENTS = 32  # Same, when the segment table is scanned by the Numba kernel
+    MAX_SEGMENT_TABLE_BLOCK = 1 << 20  # Ray/segment pairs broadcast at once by _segment_table_hits
+    MAX_PREALLOCATED_SEGMENTS = 1 << 16  # Cap on the segment rows allocated up front by run()
+    MIN_SORTED_BATCH = 64  # Smaller batches are not worth sorting (see sort_pending_rays)
+    MIN_PARALLEL_BATCH = 1024  # Smaller batches are not worth sending to workers
+
+    def __init__(self, scene, max_rays=10000, sort_pending_rays=False, workers=None):
         """
         Initialize the simulator.
 
         Args:
             scene (Scene): The scene to simulate
             max_rays (int): Maximum ray segments to process (default: 10000)
+            sort_pending_rays (bool): Process the rays of each batch grouped by
+                wavelength and direction (default: False). Rays heading the same
+                way tend to hit the same objects, so this keeps the work of
+                consecutive rays similar. It changes the order of the segments
+                and the ray indices passed to on_ray_incident, which objects
+                such as partially reflecting glasses depend on.
+            workers (int or None): Number of worker processes that search the
+                intersections of large ray batches in parallel (default: None,
+                search in this process). Each worker gets a pickled copy of the
+                scene when run() starts; on_ray_incident() is still called here,
+                in the same order, so the result does not depend on this. Scenes
+                that cannot be pickled are simulated without workers.
         """
         self.scene = scene
         self.max_rays = max_rays
-        self.pending_rays = []
+        self.sort_pending_rays = sort_pending_rays
+        self.workers = workers
+        self._executor = None
+        self.pending_rays = deque()
         self.processed_ray_count = 0
-        self.ray_segments = []
+        self.segment_batch = RayBatch()
+        self._ray_segments = []
         self.total_undefined_behavior = 0
         self.undefined_behavior_objs = []
+        # Acceleration structures over the optical objects, only valid during run()
+        self._indexed_objs = []
+        self._intersect_fns = []
+        self._incident_handlers = {}
+        self._bvh = None
+        self._unbounded_obj_indices = []
+        self._bounding_circles = {}
+        self._seg_obj_indices = []
+        self._seg_x1 = self._seg_y1 = self._seg_x2 = self._seg_y2 = None
+        self._seg_xb = self._seg_yb = self._seg_b = None
+        self._seg_hit_rows = self._seg_hit_x = self._seg_hit_y = None
+        self._scratch_ray_geom = _RayGeom()
+        # ids of the pending rays taken from the Ray pool by this simulator,
+        # which it releases again once their segment is stored
+        self._acquired_ray_ids = set()
+        # Ray converters by type of the emitted ray data, see _dict_to_ray()
+        self._to_ray_dispatch = {
+            Ray: _same_ray,
+            _OutputRayGeom: self._ray_from_geom,
+            dict: self._ray_from_dict,
+        }
 
     def run(self):
         """
@@ -80,40 +317,44 @@ class Simulator:
             list: List of ray segments (each is a Ray object)
         """
         # Reset simulation state (preserve any manually added pending_rays)
-        # (i.e. we don't do self.pending_rays = [] here, to allow adding rays before run())
+        # (i.e. we don't do self.pending_rays.clear() here, to allow adding rays before run())
         # Note:  most users add rays via on_simulation_start() rather than manually
         self.processed_ray_count = 0
-        self.ray_segments = []
+        # Each processed ray leaves exactly one segment, so max_rays rows suffice
+        self.segment_batch = RayBatch(min(self.max_rays, self.MAX_PREALLOCATED_SEGMENTS))
+        self._ray_segments = []
         self.total_undefined_behavior = 0
         self.undefined_behavior_objs = []
+        # Rays left pending by a previous run are not released; only rays
+        # acquired during this run are known to be owned by it
+        self._acquired_ray_ids = set()
         self.scene.error = None
         self.scene.warning = None
 
         # Step 1: Initialize all optical objects
         for obj in self.scene.optical_objs:
             if hasattr(obj, 'on_simulation_start'):
-                result = obj.on_simulation_start()
-                if result:
-                    # Handle dict return format from PointSource
-                    if isinstance(result, dict) and 'newRays' in result:
-                        rays = result['newRays']
-                    else:
-                        rays = result
-
-                    # Convert dict rays to Ray objects if needed
-                    if rays:
-                        if isinstance(rays, list):
-                            for ray_data in rays:
-                                ray = self._dict_to_ray(ray_data)
-                                if ray:
-                                    self.pending_rays.append(ray)
-                        else:
-                            ray = self._dict_to_ray(rays)
-                            if ray:
-                                self.pending_rays.append(ray)
+                # Convert dict rays to Ray objects if needed
+                for ray_data in self._normalize_emit(obj.on_simulation_start()):
+                    ray = self._dict_to_ray(ray_data)
+                    if ray:
+                        self.pending_rays.append(ray)
 
         # Step 2: Process all rays
-        self._process_rays()
+        self._prepare_objects()
+        self._executor = self._start_workers()
+        try:
+            self._process_rays()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            # The objects may be changed between runs
+            self._bvh = None
+            self._bounding_circles = {}
+            self._seg_obj_indices = []
+            self._intersect_fns = []
+            self._incident_handlers = {}
 
         # Check if we hit the ray limit
         if self.processed_ray_count >= self.max_rays:
@@ -121,6 +362,90 @@ class Simulator:
 
         return self.ray_segments
 
+    def _prepare_objects(self):
+        """Index the optical objects and build the acceleration structures over them."""
+        # The acceleration structures refer to the objects by their index here
+        self._indexed_objs = list(self.scene.optical_objs)
+        # Look the methods up once per run rather than once per ray
+        self._intersect_fns = [
+            getattr(obj, 'check_ray_intersects', None) for obj in self._indexed_objs
+        ]
+        self._incident_handlers = {
+            id(obj): obj.on_ray_incident
+            for obj in self._indexed_objs
+            if hasattr(obj, 'on_ray_incident')
+        }
+        self._build_segment_table()
+        self._build_bvh()
+
+    def _start_workers(self):
+        """
+        Start the worker processes, if any were requested.
+
+        Returns:
+            ProcessPoolExecutor or None: The workers, or None if the
+                intersections are searched in this process
+        """
+        if not self.workers or self.workers < 2:
+            return None
+        try:
+            scene_data = pickle.dumps(self.scene)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_intersection_worker,
+            initargs=(scene_data,)
+        )
+
+    def _parallel_intersections(self, batch):
+        """
+        Search the nearest intersections of a batch of rays in the worker processes.
+
+        Args:
+            batch (list): The (already extended) rays
+
+        Returns:
+            list: For each ray, the result of `_find_nearest_intersection`
+        """
+        rays = [
+            (ray.p1, ray.p2, ray.brightness_s, ray.brightness_p, ray.wavelength)
+            for ray in batch
+        ]
+        chunk_size = -(-len(rays) // (4 * self.workers))
+        chunks = [rays[start:start + chunk_size] for start in range(0, len(rays), chunk_size)]
+
+        objs = self._indexed_objs
+        results = []
+        for chunk_results in self._executor.map(_find_intersections_in_worker, chunks):
+            for result in chunk_results:
+                if result is None:
+                    results.append(None)
+                else:
+                    obj_index, point, merging_indices, undefined_behavior = result
+                    results.append({
+                        'obj': objs[obj_index],
+                        'point': point,
+                        'surface_merging_objs': [objs[i] for i in merging_indices],
+                        'undefined_behavior': undefined_behavior
+                    })
+        return results
+
+    @property
+    def ray_segments(self):
+        """
+        The ray segments traced so far, as Ray objects.
+
+        The segments are stored in `segment_batch`; the Ray objects are only
+        created when this is first read after new segments were added.
+
+        Returns:
+            list: List of ray segments (each is a Ray object)
+        """
+        if len(self._ray_segments) != self.segment_batch.size:
+            self._ray_segments = self.segment_batch.to_rays()
+        return self._ray_segments
+
     def _process_rays(self):
         """
         Process all rays in the pending queue.
@@ -136,105 +461,472 @@ class Simulator:
         they are merged according to the surface merging rules.
         """
         while self.pending_rays and self.processed_ray_count < self.max_rays:
-            ray = self.pending_rays.pop(0)  # FIFO queue
-            ray.is_new = False
+            # Take every pending ray at once, as far as max_rays allows. The rays
+            # they spawn are queued behind them, so they are processed in the
+            # same order as when taking one ray at a time.
+            batch_size = min(len(self.pending_rays), self.max_rays - self.processed_ray_count)
+            batch = [self.pending_rays.popleft() for _ in range(batch_size)]
+            for ray in batch:
+                ray.is_new = False
+                self._extend_ray(ray)
+            if self.sort_pending_rays and batch_size > self.MIN_SORTED_BATCH:
+                batch = self._sort_batch(batch)
+
+            if self._executor is not None and batch_size >= self.MIN_PARALLEL_BATCH:
+                for ray, intersection_info in zip(batch, self._parallel_intersections(batch)):
+                    self._process_ray(ray, intersection_info=intersection_info)
+                    self.processed_ray_count += 1
+                continue
 
-            # Extend ray p2 to represent an infinite ray
-            # The ray's p2 from PointSource is just a direction (1 unit from p1)
-            # We need to extend it to find intersections along the infinite ray
-            dx = ray.p2['x'] - ray.p1['x']
-            dy = ray.p2['y'] - ray.p1['y']
-            length = math.sqrt(dx*dx + dy*dy)
-
-            if length > 1e-10:
-                # Extend to a large distance for intersection testing
-                extension = 10000.0 / length
-                ray.p2 = {
-                    'x': ray.p1['x'] + dx * extension,
-                    'y': ray.p1['y'] + dy * extension
-                }
-
-            # Find the nearest intersection with surface merging support
-            intersection_info = self._find_nearest_intersection(ray)
-
-            if intersection_info is None:
-                # No intersection - ray continues to p2 (already extended above)
-                self.ray_segments.append(ray)
+            # Test the whole batch against the segment table in one go
+            if self._seg_obj_indices:
+                batch_segment_hits = self._segment_table_hits(batch)
             else:
-                # Unpack intersection info (now includes surface merging data)
-                obj = intersection_info['obj']
-                incident_point = intersection_info['point']
-                surface_merging_objs = intersection_info['surface_merging_objs']
-                undefined_behavior = intersection_info['undefined_behavior']
-
-                # Handle undefined behavior
-                if undefined_behavior and surface_merging_objs:
-                    # Declare undefined behavior for each overlapping object
-                    for merging_obj in surface_merging_objs:
-                        self.declare_undefined_behavior(obj, merging_obj)
-
-                # Save original p2 before truncation (needed for on_ray_incident)
-                original_p2 = {'x': ray.p2['x'], 'y': ray.p2['y']}
-
-                # Truncate ray at intersection point
-                ray.p2 = incident_point
-
-                # Store the ray segment
-                self.ray_segments.append(ray)
-
-                # Let the object handle the incident ray
-                if hasattr(obj, 'on_ray_incident'):
-                    # Create output ray compatible with existing objects
-                    # They expect ray.p1/p2 to be dicts
-                    class OutputRayGeom:
-                        pass
-
-                    output_ray_geom = OutputRayGeom()
-                    output_ray_geom.p1 = incident_point
-                    # p2 should be in the ray direction (use original p2, not incident point)
-                    output_ray_geom.p2 = original_p2
-                    output_ray_geom.brightness_s = ray.brightness_s
-                    output_ray_geom.brightness_p = ray.brightness_p
-                    output_ray_geom.wavelength = ray.wavelength
-
-                    # Object modifies the ray (may change direction, brightness, etc.)
-                    # Pass surface_merging_objs to on_ray_incident
-                    result = obj.on_ray_incident(
-                        output_ray_geom,
-                        self.processed_ray_count,
-                        incident_point,
-                        surface_merging_objs
-                    )
-
-                    # Handle different return types and convert back to Ray objects
-                    if result is not None:
-                        if isinstance(result, list):
-                            # Multiple output rays (e.g., beam splitter)
-                            for new_ray_geom in result:
-                                new_ray = self._dict_to_ray(new_ray_geom)
-                                if new_ray and new_ray.total_brightness > 1e-6:
-                                    self.pending_rays.append(new_ray)
-                        else:
-                            # Single output ray
-                            new_ray = self._dict_to_ray(result)
-                            if new_ray and new_ray.total_brightness > 1e-6:
-                                self.pending_rays.append(new_ray)
-                    else:
-                        # Object modified the ray in-place, convert back to Ray
-                        new_ray = self._dict_to_ray(output_ray_geom)
-                        if new_ray and new_ray.total_brightness > 1e-6:
-                            self.pending_rays.append(new_ray)
-                    # If brightness is zero or None returned, ray is absorbed
+                batch_segment_hits = [None] * batch_size
 
-            self.processed_ray_count += 1
+            for ray, segment_hits in zip(batch, batch_segment_hits):
+                self._process_ray(ray, segment_hits)
+                self.processed_ray_count += 1
 
-    def _find_nearest_intersection(self, ray):
+    def _sort_batch(self, batch):
+        """
+        Order a batch of rays by wavelength, then by direction.
+
+        Directions are grouped in bins of 0.1 rad, and the sort is stable, so
+        rays in the same bin keep their queue order.
+
+        Args:
+            batch (list): The rays to sort (with their directions cached)
+
+        Returns:
+            list: The same rays, sorted
+        """
+        directions = np.array([ray.direction() for ray in batch], dtype=np.float64)
+        wavelengths = np.array(
+            [np.nan if ray.wavelength is None else ray.wavelength for ray in batch],
+            dtype=np.float64
+        )
+        angle_bins = np.round(np.arctan2(directions[:, 1], directions[:, 0]), 1)
+        order = np.lexsort((angle_bins, wavelengths))
+        return [batch[i] for i in order.tolist()]
+
+    def _extend_ray(self, ray):
+        """
+        Extend the p2 of a ray far along its direction.
+
+        The ray's p2 from PointSource is just a direction (1 unit from p1), so it
+        is moved to a large distance to find intersections along the infinite ray.
+
+        This can't be deferred until after the intersection search: the
+        objects' on_ray_incident() gets the incident point as p1 and this p2,
+        and takes the incoming direction from p1 -> p2, so p2 must lie beyond
+        any hit. The extension itself is cheap since the direction is cached.
+
+        Args:
+            ray (Ray): The ray to extend (modified in place)
+        """
+        # The unit direction is cached on the ray, and stays valid as p2 is
+        # moved along it
+        dir_x, dir_y = ray.direction()
+        if dir_x or dir_y:
+            # Extend to a large distance for intersection testing
+            p1 = ray.p1
+            ray.p2 = {'x': p1['x'] + dir_x * 10000.0, 'y': p1['y'] + dir_y * 10000.0}
+
+    def _process_ray(self, ray, segment_hits=None, intersection_info=_NOT_SEARCHED):
+        """
+        Trace a single (already extended) ray to its nearest intersection.
+
+        Stores the ray segment and lets the intersected object spawn the
+        outgoing rays, which are appended to the pending queue.
+
+        Args:
+            ray (Ray): The ray to process
+            segment_hits (dict, optional): The ray's hits on the segment table,
+                as returned by `_segment_table_hits`, if already computed
+            intersection_info (dict or None, optional): The ray's nearest
+                intersection, as returned by `_find_nearest_intersection`, if
+                already searched
+        """
+        # Find the nearest intersection with surface merging support
+        if intersection_info is _NOT_SEARCHED:
+            intersection_info = self._find_nearest_intersection(ray, segment_hits)
+
+        if intersection_info is None:
+            # No intersection - ray continues to p2 (already extended by _extend_ray)
+            self.segment_batch.append(ray)
+        else:
+            # Unpack intersection info (now includes surface merging data)
+            obj = intersection_info['obj']
+            incident_point = intersection_info['point']
+            surface_merging_objs = intersection_info['surface_merging_objs']
+            undefined_behavior = intersection_info['undefined_behavior']
+
+            # Handle undefined behavior
+            if undefined_behavior and surface_merging_objs:
+                # Declare undefined behavior for each overlapping object
+                for merging_obj in surface_merging_objs:
+                    self.declare_undefined_behavior(obj, merging_obj)
+
+            # Save original p2 before truncation (needed for on_ray_incident)
+            original_p2 = {'x': ray.p2['x'], 'y': ray.p2['y']}
+
+            # Truncate ray at intersection point
+            ray.p2 = incident_point
+
+            # Store the ray segment
+            self.segment_batch.append(ray)
+
+            # Let the object handle the incident ray
+            on_ray_incident = self._incident_handlers.get(id(obj))
+            if on_ray_incident is not None:
+                # Create output ray compatible with existing objects
+                # They expect ray.p1/p2 to be dicts
+                # p2 should be in the ray direction (use original p2, not incident point)
+                output_ray_geom = _OutputRayGeom(
+                    incident_point, original_p2,
+                    ray.brightness_s, ray.brightness_p, ray.wavelength
+                )
+
+                # Object modifies the ray (may change direction, brightness, etc.)
+                # Pass surface_merging_objs to on_ray_incident
+                result = on_ray_incident(
+                    output_ray_geom,
+                    self.processed_ray_count,
+                    incident_point,
+                    surface_merging_objs
+                )
+
+                # Convert the outgoing rays back to Ray objects; rays with
+                # (nearly) zero brightness are absorbed before being converted
+                for new_ray_geom in self._normalize_emit(result, output_ray_geom):
+                    if _brightness_of(new_ray_geom) <= 1e-6:
+                        continue
+                    new_ray = self._dict_to_ray(new_ray_geom)
+                    if new_ray:
+                        self.pending_rays.append(new_ray)
+
+        # The segment is copied into segment_batch, so a ray this simulator
+        # took from the pool can be reused. Rays from add_ray() or returned
+        # as Ray objects by scene objects may still be referenced elsewhere.
+        ray_id = id(ray)
+        if ray_id in self._acquired_ray_ids:
+            self._acquired_ray_ids.remove(ray_id)
+            ray.release()
+
+    def _normalize_emit(self, result, primary_ray=None):
+        """
+        Get the rays emitted by an object as a list.
+
+        Handles all the return formats of on_simulation_start() and
+        on_ray_incident():
+        - None: only the primary ray (modified in place), if any
+        - A list: multiple output rays (e.g., beam splitter)
+        - A SimulationReturn dict: the primary ray unless 'isAbsorbed' is set,
+          followed by the rays in 'newRays'
+        - A single ray (object, or dict with 'p1' and 'p2')
+
+        Args:
+            result: The value returned by the object
+            primary_ray: The ray passed to on_ray_incident(), or None for
+                on_simulation_start()
+
+        Returns:
+            list: The emitted rays, not yet converted to Ray objects
+        """
+        if result is None:
+            return [] if primary_ray is None else [primary_ray]
+        if isinstance(result, list):
+            return result
+        if isinstance(result, dict) and 'p1' not in result:
+            rays = [] if primary_ray is None or result.get('isAbsorbed') else [primary_ray]
+            new_rays = result.get('newRays')
+            if new_rays:
+                if isinstance(new_rays, list):
+                    rays.extend(new_rays)
+                else:
+                    rays.append(new_rays)
+            return rays
+        return [result]
+
+    def _build_segment_table(self):
+        """
+        Collect the endpoints of the plain segment objects into arrays.
+
+        Objects that return a segment from `get_intersection_segment` are then
+        tested against a whole batch of rays at once by `_segment_table_hits`. This is
+        only done if there are at least MIN_VECTORIZED_SEGMENTS of them, or
+        MIN_COMPILED_SEGMENTS when the compiled kernel is available.
+        """
+        indices = []
+        segments = []
+        for i, obj in enumerate(self._indexed_objs):
+            if self._intersect_fns[i] is None or not hasattr(obj, 'get_intersection_segment'):
+                continue
+            segment = obj.get_intersection_segment()
+            if segment is not None:
+                indices.append(i)
+                segments.append(segment)
+
+        min_segments = self.MIN_COMPILED_SEGMENTS if HAS_NUMBA else self.MIN_VECTORIZED_SEGMENTS
+        if len(segments) < min_segments:
+            indices = []
+            segments = []
+        self._seg_obj_indices = indices
+        table = np.array(segments, dtype=np.float64).reshape(len(segments), 4)
+        self._seg_x1, self._seg_y1, self._seg_x2, self._seg_y2 = table.T.copy()
+        # The segments stay fixed during a run, so their terms of the line
+        # intersection formula are only computed once
+        self._seg_xb = self._seg_x2 - self._seg_x1
+        self._seg_yb = self._seg_y2 - self._seg_y1
+        self._seg_b = self._seg_x2 * self._seg_y1 - self._seg_x1 * self._seg_y2
+        # Output buffers of the compiled kernel
+        self._seg_hit_rows = np.empty(len(segments), dtype=np.int64)
+        self._seg_hit_x = np.empty(len(segments), dtype=np.float64)
+        self._seg_hit_y = np.empty(len(segments), dtype=np.float64)
+
+    def _segment_table_hits(self, rays):
+        """
+        Intersect a batch of rays with every segment of the segment table.
+
+        Uses the same arithmetic as `Geometry.lines_intersection` followed by
+        `intersection_is_on_segment` and `intersection_is_on_ray`, so the results
+        match `LineObjMixin.check_ray_intersects_shape` exactly.
+
+        With Numba, each ray goes through the compiled `_nearest_segment_hits`
+        loop. Otherwise the rays are broadcast against the segments with NumPy,
+        in blocks of at most MAX_SEGMENT_TABLE_BLOCK ray/segment pairs. Either
+        way, the hits that cannot be the nearest intersection or merge with it
+        are left out.
+
+        Args:
+            rays (list): The rays, with p1 and p2 as dicts
+
+        Returns:
+            list: For each ray, a dict mapping the scene index of each segment
+                object hit to its intersection point (dict with 'x', 'y' keys)
+        """
+        if HAS_NUMBA:
+            return [self._compiled_segment_table_hits(ray) for ray in rays]
+
+        sx1 = self._seg_x1
+        sy1 = self._seg_y1
+        sx2 = self._seg_x2
+        sy2 = self._seg_y2
+        b = self._seg_b
+        xb = self._seg_xb
+        yb = self._seg_yb
+        indices = self._seg_obj_indices
+        block_size = max(1, self.MAX_SEGMENT_TABLE_BLOCK // len(indices))
+        min_len_sq = self.MIN_RAY_SEGMENT_LENGTH ** 2
+        band = 2 * self.MIN_RAY_SEGMENT_LENGTH
+
+        results = []
+        for start in range(0, len(rays), block_size):
+            block = rays[start:start + block_size]
+            # One row per ray, broadcast against one column per segment
+            coords = np.array(
+                [(r.p1['x'], r.p1['y'], r.p2['x'], r.p2['y']) for r in block],
+                dtype=np.float64
+            )
+            x1, y1, x2, y2 = (coords[:, k:k + 1] for k in range(4))
+
+            # Intersection of each ray line with every segment line
+            a = x2 * y1 - x1 * y2
+            xa = x2 - x1
+            ya = y2 - y1
+            denominator = xa * yb - xb * ya
+            with np.errstate(divide='ignore', invalid='ignore'):
+                px = (a * xb - b * xa) / denominator
+                py = (a * yb - b * ya) / denominator
+
+            hit = np.abs(denominator) >= 1e-12
+            hit &= (px - sx1) * xb + (py - sy1) * yb >= 0
+            hit &= (px - sx2) * (sx1 - sx2) + (py - sy2) * (sy1 - sy2) >= 0
+            hit &= (px - x1) * xa + (py - y1) * ya >= 0
+
+            # Like the compiled kernel, keep only the hits at least
+            # MIN_RAY_SEGMENT_LENGTH from the ray start and within `band` of the
+            # nearest of them
+            with np.errstate(invalid='ignore'):
+                distance_sq = (px - x1) ** 2 + (py - y1) ** 2
+                hit &= distance_sq >= min_len_sq
+            nearest_sq = np.where(hit, distance_sq, np.inf).min(axis=1, keepdims=True)
+            hit &= distance_sq <= (np.sqrt(nearest_sq) + band) ** 2
+
+            block_hits = [{} for _ in block]
+            rows, cols = np.nonzero(hit)
+            for row, col, x, y in zip(rows.tolist(), cols.tolist(),
+                                      px[rows, cols].tolist(), py[rows, cols].tolist()):
+                block_hits[row][indices[col]] = {'x': x, 'y': y}
+            results.extend(block_hits)
+        return results
+
+    def _compiled_segment_table_hits(self, ray_geom):
+        """
+        Intersect a ray with the segment table using `_nearest_segment_hits`.
+
+        Args:
+            ray_geom: The ray, with p1 and p2 as dicts
+
+        Returns:
+            dict: Maps the scene index of each segment object kept to its
+                intersection point (dict with 'x', 'y' keys)
+        """
+        rows = self._seg_hit_rows
+        xs = self._seg_hit_x
+        ys = self._seg_hit_y
+        # Any hit merging with the nearest intersection is within
+        # MIN_RAY_SEGMENT_LENGTH of it, so twice that is a safe margin
+        count = _nearest_segment_hits(
+            float(ray_geom.p1['x']), float(ray_geom.p1['y']),
+            float(ray_geom.p2['x']), float(ray_geom.p2['y']),
+            self._seg_x1, self._seg_y1, self._seg_x2, self._seg_y2,
+            self._seg_xb, self._seg_yb, self._seg_b,
+            self.MIN_RAY_SEGMENT_LENGTH ** 2, 2 * self.MIN_RAY_SEGMENT_LENGTH,
+            rows, xs, ys
+        )
+        if not count:
+            return {}
+        indices = self._seg_obj_indices
+        return {
+            indices[row]: {'x': x, 'y': y}
+            for row, x, y in zip(rows[:count].tolist(), xs[:count].tolist(), ys[:count].tolist())
+        }
+
+    def _build_bvh(self):
+        """
+        Build the bounding volume hierarchy over the optical objects.
+
+        Objects with a bounding box (see `get_bounding_box`) go into the
+        hierarchy; objects without one are tested against every ray. Objects
+        in the segment table are left out, since they are tested separately,
+        so this must be called after `_build_segment_table`.
+
+        The bounding circles of the objects in the hierarchy (see
+        `get_bounding_circle`) are also collected, as (center_x, center_y,
+        padded radius squared) by scene index.
+        """
+        in_segment_table = set(self._seg_obj_indices)
+        boxed = []
+        self._unbounded_obj_indices = []
+        self._bounding_circles = {}
+        for i, obj in enumerate(self._indexed_objs):
+            if self._intersect_fns[i] is None or i in in_segment_table:
+                continue
+            box = obj.get_bounding_box() if hasattr(obj, 'get_bounding_box') else None
+            if box is None:
+                self._unbounded_obj_indices.append(i)
+            else:
+                boxed.append((i, box))
+                circle = obj.get_bounding_circle() if hasattr(obj, 'get_bounding_circle') else None
+                if circle is not None:
+                    radius = circle[2] + self.MIN_RAY_SEGMENT_LENGTH
+                    self._bounding_circles[i] = (circle[0], circle[1], radius * radius)
+        self._bvh = BoundingVolumeHierarchy(boxed, pad=self.MIN_RAY_SEGMENT_LENGTH)
+
+    def _ray_hits(self, ray_geom, segment_hits=None, direction=None):
+        """
+        Intersect a ray with the optical objects it may hit.
+
+        The objects in the bounding volume hierarchy are tested nearest box
+        first. Once the ray enters a box beyond the nearest hit found so far
+        (plus a margin for surface merging), that object and all the ones after
+        it are skipped, since none of them can be the nearest intersection or
+        merge with it.
+
+        Args:
+            ray_geom: The ray, with p1 and p2 as dicts
+            segment_hits (dict, optional): The ray's hits on the segment table,
+                if already computed for its batch
+            direction (tuple, optional): The ray's unit direction as (dx, dy)
+                (see `Ray.direction`), if already known; otherwise it is
+                computed from p2 - p1
+
+        Returns:
+            list: (obj, point, distance_squared) triples in scene order, with
+                the point as returned by `check_ray_intersects` (None if the
+                object is not hit) and its squared distance from the ray start
+                (inf if not hit)
+        """
+        p1 = ray_geom.p1
+        ox = p1['x']
+        oy = p1['y']
+        if self._bvh is None:
+            # Linear scan over the objects and methods indexed by run(), or
+            # over the scene's objects when called outside of run()
+            if self._intersect_fns:
+                objs = self._indexed_objs
+                intersect_fns = self._intersect_fns
+            else:
+                objs = self.scene.optical_objs
+                intersect_fns = [getattr(obj, 'check_ray_intersects', None) for obj in objs]
+            hits = []
+            for obj, check_ray_intersects in zip(objs, intersect_fns):
+                if check_ray_intersects is not None:
+                    point = check_ray_intersects(ray_geom)
+                    hits.append((obj, point, _distance_squared(point, ox, oy)))
+            return hits
+
+        if direction is None:
+            dx = ray_geom.p2['x'] - ox
+            dy = ray_geom.p2['y'] - oy
+            length = math.hypot(dx, dy)
+            direction = (dx / length, dy / length) if length else (0.0, 0.0)
+        dx, dy = direction
+        if segment_hits is None:
+            segment_hits = self._segment_table_hits([ray_geom])[0] if self._seg_obj_indices else {}
+
+        # Hit point and its squared distance by scene index
+        intersect_fns = self._intersect_fns
+        hits = {i: (point, _distance_squared(point, ox, oy)) for i, point in segment_hits.items()}
+        for i in self._unbounded_obj_indices:
+            point = intersect_fns[i](ray_geom)
+            hits[i] = (point, _distance_squared(point, ox, oy))
+
+        # Nearest valid hit so far, among the objects without a box
+        min_distance_squared = self.MIN_RAY_SEGMENT_LENGTH ** 2
+        nearest_distance_squared = math.inf
+        for _, distance_squared in hits.values():
+            if min_distance_squared <= distance_squared < nearest_distance_squared:
+                nearest_distance_squared = distance_squared
+
+        # Hits merging with the nearest one are within MIN_RAY_SEGMENT_LENGTH of
+        # it, so twice that is a safe margin. The direction is a unit vector, so
+        # t_enter is the distance along the ray (and a zero direction, from a
+        # degenerate ray, only gives t_enter = 0 or inf).
+        band = 2 * self.MIN_RAY_SEGMENT_LENGTH
+        t_limit = math.sqrt(nearest_distance_squared) + band
+        circles = self._bounding_circles
+        for t_enter, i in self._bvh.iter_ordered(ox, oy, dx, dy):
+            if t_enter > t_limit:
+                break
+            circle = circles.get(i)
+            if circle is not None:
+                # Squared distance from the center to the ray's line
+                cross = (circle[0] - ox) * dy - (circle[1] - oy) * dx
+                if cross * cross > circle[2]:
+                    continue
+            point = intersect_fns[i](ray_geom)
+            distance_squared = _distance_squared(point, ox, oy)
+            hits[i] = (point, distance_squared)
+            if min_distance_squared <= distance_squared < nearest_distance_squared:
+                nearest_distance_squared = distance_squared
+                t_limit = math.sqrt(distance_squared) + band
+
+        # Keep the scene order, which decides the order of equally distant hits
+        objs = self._indexed_objs
+        return [(objs[i],) + hits[i] for i in sorted(hits)]
+
+    def _find_nearest_intersection(self, ray, segment_hits=None):
         """
         Find the nearest intersection point between a ray and all optical objects.
         Implements surface merging for glass objects that share a common edge.
 
         Args:
             ray (Ray): The ray to test for intersections
+            segment_hits (dict, optional): The ray's hits on the segment table,
+                if already computed for its batch (see `_segment_table_hits`)
 
         Returns:
             dict or None: Dictionary containing:
@@ -244,79 +936,64 @@ class Simulator:
                 - 'undefined_behavior': Boolean, True if incompatible objects overlap
                 None if no intersection found
         """
-        nearest_obj = None
-        nearest_point = None
-        nearest_distance_squared = float('inf')
         surface_merging_objs = []
         undefined_behavior = False
 
-        # Create a geometry-compatible ray object
-        # The existing objects expect ray.p1 and ray.p2 to be dicts (not Point objects)
-        class RayGeom:
-            pass
-
-        ray_geom = RayGeom()
+        # Reuse the simulator's geometry-compatible view of the ray
+        ray_geom = self._scratch_ray_geom
         ray_geom.p1 = ray.p1  # Already a dict
         ray_geom.p2 = ray.p2  # Already a dict
         ray_geom.brightness_s = ray.brightness_s
         ray_geom.brightness_p = ray.brightness_p
         ray_geom.wavelength = ray.wavelength
 
-        # First pass: find all intersections
+        # First pass: find all intersections, as (distance_squared, obj, point) tuples
+        min_distance_squared = self.MIN_RAY_SEGMENT_LENGTH ** 2
         all_intersections = []
-        for obj in self.scene.optical_objs:
-            if not hasattr(obj, 'check_ray_intersects'):
+        for obj, intersection_point, distance_squared in self._ray_hits(
+                ray_geom, segment_hits, ray.direction()):
+            # Skip misses and intersections too close to the ray start
+            if intersection_point is None or distance_squared < min_distance_squared:
                 continue
-
-            intersection_point = obj.check_ray_intersects(ray_geom)
-
-            if intersection_point is not None:
-                # Convert Point to dict if needed
-                if hasattr(intersection_point, 'x') and hasattr(intersection_point, 'y'):
-                    intersection_dict = {'x': intersection_point.x, 'y': intersection_point.y}
-                else:
-                    intersection_dict = intersection_point
-
-                # Calculate distance from ray start to intersection
-                dx = intersection_dict['x'] - ray.p1['x']
-                dy = intersection_dict['y'] - ray.p1['y']
-                distance_squared = dx * dx + dy * dy
-
-                # Check if this is a valid intersection (not too close to start)
-                if distance_squared < self.MIN_RAY_SEGMENT_LENGTH ** 2:
-                    continue
-
-                all_intersections.append({
-                    'obj': obj,
-                    'point': intersection_dict,
-                    'distance_squared': distance_squared
-                })
+            all_intersections.append((distance_squared, obj, intersection_point))
 
         if not all_intersections:
             return None
 
-        # Sort by distance
-        all_intersections.sort(key=lambda x: x['distance_squared'])
+        # Sort by distance (stable, so equally distant hits stay in scene order)
+        all_intersections.sort(key=lambda x: x[0])
 
-        # The nearest intersection is the primary one
-        nearest_obj = all_intersections[0]['obj']
-        nearest_point = all_intersections[0]['point']
-        nearest_distance_squared = all_intersections[0]['distance_squared']
+        # The nearest intersection is the primary one; only its point is
+        # converted to a dict if it is a Point
+        nearest_distance_squared, nearest_obj, nearest_point = all_intersections[0]
+        if hasattr(nearest_point, 'x') and hasattr(nearest_point, 'y'):
+            nearest_point = {'x': nearest_point.x, 'y': nearest_point.y}
 
         # Check for surface merging: find all objects at nearly the same distance
-        threshold_squared = self.MIN_RAY_SEGMENT_LENGTH ** 2
+        nearest_x = nearest_point['x']
+        nearest_y = nearest_point['y']
+        # A point farther from the ray start than this (with a margin for
+        # rounding) is at least MIN_RAY_SEGMENT_LENGTH from the nearest one
+        merge_limit = math.sqrt(nearest_distance_squared) + 2 * self.MIN_RAY_SEGMENT_LENGTH
+        merge_limit_squared = merge_limit * merge_limit
 
         for i in range(1, len(all_intersections)):
-            other = all_intersections[i]
+            other_distance_squared, other_obj, other_point = all_intersections[i]
+            if other_distance_squared > merge_limit_squared:
+                # The rest are farther still
+                break
 
             # Calculate distance between intersection points
-            dx = other['point']['x'] - nearest_point['x']
-            dy = other['point']['y'] - nearest_point['y']
+            if hasattr(other_point, 'x') and hasattr(other_point, 'y'):
+                dx = other_point.x - nearest_x
+                dy = other_point.y - nearest_y
+            else:
+                dx = other_point['x'] - nearest_x
+                dy = other_point['y'] - nearest_y
             point_distance_squared = dx * dx + dy * dy
 
             # Check if this intersection is at nearly the same location
-            if point_distance_squared < threshold_squared:
-                other_obj = other['obj']
+            if point_distance_squared < min_distance_squared:
 
                 # Check if surface merging is possible
                 # At least one must be a glass object
@@ -430,71 +1107,104 @@ class Simulator:
         The existing scene objects use geometry.line() which returns objects.
         This method converts them to Ray objects for the simulator.
 
+        The converter is looked up by the exact type of ray_data. The first
+        object of each new type goes through the isinstance/hasattr checks,
+        and its converter is then remembered for that type.
+
         Args:
             ray_data (dict, object, or Ray): Ray data to convert
 
         Returns:
             Ray or None: Converted Ray object, or None if invalid
         """
-        if isinstance(ray_data, Ray):
-            return ray_data
-
-        # Handle geometry.line() objects (have p1, p2 as attributes)
-        if hasattr(ray_data, 'p1') and hasattr(ray_data, 'p2'):
-            # Extract p1 and p2 (convert Point objects to dicts if needed)
-            p1 = ray_data.p1
-            p2 = ray_data.p2
-
-            # Convert Point objects to dicts
-            if hasattr(p1, 'x') and hasattr(p1, 'y'):
-                p1 = {'x': p1.x, 'y': p1.y}
-            if hasattr(p2, 'x') and hasattr(p2, 'y'):
-                p2 = {'x': p2.x, 'y': p2.y}
-
-            ray = Ray(
-                p1=p1,
-                p2=p2,
-                brightness_s=getattr(ray_data, 'brightness_s', 0.0),
-                brightness_p=getattr(ray_data, 'brightness_p', 0.0),
-                wavelength=getattr(ray_data, 'wavelength', None)
-            )
+        convert = self._to_ray_dispatch.get(type(ray_data))
+        if convert is None:
+            if isinstance(ray_data, Ray):
+                convert = _same_ray
+            elif hasattr(ray_data, 'p1') and hasattr(ray_data, 'p2'):
+                # Handle geometry.line() objects (have p1, p2 as attributes)
+                convert = self._ray_from_geom
+            elif isinstance(ray_data, dict):
+                convert = self._ray_from_dict
+            else:
+                return None
+            self._to_ray_dispatch[type(ray_data)] = convert
+        return convert(ray_data)
 
-            # Copy additional properties if present
-            if hasattr(ray_data, 'gap'):
-                ray.gap = ray_data.gap
-            if hasattr(ray_data, 'isNew'):
-                ray.is_new = ray_data.isNew
-
-            return ray
-
-        # Handle dictionary format
-        if isinstance(ray_data, dict) and 'p1' in ray_data and 'p2' in ray_data:
-            ray = Ray(
-                p1=ray_data['p1'],
-                p2=ray_data['p2'],
-                brightness_s=ray_data.get('brightness_s', 0.0),
-                brightness_p=ray_data.get('brightness_p', 0.0),
-                wavelength=ray_data.get('wavelength', None)
-            )
+    def _ray_from_geom(self, ray_data):
+        """
+        Convert an object with p1 and p2 attributes to a Ray object.
+
+        Args:
+            ray_data (object): The ray, with p1 and p2 as dicts or Point objects
 
-            # Copy additional properties if present
-            if 'gap' in ray_data:
-                ray.gap = ray_data['gap']
-            if 'isNew' in ray_data:
-                ray.is_new = ray_data['isNew']
+        Returns:
+            Ray: Converted Ray object
+        """
+        # Extract p1 and p2 (convert Point objects to dicts if needed)
+        p1 = ray_data.p1
+        p2 = ray_data.p2
+
+        # Convert Point objects to dicts
+        if hasattr(p1, 'x') and hasattr(p1, 'y'):
+            p1 = {'x': p1.x, 'y': p1.y}
+        if hasattr(p2, 'x') and hasattr(p2, 'y'):
+            p2 = {'x': p2.x, 'y': p2.y}
+
+        ray = Ray.acquire(
+            p1=p1,
+            p2=p2,
+            brightness_s=getattr(ray_data, 'brightness_s', 0.0),
+            brightness_p=getattr(ray_data, 'brightness_p', 0.0),
+            wavelength=getattr(ray_data, 'wavelength', None)
+        )
+        self._acquired_ray_ids.add(id(ray))
+
+        # Copy additional properties if present
+        if hasattr(ray_data, 'gap'):
+            ray.gap = ray_data.gap
+        if hasattr(ray_data, 'isNew'):
+            ray.is_new = ray_data.isNew
+
+        return ray
+
+    def _ray_from_dict(self, ray_data):
+        """
+        Convert a ray dictionary to a Ray object.
+
+        Args:
+            ray_data (dict): The ray, with 'p1' and 'p2' keys
+
+        Returns:
+            Ray or None: Converted Ray object, or None if p1 or p2 is missing
+        """
+        if 'p1' not in ray_data or 'p2' not in ray_data:
+            return None
+
+        ray = Ray.acquire(
+            p1=ray_data['p1'],
+            p2=ray_data['p2'],
+            brightness_s=ray_data.get('brightness_s', 0.0),
+            brightness_p=ray_data.get('brightness_p', 0.0),
+            wavelength=ray_data.get('wavelength', None)
+        )
+        self._acquired_ray_ids.add(id(ray))
 
-            return ray
+        # Copy additional properties if present
+        if 'gap' in ray_data:
+            ray.gap = ray_data['gap']
+        if 'isNew' in ray_data:
+            ray.is_new = ray_data['isNew']
 
-        return None
+        return ray
 
 
 # Example usage and testing
 if __name__ == "__main__":
     print("Testing Simulator class...\n")
 
-    # Import required modules for testing
+    # Import required modules for testing (Ray is imported at the top of the module)
     from scene import Scene
-    from ray import Ray
     from geometry import Geometry as geometry
 
 
@@ -527,6 +1237,13 @@ if __name__ == "__main__":
             self.p2 = p2
             self.is_optical = True
 
+            # Normal is perpendicular to mirror (computed once, the mirror doesn't move)
+            dx = p2['x'] - p1['x']
+            dy = p2['y'] - p1['y']
+            length = math.hypot(dx, dy)
+            self.normal_x = -dy / length
+            self.normal_y = dx / length
+
         def check_ray_intersects(self, ray):
             """Find intersection with mirror line segment."""
             # Simple line-segment intersection
@@ -564,19 +1281,13 @@ if __name__ == "__main__":
 
         def on_ray_incident(self, ray, ray_index, incident_point, surface_merging_objs=None):
             """Reflect the ray."""
-            # Calculate mirror normal
-            dx = self.p2['x'] - self.p1['x']
-            dy = self.p2['y'] - self.p1['y']
-            length = math.sqrt(dx*dx + dy*dy)
-
-            # Normal is perpendicular to mirror
-            normal_x = -dy / length
-            normal_y = dx / length
+            normal_x = self.normal_x
+            normal_y = self.normal_y
 
             # Incident direction
             inc_dx = ray.p2['x'] - ray.p1['x']
             inc_dy = ray.p2['y'] - ray.p1['y']
-            inc_len = math.sqrt(inc_dx*inc_dx + inc_dy*inc_dy)
+            inc_len = math.hypot(inc_dx, inc_dy)
             inc_dx /= inc_len
             inc_dy /= inc_len
 
@@ -1051,4 +1762,245 @@ if __name__ == "__main__":
     print("ALL SURFACE MERGING TESTS PASSED!")
     print("="*60)
 
+    # Test 13: Bounding volume hierarchy gives the same rays as a linear scan
+    print("\nTest 13: Bounding volume hierarchy culling")
+
+    class BoxedMirror(MockMirror):
+        """Mock mirror with a bounding box, so that it goes into the hierarchy."""
+        test_count = 0
+
+        def check_ray_intersects(self, ray):
+            BoxedMirror.test_count += 1
+            return super().check_ray_intersects(ray)
+
+        def get_bounding_box(self):
+            return (min(self.p1['x'], self.p2['x']), min(self.p1['y'], self.p2['y']),
+                    max(self.p1['x'], self.p2['x']), max(self.p1['y'], self.p2['y']))
+
+    def build_mirror_scene():
+        scene13 = Scene()
+        for i in range(8):
+            angle = i * math.pi / 4 + 0.1
+            scene13.add_object(MockLightSource(
+                position={'x': 0, 'y': 0},
+                direction={'x': math.cos(angle), 'y': math.sin(angle)}
+            ))
+        # Ring of mirrors around the sources, and an unboxed absorber outside it
+        for i in range(24):
+            a1 = i * 2 * math.pi / 24
+            a2 = (i + 0.8) * 2 * math.pi / 24
+            scene13.add_object(BoxedMirror(
+                p1={'x': 200 * math.cos(a1), 'y': 200 * math.sin(a1)},
+                p2={'x': 180 * math.cos(a2), 'y': 180 * math.sin(a2)}
+            ))
+        scene13.add_object(MockAbsorber(p1={'x': 500, 'y': -1000}, p2={'x': 500, 'y': 1000}))
+        return scene13
+
+    simulator13 = Simulator(build_mirror_scene(), max_rays=200)
+    segments13 = simulator13.run()
+    tests_with_bvh = BoxedMirror.test_count
+    BoxedMirror.test_count = 0
+    linear13 = Simulator(build_mirror_scene(), max_rays=200)
+    linear13._build_segment_table = lambda: None  # Test every object against every ray
+    linear13._build_bvh = lambda: None
+    linear_segments13 = linear13.run()
+    print(f"  Ray segments with hierarchy: {len(segments13)}, with linear scan: {len(linear_segments13)}")
+    print(f"  Mirror tests with hierarchy: {tests_with_bvh}, with linear scan: {BoxedMirror.test_count}")
+    assert tests_with_bvh < BoxedMirror.test_count
+    assert len(segments13) == len(linear_segments13)
+    for seg_a, seg_b in zip(segments13, linear_segments13):
+        assert seg_a.p1 == seg_b.p1 and seg_a.p2 == seg_b.p2
+    print(f"  [OK] Same ray segments")
+
+    # Test 14: Vectorized segment table gives the same rays as check_ray_intersects()
+    print("\nTest 14: Vectorized plain segment intersections")
+    if __name__ == "__main__":
+        from core.scene_objs.glass.ideal_lens import IdealLens
+    else:
+        from .scene_objs.glass.ideal_lens import IdealLens
+
+    def build_lens_scene():
+        scene14 = Scene()
+        for i in range(12):
+            angle = i * math.pi / 6 + 0.05
+            scene14.add_object(MockLightSource(
+                position={'x': 0, 'y': 0},
+                direction={'x': math.cos(angle), 'y': math.sin(angle)}
+            ))
+        # Ring of lenses around the sources, and a ring of blockers outside it
+        for i in range(12):
+            angle = i * math.pi / 6
+            cx, cy = 100 * math.cos(angle), 100 * math.sin(angle)
+            tx, ty = -math.sin(angle) * 25, math.cos(angle) * 25
+            scene14.add_object(IdealLens(scene14, {
+                'p1': {'x': cx - tx, 'y': cy - ty},
+                'p2': {'x': cx + tx, 'y': cy + ty},
+                'focalLength': 50
+            }))
+        for i in range(120):
+            a1 = i * 2 * math.pi / 120
+            a2 = (i + 1) * 2 * math.pi / 120
+            scene14.add_object(Blocker(scene14, {
+                'p1': {'x': 300 * math.cos(a1), 'y': 300 * math.sin(a1)},
+                'p2': {'x': 300 * math.cos(a2), 'y': 300 * math.sin(a2)}
+            }))
+        return scene14
+
+    simulator14 = Simulator(build_lens_scene(), max_rays=200)
+    segments14 = simulator14.run()
+    linear14 = Simulator(build_lens_scene(), max_rays=200)
+    linear14._build_segment_table = lambda: None
+    linear14._build_bvh = lambda: None
+    linear_segments14 = linear14.run()
+    print(f"  Ray segments vectorized: {len(segments14)}, one by one: {len(linear_segments14)}")
+    assert len(segments14) == len(linear_segments14)
+    for seg_a, seg_b in zip(segments14, linear_segments14):
+        assert seg_a.p1 == seg_b.p1 and seg_a.p2 == seg_b.p2
+    print(f"  [OK] Same ray segments")
+
+    # Test 15: Bounding circles skip more intersection tests, with the same rays
+    print("\nTest 15: Bounding circle culling")
+
+    class BoxedDisk:
+        """Mock absorbing disk with a bounding box only."""
+        test_count = 0
+
+        def __init__(self, cx, cy, r):
+            self.cx, self.cy, self.r = cx, cy, r
+            self.is_optical = True
+
+        def get_bounding_box(self):
+            return (self.cx - self.r, self.cy - self.r, self.cx + self.r, self.cy + self.r)
+
+        def check_ray_intersects(self, ray):
+            BoxedDisk.test_count += 1
+            dx = ray.p2['x'] - ray.p1['x']
+            dy = ray.p2['y'] - ray.p1['y']
+            fx = ray.p1['x'] - self.cx
+            fy = ray.p1['y'] - self.cy
+            a = dx * dx + dy * dy
+            b = fx * dx + fy * dy
+            discriminant = b * b - a * (fx * fx + fy * fy - self.r * self.r)
+            if discriminant < 0:
+                return None
+            t = (-b - math.sqrt(discriminant)) / a
+            if t <= 0:
+                return None
+            return {'x': ray.p1['x'] + t * dx, 'y': ray.p1['y'] + t * dy}
+
+        def on_ray_incident(self, ray, ray_index, incident_point, surface_merging_objs=None):
+            ray.brightness_s = 0.0
+            ray.brightness_p = 0.0
+
+    class CircledDisk(BoxedDisk):
+        """Mock absorbing disk with its own circle as bounding circle."""
+
+        def get_bounding_circle(self):
+            return (self.cx, self.cy, self.r)
+
+    def build_disk_scene(disk_class):
+        scene15 = Scene()
+        for i in range(90):
+            angle = i * 2 * math.pi / 90 + 0.01
+            scene15.add_object(MockLightSource(
+                position={'x': 0, 'y': 0},
+                direction={'x': math.cos(angle), 'y': math.sin(angle)}
+            ))
+        # Sparse grid of disks around the sources
+        for gx in range(-4, 5):
+            for gy in range(-4, 5):
+                if gx or gy:
+                    scene15.add_object(disk_class(gx * 100, gy * 100, 30))
+        return scene15
+
+    segments15 = Simulator(build_disk_scene(CircledDisk), max_rays=500).run()
+    tests_with_circles = BoxedDisk.test_count
+    BoxedDisk.test_count = 0
+    boxed_segments15 = Simulator(build_disk_scene(BoxedDisk), max_rays=500).run()
+    print(f"  Disk tests with circles: {tests_with_circles}, boxes only: {BoxedDisk.test_count}")
+    assert tests_with_circles < BoxedDisk.test_count
+    assert len(segments15) == len(boxed_segments15)
+    for seg_a, seg_b in zip(segments15, boxed_segments15):
+        assert seg_a.p1 == seg_b.p1 and seg_a.p2 == seg_b.p2
+    print(f"  [OK] Same ray segments")
+
+    # Test 16: Sorting the batches reorders the segments but traces the same ones
+    print("\nTest 16: Sorted ray batches")
+    segments16 = Simulator(build_disk_scene(CircledDisk), max_rays=500, sort_pending_rays=True).run()
+
+    def segment_key(seg):
+        return (seg.p1['x'], seg.p1['y'], seg.p2['x'], seg.p2['y'])
+
+    print(f"  Ray segments sorted: {len(segments16)}, in queue order: {len(segments15)}")
+    print(f"  Same order: {[segment_key(s) for s in segments16] == [segment_key(s) for s in segments15]}")
+    assert sorted(map(segment_key, segments16)) == sorted(map(segment_key, segments15))
+    print(f"  [OK] Same ray segments")
+
+    # Test 17: SimulationReturn results keep the primary ray and add newRays
+    print("\nTest 17: Primary ray plus newRays")
+
+    class MockSplitter(MockMirror):
+        """Mock beam splitter: the ray passes through, and a reflected copy is added."""
+
+        def on_ray_incident(self, ray, ray_index, incident_point, surface_merging_objs=None):
+            reflected = _OutputRayGeom(dict(ray.p1), dict(ray.p2), ray.brightness_s / 2,
+                                       ray.brightness_p / 2, ray.wavelength)
+            MockMirror.on_ray_incident(self, reflected, ray_index, incident_point)
+            ray.p1 = incident_point
+            ray.brightness_s /= 2
+            ray.brightness_p /= 2
+            return {'newRays': [reflected], 'truncation': 0}
+
+    scene17 = Scene()
+    scene17.add_object(MockLightSource(position={'x': 0, 'y': 0}, direction={'x': 1, 'y': 1}))
+    scene17.add_object(MockSplitter(p1={'x': 50, 'y': 0}, p2={'x': 50, 'y': 100}))
+    segments17 = Simulator(scene17, max_rays=100).run()
+    print(f"  Ray segments: {len(segments17)}")
+    for seg in segments17[1:]:
+        print(f"    ({seg.p1['x']:.1f}, {seg.p1['y']:.1f}) -> ({seg.p2['x']:.1f}, {seg.p2['y']:.1f}), "
+              f"brightness {seg.total_brightness:.2f}")
+    assert len(segments17) == 3
+    assert segments17[1].p2['x'] > 50 and segments17[2].p2['x'] < 50
+    print(f"  [OK] Transmitted and reflected rays both traced")
+
+    # Test 18: A degenerate ray (p1 == p2) has no direction to search along
+    print("\nTest 18: Degenerate ray")
+    scene18 = Scene()
+    scene18.add_object(CircledDisk(100, 0, 30))
+    simulator18 = Simulator(scene18, max_rays=10)
+    simulator18.add_ray(Ray(p1={'x': 0, 'y': 0}, p2={'x': 0, 'y': 0}, brightness_s=1.0))
+    segments18 = simulator18.run()
+    print(f"  Ray segments: {len(segments18)}")
+    assert len(segments18) == 1
+    print(f"  [OK] Traced without a hit")
+
+    # Test 19: Searching the intersections in worker processes
+    print("\nTest 19: Worker processes")
+    simulator19 = Simulator(build_mirror_scene(), max_rays=200, workers=2)
+    simulator19.MIN_PARALLEL_BATCH = 1  # Send even the small batches of this scene
+    segments19 = simulator19.run()
+    print(f"  Ray segments with workers: {len(segments19)}, in process: {len(segments13)}")
+    assert len(segments19) == len(segments13)
+    for seg_a, seg_b in zip(segments19, segments13):
+        assert seg_a.p1 == seg_b.p1 and seg_a.p2 == seg_b.p2
+    print(f"  [OK] Same ray segments")
+
+    # Test 20: Traced rays go back to the Ray pool
+    print("\nTest 20: Ray pool reuse")
+    Ray._pool.clear()
+    simulator20 = Simulator(build_mirror_scene(), max_rays=200)
+    own_ray = Ray(p1={'x': 0, 'y': 0}, p2={'x': 0, 'y': 1})
+    simulator20.add_ray(own_ray)
+    simulator20.run()
+    pooled20 = list(Ray._pool._free)
+    print(f"  Rays in the pool after the run: {len(pooled20)}")
+    assert pooled20
+    # A ray queued with add_ray() is traced in place: the simulator moves its
+    # p2 to the end of the drawn segment, but never returns it to the pool
+    print(f"  Queued ray after the run: p1={own_ray.p1}, p2={own_ray.p2}")
+    assert all(ray is not own_ray for ray in pooled20)
+    assert own_ray.p1 == {'x': 0, 'y': 0}
+    assert own_ray.p2['x'] == 0 and own_ray.p2['y'] > 1
+    print(f"  [OK] Only rays acquired by the simulator were released")
+
     print("\nSimulator test completed successfully!")
@@ -15,7 +15,124 @@ limitations under the License.
 """
 
 import svgwrite
+import gzip
 import math
+import numpy as np
+from xml.sax.saxutils import escape
+
+
+def _svg_number(value, precision=4):
+    """Format a number the way svgwrite does for the tiny profile (precision=4)."""
+    if isinstance(value, float):
+        return str(round(value, precision))
+    return str(value)
+
+
+def _svg_attr(value):
+    """Escape a value for use inside a double-quoted XML attribute."""
+    return escape(str(value), {'"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#09;'})
+
+
+class _Drawing(svgwrite.Drawing):
+    """
+    svgwrite Drawing that can hold preformatted markup in its groups.
+
+    Building an svgwrite element per ray (with its attribute dict and
+    validation) dominates the rendering time of large scenes, so ray lines are
+    written directly as XML strings instead. They are spliced into their group
+    when the drawing is serialized, so tostring(), write() and saveas() all
+    include them; write() and saveas() stream them to the file without
+    joining them first.
+
+    Lines can also be collected as path data by style, to be written as one
+    <path> element per style.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._raw_markup = {}
+        self._raw_paths = {}
+
+    def raw_markup(self, group_id):
+        """
+        Get the list of XML fragments to output at the start of a group.
+
+        Args:
+            group_id (str): The id attribute of the group
+
+        Returns:
+            list: Fragments (str) to append to; they are output in order,
+                before any svgwrite element added to the group
+        """
+        return self._raw_markup.setdefault(group_id, [])
+
+    def raw_paths(self, group_id):
+        """
+        Get the path data to output as <path> elements at the start of a group.
+
+        Args:
+            group_id (str): The id attribute of the group
+
+        Returns:
+            dict: Maps a (stroke, stroke-opacity, stroke-width) tuple of
+                attribute strings to the list of path data commands (str) to
+                append to; each entry becomes one unfilled <path>, output
+                after the fragments of raw_markup()
+        """
+        return self._raw_paths.setdefault(group_id, {})
+
+    def _iter_group_markup(self, group_id):
+        """Yield the preformatted markup of a group, piece by piece."""
+        yield from self._raw_markup.get(group_id, ())
+        for (stroke, opacity, width), commands in self._raw_paths.get(group_id, {}).items():
+            yield '<path d="'
+            yield from commands
+            yield (f'" fill="none" stroke="{stroke}" '
+                   f'stroke-opacity="{opacity}" stroke-width="{width}" />')
+
+    def _iter_markup(self):
+        """
+        Yield the SVG markup of the drawing in pieces.
+
+        The preformatted markup is yielded as stored instead of being joined
+        into the svgwrite output, so a large drawing can be written out
+        without building it as one string.
+        """
+        svg = super().tostring()
+        splices = []
+        for group_id in dict.fromkeys([*self._raw_markup, *self._raw_paths]):
+            if not (any(self._raw_markup.get(group_id, ())) or self._raw_paths.get(group_id)):
+                continue
+            start = svg.index(f'<g id="{group_id}"')
+            splices.append((start, svg.index('>', start), group_id))
+
+        pos = 0
+        for start, end, group_id in sorted(splices):
+            if svg[end - 1] == '/':
+                # Empty group written as <g ... />
+                yield svg[pos:end - 1].rstrip() + '>'
+                yield from self._iter_group_markup(group_id)
+                yield '</g>'
+            else:
+                yield svg[pos:end + 1]
+                yield from self._iter_group_markup(group_id)
+            pos = end + 1
+        yield svg[pos:]
+
+    def tostring(self):
+        return ''.join(self._iter_markup())
+
+    def write(self, fileobj, pretty=False, indent=2):
+        if pretty:
+            # Pretty printing parses the whole XML string anyway
+            return super().write(fileobj, pretty=pretty, indent=indent)
+        # Same header as svgwrite.Drawing.write()
+        fileobj.write('<?xml version="1.0" encoding="utf-8" ?>\n')
+        stylesheet_template = '<?xml-stylesheet href="%s" type="text/css" ' \
+            'title="%s" alternate="%s" media="%s"?>\n'
+        for stylesheet in self._stylesheets:
+            fileobj.write(stylesheet_template % stylesheet)
+        fileobj.writelines(self._iter_markup())
 
 
 class SVGRenderer:
@@ -41,13 +158,15 @@ class SVGRenderer:
         width (int): Canvas width in pixels
         height (int): Canvas height in pixels
         viewbox (tuple or None): SVG viewBox (min_x, min_y, width, height)
+        merge_rays (bool): Whether rays are drawn as one <path> per style
+        precision (int): Number of decimals of the coordinates in the output
         dwg (svgwrite.Drawing): The SVG drawing object
         layer_objects (svgwrite.Group): Group for object elements
         layer_rays (svgwrite.Group): Group for ray elements
         layer_labels (svgwrite.Group): Group for label elements
     """
 
-    def __init__(self, width=800, height=600, viewbox=None):
+    def __init__(self, width=800, height=600, viewbox=None, merge_rays=False, precision=4):
         """
         Initialize the SVG renderer.
 
@@ -56,6 +175,14 @@ class SVGRenderer:
             height (int): Canvas height in pixels (default: 600)
             viewbox (tuple or None): SVG viewBox as (min_x, min_y, width, height)
                                     If None, uses (0, 0, width, height)
+            merge_rays (bool): If True, rays with the same color, opacity and
+                stroke width are drawn as a single <path> element instead of
+                one <line> each. This makes the SVG of large scenes much
+                smaller and faster to display, but drops the per-ray id
+                metadata (default: False)
+            precision (int): Number of decimals the coordinates are rounded
+                to in the output, at most 4 (svgwrite's own precision). Fewer
+                decimals make large SVG files smaller (default: 4)
 
         Note:
             The viewbox coordinates use a Y-up system (positive Y goes up).
@@ -63,6 +190,8 @@ class SVGRenderer:
         """
         self.width = width
         self.height = height
+        self.merge_rays = merge_rays
+        self.precision = min(precision, 4)
         self.user_viewbox = viewbox if viewbox is not None else (0, 0, width, height)
 
         # Convert user's Y-up viewbox to SVG's Y-down viewbox
@@ -73,8 +202,9 @@ class SVGRenderer:
         self.viewbox = svg_viewbox
 
         # Create SVG drawing with profile='tiny' to disable strict validation
-        # This allows custom data-* attributes
-        self.dwg = svgwrite.Drawing(size=(f'{width}px', f'{height}px'), profile='tiny')
+        # This allows custom data-* attributes. debug=False also skips
+        # svgwrite's per-attribute validation of every element we create.
+        self.dwg = _Drawing(size=(f'{width}px', f'{height}px'), profile='tiny', debug=False)
         self.dwg.viewbox(*self.viewbox)
 
         # Add white background (covers the entire viewbox)
@@ -89,6 +219,14 @@ class SVGRenderer:
         self.layer_objects = self.dwg.add(self.dwg.g(id='objects', transform='scale(1, -1)'))
         self.layer_rays = self.dwg.add(self.dwg.g(id='rays', transform='scale(1, -1)'))
         self.layer_labels = self.dwg.add(self.dwg.g(id='labels', transform='scale(1, -1)'))
+        # Ray lines, as XML strings output at the start of the rays layer
+        self._ray_lines = self.dwg.raw_markup('rays')
+        # Path data of merged rays, by style
+        self._ray_paths = self.dwg.raw_paths('rays')
+        # Formatted (stroke, stroke-opacity, stroke-width) attribute values of
+        # the ray styles used so far. Keyed with the value types as well,
+        # since e.g. 1 and 1.0 compare equal but are written differently.
+        self._ray_styles = {}
 
     def _normalize_coord(self, value):
         """
@@ -124,6 +262,18 @@ class SVGRenderer:
             'y': self._normalize_coord(point['y'])
         }
 
+    def _round_coord(self, value):
+        """
+        Round a coordinate passed to svgwrite to the output precision.
+
+        Args:
+            value (float): Coordinate value
+
+        Returns:
+            float: value rounded to self.precision decimals
+        """
+        return round(value, self.precision)
+
     def draw_ray_segment(self, ray, color='red', opacity=1.0, stroke_width=1.5, extend_to_edge=False):
         """
         Draw a ray segment.
@@ -135,33 +285,56 @@ class SVGRenderer:
             stroke_width (float): Line width in pixels (default: 1.5)
             extend_to_edge (bool): If True, extend ray to viewport edge (default: False)
         """
-        import math
+        # Don't draw if it's a gap
+        if ray.gap:
+            return
 
-        p1 = ray.p1
-        p2 = ray.p2
+        # Work on plain coordinates from here on
+        x1 = ray.p1['x']
+        y1 = ray.p1['y']
+        x2 = ray.p2['x']
+        y2 = ray.p2['y']
 
-        # Skip rays with invalid coordinates
-        if (math.isnan(p1['x']) or math.isnan(p1['y']) or
-            math.isnan(p2['x']) or math.isnan(p2['y']) or
-            math.isinf(p1['x']) or math.isinf(p1['y']) or
-            math.isinf(p2['x']) or math.isinf(p2['y'])):
+        # Skip rays with invalid (NaN or infinite) coordinates
+        if not (math.isfinite(x1) and math.isfinite(y1) and
+                math.isfinite(x2) and math.isfinite(y2)):
             return
 
         if extend_to_edge:
             # Extend the ray to the edge of the viewbox
-            p2 = self._extend_to_edge(p1, p2)
+            x2, y2 = self._extend_to_edge(x1, y1, x2, y2)
 
         # Clip the ray to the viewbox boundaries
         # This prevents drawing geometry way outside the visible area
-        p1_clipped, p2_clipped = self._clip_to_viewbox(p1, p2)
+        clipped = self._clip_to_viewbox(x1, y1, x2, y2)
 
-        if p1_clipped is None or p2_clipped is None:
+        if clipped is None:
             # Ray is completely outside the viewbox
             return
 
         # Normalize coordinates to handle edge cases like -0.0
-        p1 = self._normalize_point(p1_clipped)
-        p2 = self._normalize_point(p2_clipped)
+        normalize = self._normalize_coord
+        x1 = normalize(clipped[0])
+        y1 = normalize(clipped[1])
+        x2 = normalize(clipped[2])
+        y2 = normalize(clipped[3])
+
+        style_key = (color, opacity, stroke_width, type(opacity), type(stroke_width))
+        style = self._ray_styles.get(style_key)
+        if style is None:
+            style = (_svg_attr(color), _svg_number(opacity), _svg_number(stroke_width))
+            self._ray_styles[style_key] = style
+
+        if self.merge_rays:
+            commands = self._ray_paths.get(style)
+            if commands is None:
+                commands = self._ray_paths[style] = []
+            precision = self.precision
+            commands.append(
+                f'M{_svg_number(x1, precision)} {_svg_number(y1, precision)}'
+                f'L{_svg_number(x2, precision)} {_svg_number(y2, precision)}'
+            )
+            return
 
         # Create line element with id containing metadata
         # (data-* attributes are not supported in svgwrite tiny profile)
@@ -169,18 +342,99 @@ class SVGRenderer:
         if ray.wavelength is not None:
             ray_id += f'-w{ray.wavelength:.0f}'
 
-        line = self.dwg.line(
-            start=(p1['x'], p1['y']),
-            end=(p2['x'], p2['y']),
-            stroke=color,
-            stroke_width=stroke_width,
-            stroke_opacity=opacity,
-            id=ray_id
+        # Written as the same markup svgwrite would produce for a line element
+        precision = self.precision
+        self._ray_lines.append(
+            f'<line id="{_svg_attr(ray_id)}" stroke="{style[0]}" '
+            f'stroke-opacity="{style[1]}" stroke-width="{style[2]}" '
+            f'x1="{_svg_number(x1, precision)}" x2="{_svg_number(x2, precision)}" '
+            f'y1="{_svg_number(y1, precision)}" y2="{_svg_number(y2, precision)}" />'
         )
 
-        # Don't draw if it's a gap
-        if not ray.gap:
-            self.layer_rays.add(line)
+    def draw_ray_batch(self, batch, color='red', opacity=1.0, stroke_width=1.5):
+        """
+        Draw every ray segment of a RayBatch.
+
+        Gives the same output as calling draw_ray_segment() on each ray of the
+        batch in order, but the gap, NaN/Inf and viewbox clipping of all rays
+        is done with NumPy at once, so only the markup is built per ray.
+        Rays are not extended to the viewbox edge.
+
+        Args:
+            batch (RayBatch): The ray segments to draw (e.g. Simulator.segment_batch)
+            color (str): CSS color string (default: 'red')
+            opacity (float or np.ndarray): Opacity 0.0-1.0, or one opacity per
+                ray of the batch (default: 1.0)
+            stroke_width (float): Line width in pixels (default: 1.5)
+        """
+        n = batch.size
+        x1 = batch.p1[:n, 0]
+        y1 = batch.p1[:n, 1]
+        x2 = batch.p2[:n, 0]
+        y2 = batch.p2[:n, 1]
+
+        # Skip gaps and rays with invalid (NaN or infinite) coordinates
+        keep = ~batch.gap_mask()
+        keep &= np.isfinite(x1) & np.isfinite(y1) & np.isfinite(x2) & np.isfinite(y2)
+
+        # Clip to the viewbox, as _clip_to_viewbox does for a single ray
+        min_x, min_y, width, height = self.user_viewbox
+        dx = x2 - x1
+        dy = y2 - y1
+        t0 = np.zeros(n)
+        t1 = np.ones(n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for p, q in ((-dx, x1 - min_x), (dx, min_x + width - x1),
+                         (-dy, y1 - min_y), (dy, min_y + height - y1)):
+                parallel = np.abs(p) < 1e-10
+                keep &= ~(parallel & (q < 0))
+                t = q / p
+                t0 = np.where(~parallel & (p < 0), np.maximum(t0, t), t0)
+                t1 = np.where(~parallel & (p > 0), np.minimum(t1, t), t1)
+        keep &= t0 <= t1
+
+        index = np.flatnonzero(keep)
+        t0 = t0[index]
+        t1 = t1[index]
+        x1, y1, dx, dy = x1[index], y1[index], dx[index], dy[index]
+        # Normalize coordinates to handle edge cases like -0.0
+        coords = [np.where(np.abs(v) < 1e-10, 0.0, v).tolist()
+                  for v in (x1 + t0 * dx, x1 + t1 * dx, y1 + t0 * dy, y1 + t1 * dy)]
+
+        stroke = _svg_attr(color)
+        stroke_width = _svg_number(stroke_width)
+        precision = self.precision
+        if np.ndim(opacity):
+            opacities = [_svg_number(o) for o in np.asarray(opacity, dtype=float)[index].tolist()]
+        else:
+            opacities = [_svg_number(opacity)] * len(index)
+
+        if self.merge_rays:
+            paths = self._ray_paths
+            for opacity, cx1, cx2, cy1, cy2 in zip(opacities, *coords):
+                commands = paths.get((stroke, opacity, stroke_width))
+                if commands is None:
+                    commands = paths[(stroke, opacity, stroke_width)] = []
+                commands.append(
+                    f'M{_svg_number(cx1, precision)} {_svg_number(cy1, precision)}'
+                    f'L{_svg_number(cx2, precision)} {_svg_number(cy2, precision)}'
+                )
+            return
+
+        brightness = batch.total_brightness(index).tolist()
+        wavelengths = batch.wavelength[:n][index].tolist()
+        lines = self._ray_lines
+        for b, wavelength, opacity, cx1, cx2, cy1, cy2 in zip(
+                brightness, wavelengths, opacities, *coords):
+            ray_id = f'ray-b{b:.3f}'
+            if wavelength == wavelength:  # NaN is white light
+                ray_id += f'-w{wavelength:.0f}'
+            lines.append(
+                f'<line id="{_svg_attr(ray_id)}" stroke="{stroke}" '
+                f'stroke-opacity="{opacity}" stroke-width="{stroke_width}" '
+                f'x1="{_svg_number(cx1, precision)}" x2="{_svg_number(cx2, precision)}" '
+                f'y1="{_svg_number(cy1, precision)}" y2="{_svg_number(cy2, precision)}" />'
+            )
 
     def draw_point(self, point, color='black', radius=3, label=None):
         """
@@ -195,7 +449,7 @@ class SVGRenderer:
         point = self._normalize_point(point)
 
         circle = self.dwg.circle(
-            center=(point['x'], point['y']),
+            center=(self._round_coord(point['x']), self._round_coord(point['y'])),
             r=radius,
             fill=color
         )
@@ -204,7 +458,8 @@ class SVGRenderer:
         if label:
             text = self.dwg.text(
                 label,
-                insert=(point['x'] + radius + 2, point['y'] + radius + 2),
+                insert=(self._round_coord(point['x'] + radius + 2),
+                        self._round_coord(point['y'] + radius + 2)),
                 fill=color,
                 font_size='12px',
                 font_family='sans-serif',
@@ -227,8 +482,8 @@ class SVGRenderer:
         p2 = self._normalize_point(p2)
 
         line = self.dwg.line(
-            start=(p1['x'], p1['y']),
-            end=(p2['x'], p2['y']),
+            start=(self._round_coord(p1['x']), self._round_coord(p1['y'])),
+            end=(self._round_coord(p2['x']), self._round_coord(p2['y'])),
             stroke=color,
             stroke_width=stroke_width
         )
@@ -240,7 +495,7 @@ class SVGRenderer:
             mid_y = self._normalize_coord((p1['y'] + p2['y']) / 2)
             text = self.dwg.text(
                 label,
-                insert=(mid_x, mid_y + 5),
+                insert=(self._round_coord(mid_x), self._round_coord(mid_y + 5)),
                 fill=color,
                 font_size='12px',
                 font_family='sans-serif',
@@ -269,9 +524,10 @@ class SVGRenderer:
         # Calculate perpendicular direction
         dx = p2['x'] - p1['x']
         dy = p2['y'] - p1['y']
-        length = math.sqrt(dx*dx + dy*dy)
-        if length < 1e-6:
+        length_squared = dx*dx + dy*dy
+        if length_squared < 1e-12:
             return
+        length = math.sqrt(length_squared)
 
         # Unit vectors parallel and perpendicular to lens
         par_x = dx / length
@@ -279,25 +535,32 @@ class SVGRenderer:
         per_x = par_y
         per_y = -par_x
 
+        # Arrow and center mark half-extents along and across the lens
         arrow_size = 10
+        center_size = 8
+        par_dx = par_x * arrow_size
+        par_dy = par_y * arrow_size
+        per_dx = per_x * arrow_size
+        per_dy = per_y * arrow_size
+        center_dx = per_x * center_size
+        center_dy = per_y * center_size
 
         # Draw arrows at endpoints
         if focal_length > 0:
             # Converging lens - arrows point inward
-            self._draw_arrow_inward(p1, par_x, par_y, per_x, per_y, arrow_size, color)
-            self._draw_arrow_inward(p2, -par_x, -par_y, per_x, per_y, arrow_size, color)
+            self._draw_arrow_inward(p1, par_dx, par_dy, per_dx, per_dy, color)
+            self._draw_arrow_inward(p2, -par_dx, -par_dy, per_dx, per_dy, color)
         else:
             # Diverging lens - arrows point outward
-            self._draw_arrow_outward(p1, par_x, par_y, per_x, per_y, arrow_size, color)
-            self._draw_arrow_outward(p2, -par_x, -par_y, per_x, per_y, arrow_size, color)
+            self._draw_arrow_outward(p1, par_dx, par_dy, per_dx, per_dy, color)
+            self._draw_arrow_outward(p2, -par_dx, -par_dy, per_dx, per_dy, color)
 
         # Draw center mark
         mid_x = self._normalize_coord((p1['x'] + p2['x']) / 2)
         mid_y = self._normalize_coord((p1['y'] + p2['y']) / 2)
-        center_size = 8
         center_line = self.dwg.line(
-            start=(mid_x - per_x * center_size, mid_y - per_y * center_size),
-            end=(mid_x + per_x * center_size, mid_y + per_y * center_size),
+            start=(self._round_coord(mid_x - center_dx), self._round_coord(mid_y - center_dy)),
+            end=(self._round_coord(mid_x + center_dx), self._round_coord(mid_y + center_dy)),
             stroke=color,
             stroke_width=2
         )
@@ -306,7 +569,7 @@ class SVGRenderer:
         if label:
             text = self.dwg.text(
                 label,
-                insert=(mid_x, mid_y + 15),
+                insert=(self._round_coord(mid_x), self._round_coord(mid_y + 15)),
                 fill=color,
                 font_size='12px',
                 font_family='sans-serif',
@@ -315,68 +578,69 @@ class SVGRenderer:
             )
             self.layer_labels.add(text)
 
-    def _draw_arrow_inward(self, pos, par_x, par_y, per_x, per_y, size, color):
-        """Draw an arrow pointing inward (for converging lens)."""
+    def _draw_arrow_inward(self, pos, par_dx, par_dy, per_dx, per_dy, color):
+        """
+        Draw an arrow pointing inward (for converging lens).
+
+        The arrow extends par_dx, par_dy along the lens and per_dx, per_dy
+        across it (unit vectors already scaled by the arrow size).
+        """
+        x = pos['x']
+        y = pos['y']
+        n = self.precision
         points = [
-            (pos['x'] - par_x * size, pos['y'] - par_y * size),
-            (pos['x'] + par_x * size + per_x * size, pos['y'] + par_y * size + per_y * size),
-            (pos['x'] + par_x * size - per_x * size, pos['y'] + par_y * size - per_y * size)
+            (round(x - par_dx, n), round(y - par_dy, n)),
+            (round(x + par_dx + per_dx, n), round(y + par_dy + per_dy, n)),
+            (round(x + par_dx - per_dx, n), round(y + par_dy - per_dy, n))
         ]
         polygon = self.dwg.polygon(points=points, fill=color)
         self.layer_objects.add(polygon)
 
-    def _draw_arrow_outward(self, pos, par_x, par_y, per_x, per_y, size, color):
-        """Draw an arrow pointing outward (for diverging lens)."""
+    def _draw_arrow_outward(self, pos, par_dx, par_dy, per_dx, per_dy, color):
+        """Draw an arrow pointing outward (for diverging lens), see _draw_arrow_inward."""
+        x = pos['x']
+        y = pos['y']
+        n = self.precision
         points = [
-            (pos['x'] + par_x * size, pos['y'] + par_y * size),
-            (pos['x'] - par_x * size + per_x * size, pos['y'] - par_y * size + per_y * size),
-            (pos['x'] - par_x * size - per_x * size, pos['y'] - par_y * size - per_y * size)
+            (round(x + par_dx, n), round(y + par_dy, n)),
+            (round(x - par_dx + per_dx, n), round(y - par_dy + per_dy, n)),
+            (round(x - par_dx - per_dx, n), round(y - par_dy - per_dy, n))
         ]
         polygon = self.dwg.polygon(points=points, fill=color)
         self.layer_objects.add(polygon)
 
-    def _clip_to_viewbox(self, p1, p2):
+    def _clip_to_viewbox(self, x1, y1, x2, y2):
         """
         Clip a line segment to the viewbox boundaries.
 
-        Uses Liang-Barsky algorithm to clip the line segment p1-p2 to the viewbox.
+        Uses Liang-Barsky algorithm to clip the line segment from (x1, y1) to
+        (x2, y2) to the viewbox.
 
         Args:
-            p1 (dict): Start point in Y-up coordinates
-            p2 (dict): End point in Y-up coordinates
+            x1, y1 (float): Start point in Y-up coordinates
+            x2, y2 (float): End point in Y-up coordinates
 
         Returns:
-            tuple: (clipped_p1, clipped_p2) or (None, None) if completely outside
+            tuple or None: Clipped (x1, y1, x2, y2), or None if completely outside
         """
         # Use user_viewbox which is in Y-up coordinates
         min_x, min_y, width, height = self.user_viewbox
         max_x = min_x + width
         max_y = min_y + height
 
-        x1, y1 = p1['x'], p1['y']
-        x2, y2 = p2['x'], p2['y']
         dx = x2 - x1
         dy = y2 - y1
 
         # Liang-Barsky algorithm
         t0, t1 = 0.0, 1.0
 
-        # Check all four edges
-        for edge in range(4):
-            if edge == 0:   # Left edge
-                p, q = -dx, x1 - min_x
-            elif edge == 1: # Right edge
-                p, q = dx, max_x - x1
-            elif edge == 2: # Bottom edge
-                p, q = -dy, y1 - min_y
-            else:           # Top edge
-                p, q = dy, max_y - y1
-
+        # Check all four edges: left, right, bottom, top
+        for p, q in ((-dx, x1 - min_x), (dx, max_x - x1), (-dy, y1 - min_y), (dy, max_y - y1)):
             if abs(p) < 1e-10:
                 # Line is parallel to this edge
                 if q < 0:
                     # Line is completely outside
-                    return None, None
+                    return None
             else:
                 t = q / p
                 if p < 0:
@@ -388,69 +652,98 @@ class SVGRenderer:
 
         if t0 > t1:
             # Line is completely outside
-            return None, None
+            return None
 
         # Calculate clipped points
-        clipped_p1 = {'x': x1 + t0 * dx, 'y': y1 + t0 * dy}
-        clipped_p2 = {'x': x1 + t1 * dx, 'y': y1 + t1 * dy}
+        return x1 + t0 * dx, y1 + t0 * dy, x1 + t1 * dx, y1 + t1 * dy
 
-        return clipped_p1, clipped_p2
-
-    def _extend_to_edge(self, p1, p2):
+    def _extend_to_edge(self, x1, y1, x2, y2):
         """
-        Extend a ray from p1 through p2 to the edge of the viewbox.
+        Extend a ray from (x1, y1) through (x2, y2) to the edge of the viewbox.
+
+        The ray is extended to the point where it leaves the viewbox, so a ray
+        starting outside and passing through it is drawn across it.
 
         Args:
-            p1 (dict): Start point in Y-up coordinates
-            p2 (dict): Direction point in Y-up coordinates
+            x1, y1 (float): Start point in Y-up coordinates
+            x2, y2 (float): Direction point in Y-up coordinates
 
         Returns:
-            dict: Point at the edge of viewbox
+            tuple: (x, y) point at the edge of viewbox
         """
-        dx = p2['x'] - p1['x']
-        dy = p2['y'] - p1['y']
+        dx = x2 - x1
+        dy = y2 - y1
 
         if abs(dx) < 1e-10 and abs(dy) < 1e-10:
-            return p2
+            return x2, y2
 
-        # Find intersection with viewbox edges (use user_viewbox for Y-up coordinates)
+        # Find where the ray leaves the viewbox (use user_viewbox for Y-up
+        # coordinates): along each axis it leaves through the side it is heading
+        # towards, and it is out of the box as soon as it is out of either slab
         min_x, min_y, width, height = self.user_viewbox
-        max_x = min_x + width
-        max_y = min_y + height
+        t_exit = math.inf
+        if abs(dx) > 1e-10:
+            far_x = min_x + width if dx > 0 else min_x
+            t_exit = (far_x - x1) / dx
+        if abs(dy) > 1e-10:
+            far_y = min_y + height if dy > 0 else min_y
+            t_exit = min(t_exit, (far_y - y1) / dy)
 
-        # Calculate t values for each edge
-        t_values = []
+        if not t_exit > 0:
+            # The viewbox is behind the ray
+            return x2, y2
 
-        if abs(dx) > 1e-10:
-            t_left = (min_x - p1['x']) / dx
-            t_right = (max_x - p1['x']) / dx
-            if t_left > 0:
-                t_values.append(t_left)
-            if t_right > 0:
-                t_values.append(t_right)
+        return x1 + dx * t_exit, y1 + dy * t_exit
 
-        if abs(dy) > 1e-10:
-            t_top = (min_y - p1['y']) / dy
-            t_bottom = (max_y - p1['y']) / dy
-            if t_top > 0:
-                t_values.append(t_top)
-            if t_bottom > 0:
-                t_values.append(t_bottom)
+    def clear(self):
+        """
+        Remove everything drawn so far, keeping the canvas, viewbox and layers.
 
-        if not t_values:
-            return p2
+        This is cheaper than creating a new renderer for every frame when
+        rendering many scenes with the same settings.
+        """
+        self.layer_objects.elements.clear()
+        self.layer_rays.elements.clear()
+        self.layer_labels.elements.clear()
+        # Cleared in place, the drawing holds the same containers
+        self._ray_lines.clear()
+        self._ray_paths.clear()
+
+    def render_many(self, draw_frames, filenames):
+        """
+        Render several frames with this renderer, saving each to its own file.
 
-        t = min(t_values)  # Use minimum t to get first edge intersection
-        return {'x': p1['x'] + dx * t, 'y': p1['y'] + dy * t}
+        The renderer is cleared before each frame, so the canvas and layers
+        are set up once for all of them (e.g. for a parameter sweep). After
+        the call it holds the last frame.
 
-    def save(self, filename):
+        Args:
+            draw_frames (iterable): Callables taking this renderer, each
+                drawing one frame with the draw_* methods
+            filenames (iterable): Output filename of each frame
+        """
+        for draw_frame, filename in zip(draw_frames, filenames):
+            self.clear()
+            draw_frame(self)
+            self.save(filename)
+
+    def save(self, filename, compress=None):
         """
         Save the SVG to a file.
 
         Args:
             filename (str): Output filename (e.g., 'output.svg')
+            compress (bool or None): If True, write a gzip-compressed SVG
+                (.svgz), which is much smaller for scenes with many rays.
+                If None, compress when filename ends with '.svgz' (default: None)
         """
-        self.dwg.saveas(filename)
+        if compress is None:
+            compress = filename.endswith('.svgz')
+        if compress:
+            with gzip.open(filename, 'wt', encoding='utf-8', compresslevel=6) as f:
+                self.dwg.write(f)
+        else:
+            self.dwg.saveas(filename)
 
     def to_string(self):
         """
@@ -633,6 +926,97 @@ if __name__ == "__main__":
     print(f"  Complete scene saved to: {scene_output}")
     print(f"  Scene contains: 1 source, 1 lens, 1 screen, {len(rays)} rays")
 
+    # Test 11: Extending rays to the viewbox edge
+    print("\nTest 11: Extend rays to the viewbox edge")
+    edge_renderer = SVGRenderer(width=100, height=100)
+    inside = edge_renderer._extend_to_edge(50, 50, 60, 55)
+    outside = edge_renderer._extend_to_edge(-50, 50, -40, 50)
+    behind = edge_renderer._extend_to_edge(-50, 50, -60, 50)
+    print(f"  From inside: {inside}")
+    print(f"  From outside, towards the viewbox: {outside}")
+    print(f"  From outside, away from the viewbox: {behind}")
+    assert inside == (100.0, 75.0)
+    assert outside == (100.0, 50.0)
+    assert behind == (-60, 50)
+
+    # Test 12: Merging rays into paths by style
+    print("\nTest 12: Merge rays into one path per style")
+    merged_renderer = SVGRenderer(width=100, height=100, merge_rays=True)
+    merged_renderer.draw_ray_segment(MockRay({'x': 10, 'y': 10}, {'x': 90, 'y': 10}), color='red')
+    merged_renderer.draw_ray_segment(MockRay({'x': 10, 'y': 20}, {'x': 90, 'y': 20.5}), color='red')
+    merged_renderer.draw_ray_segment(MockRay({'x': 10, 'y': 30}, {'x': 90, 'y': 30}), color='blue')
+    merged_svg = merged_renderer.to_string()
+    print(f"  Paths: {merged_svg.count('<path')}, lines: {merged_svg.count('<line')}")
+    assert merged_svg.count('<path') == 2 and '<line' not in merged_svg
+    assert 'd="M10.0 10.0L90.0 10.0M10.0 20.0L90.0 20.5" fill="none" stroke="red"' in merged_svg
+
+    # Test 13: Drawing a whole RayBatch
+    print("\nTest 13: Draw a RayBatch")
+    import sys
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from core.ray import Ray
+    from core.ray_batch import RayBatch
+    batch_rays = [
+        Ray(p1={'x': 10, 'y': 100}, p2={'x': 90, 'y': 100}),
+        Ray(p1={'x': -50, 'y': -20}, p2={'x': 150, 'y': 130}, brightness_s=0.3, wavelength=650),
+        Ray(p1={'x': 10, 'y': 160}, p2={'x': 90, 'y': 160}),
+        Ray(p1={'x': float('nan'), 'y': 100}, p2={'x': 90, 'y': 100}),
+        Ray(p1={'x': -50, 'y': 50}, p2={'x': -50, 'y': 150}),
+        Ray(p1={'x': 50, 'y': 50}, p2={'x': 50, 'y': 50}),
+    ]
+    batch_rays[2].gap = True
+    one_by_one = SVGRenderer(width=100, height=100, viewbox=(0, 0, 100, 150))
+    for ray in batch_rays:
+        one_by_one.draw_ray_segment(ray, color='red', opacity=0.7, stroke_width=1)
+    batched = SVGRenderer(width=100, height=100, viewbox=(0, 0, 100, 150))
+    batched.draw_ray_batch(RayBatch.from_rays(batch_rays), color='red', opacity=0.7, stroke_width=1)
+    print(f"  Lines drawn: {len(batched._ray_lines)}")
+    assert batched.to_string() == one_by_one.to_string()
+
+    # Test 14: Reduced coordinate precision
+    print("\nTest 14: Reduced coordinate precision")
+    coarse = SVGRenderer(width=100, height=100, precision=1)
+    coarse.draw_ray_segment(MockRay({'x': 10.123, 'y': 20.456}, {'x': 30.789, 'y': 40.111}))
+    coarse.draw_point({'x': 1.2345, 'y': 6.789}, radius=2)
+    coarse_svg = coarse.to_string()
+    print(f"  SVG length: {len(coarse_svg)} characters")
+    assert 'x1="10.1" x2="30.8" y1="20.5" y2="40.1"' in coarse_svg
+    assert 'cx="1.2" cy="6.8"' in coarse_svg
+
+    # Test 15: Clearing the renderer
+    print("\nTest 15: Clear the renderer")
+    coarse.draw_lens({'x': 10, 'y': 10}, {'x': 10, 'y': 50}, focal_length=20, label='Lens')
+    coarse.clear()
+    print(f"  SVG length after clear: {len(coarse.to_string())} characters")
+    assert coarse.to_string() == SVGRenderer(width=100, height=100, precision=1).to_string()
+
+    # Test 16: Rendering several frames
+    print("\nTest 16: Render several frames")
+    import tempfile
+    with tempfile.TemporaryDirectory() as frame_dir:
+        frame_files = [os.path.join(frame_dir, f'frame{i}.svg') for i in range(3)]
+        coarse.render_many(
+            [lambda r, i=i: r.draw_point({'x': 10 * i, 'y': 10}, label=f'Frame {i}') for i in range(3)],
+            frame_files
+        )
+        frame_texts = []
+        for frame_file in frame_files:
+            with open(frame_file) as f:
+                frame_texts.append(f.read())
+    print(f"  Frames saved: {len(frame_texts)}")
+    assert all(text.count('<circle') == 1 for text in frame_texts)
+    assert 'Frame 2' in frame_texts[2] and 'Frame 1' not in frame_texts[2]
+
+    # Test 17: Compressed output
+    print("\nTest 17: Save compressed SVG")
+    with tempfile.TemporaryDirectory() as svgz_dir:
+        svgz_file = os.path.join(svgz_dir, 'scene.svgz')
+        scene_renderer.save(svgz_file)
+        with gzip.open(svgz_file, 'rt', encoding='utf-8') as f:
+            svgz_text = f.read()
+        print(f"  Compressed size: {os.path.getsize(svgz_file)} bytes for {len(svgz_text)} characters")
+    assert svgz_text.endswith(scene_renderer.to_string())
+
     print("\nSVGRenderer test completed successfully!")
     print(f"\nTest files created in: {temp_dir}")
     print(f"  - test_renderer_output.svg")
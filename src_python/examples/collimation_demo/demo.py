@@ -34,6 +34,7 @@ Expected behavior:
 
 import sys
 import os
+import numpy as np
 
 # Add parent directories to path to import core modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -115,11 +116,10 @@ def main():
     )
     renderer.draw_line_segment(screen.p1, screen.p2, color='black', stroke_width=3, label='Screen')
 
-    # Draw rays
-    for ray in ray_segments:
-        # Color rays by brightness for visibility
-        opacity = min(ray.total_brightness, 1.0)
-        renderer.draw_ray_segment(ray, color='red', opacity=opacity, stroke_width=1,extend_to_edge=False)
+    # Draw rays, colored by brightness for visibility
+    batch = simulator.segment_batch
+    opacity = np.minimum(batch.total_brightness(), 1.0)
+    renderer.draw_ray_batch(batch, color='red', opacity=opacity, stroke_width=1)
 
     # Save outputs to the same directory as this script
     import csv